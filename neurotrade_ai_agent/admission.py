@@ -0,0 +1,156 @@
+import asyncio
+import functools
+import logging
+import os
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict
+
+from market_snapshot import current_eth_data, format_price
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# 🚦 ADMISSION CONTROL
+# Caps the number of message handlers running at once. Extra messages wait
+# in a bounded FIFO queue; when that queue is full (or a message waits too
+# long) the message is shed with a cheap "busy" reply built from the cached
+# market snapshot instead of starting more work.
+
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "64"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "256"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "5"))
+
+Handler = Callable[[Any, str, Any], Awaitable[None]]
+
+
+class AdmissionController:
+    """Bounded in-flight limit with a bounded wait queue"""
+
+    def __init__(
+        self,
+        max_in_flight: int = ADMISSION_MAX_IN_FLIGHT,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT,
+    ):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.admitted = 0
+        self.shed = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> bool:
+        """Take a handler slot; returns False if the message should be shed"""
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+
+        if len(self._waiters) >= self.max_queue:
+            self.shed += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up; pass it on
+                self.release()
+            else:
+                waiter.cancel()
+                self._remove_waiter(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.shed += 1
+            return False
+
+        # release() transferred its slot to us, in_flight already counts it
+        self.admitted += 1
+        return True
+
+    def release(self):
+        """Free a handler slot, handing it straight to the oldest waiter if any"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self.in_flight = max(0, self.in_flight - 1)
+
+    def _remove_waiter(self, waiter: asyncio.Future):
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "admitted": self.admitted,
+            "shed": self.shed,
+        }
+
+
+admission = AdmissionController()
+
+registry.gauge(
+    "neurotrade_admission_in_flight", "Message handlers currently running",
+    callback=lambda: admission.in_flight,
+)
+registry.gauge(
+    "neurotrade_admission_queue_depth", "Messages waiting for a handler slot",
+    callback=lambda: admission.queue_depth,
+)
+shed_total = registry.counter(
+    "neurotrade_admission_shed_total", "Messages answered with a busy reply instead of being processed",
+    ("handler",),
+)
+
+
+def busy_text() -> str:
+    """Cheap "busy, try again" reply built from the cached snapshot"""
+    eth_data = current_eth_data()
+    age = eth_data.get("snapshot_age")
+    freshness = f" (cached {age:.0f}s ago)" if age is not None else ""
+    return (
+        "⏳ **NeuroTrade AI is busy right now**\n\n"
+        f"💰 **Last known ETH Price**: {format_price(eth_data)}{freshness}\n"
+        f"📈 **24h Change**: {eth_data['change_24h']:+.2f}%\n\n"
+        "🔁 Please try again in a moment for a full analysis."
+    )
+
+
+def admission_controlled(handler_name: str, on_shed: Handler):
+    """Wrap an on_message handler so it only runs when admitted
+
+    Shed messages are passed to on_shed(ctx, sender, msg), which should send
+    a cheap reply and must not do upstream work.
+    """
+    def decorator(handler: Handler) -> Handler:
+        @functools.wraps(handler)
+        async def wrapper(ctx, sender: str, msg):
+            if not await admission.acquire():
+                shed_total.inc(handler=handler_name)
+                ctx.logger.warning(f"🚦 Shedding {handler_name} message from {sender} (queue full)")
+                try:
+                    await on_shed(ctx, sender, msg)
+                except Exception as e:
+                    ctx.logger.error(f"Error sending busy reply: {e}")
+                return
+            try:
+                await handler(ctx, sender, msg)
+            finally:
+                admission.release()
+        return wrapper
+    return decorator
+
+
+__all__ = ["AdmissionController", "admission", "admission_controlled", "busy_text"]
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from typing import Any, Callable, Dict, Optional
+
+from uagents.storage import StorageAPI
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# 💽 WRITE-COALESCING AGENT STORAGE
+# Drop-in replacement for uAgents' KeyValueStore (ctx.storage). The default
+# store rewrites its whole JSON file on every set(), so each chat message
+# paid for every session ever stored. Here reads and writes only touch an
+# in-memory dict; changes are written out in one batch at most every
+# STORAGE_FLUSH_DELAY seconds, and keys with a TTL (chat session -> sender
+# mappings by default) are dropped once they expire. The data file keeps the
+# KeyValueStore format; expiry times live in a small sidecar file.
+
+STORAGE_FLUSH_DELAY = float(os.getenv("STORAGE_FLUSH_DELAY", "1.0"))
+STORAGE_SESSION_TTL = float(os.getenv("STORAGE_SESSION_TTL", "3600"))
+
+_UUID_RE = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
+storage_flushes_total = registry.counter(
+    "neurotrade_storage_flushes_total", "Batched agent storage writes to disk",
+)
+
+
+def session_key_ttl(key: str) -> Optional[float]:
+    """TTL policy: chat session ids (UUIDs) expire, everything else is kept"""
+    return STORAGE_SESSION_TTL if _UUID_RE.match(key) else None
+
+
+class CoalescingKeyValueStore(StorageAPI):
+    """In-memory key-value store with debounced, batched JSON flushes and key TTLs"""
+
+    def __init__(
+        self,
+        name: str,
+        cwd: Optional[str] = None,
+        flush_delay: float = STORAGE_FLUSH_DELAY,
+        ttl_policy: Callable[[str], Optional[float]] = session_key_ttl,
+    ):
+        self._name = name or "my"
+        cwd = cwd or os.getcwd()
+        self._path = os.path.join(cwd, f"{self._name}_data.json")
+        self._ttl_path = os.path.join(cwd, f"{self._name}_data.ttl.json")
+        self.flush_delay = flush_delay
+        self._ttl_policy = ttl_policy
+        self._data: Dict[str, Any] = {}
+        self._expires: Dict[str, float] = {}
+        self._dirty = False
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self.writes = 0
+        self.flushes = 0
+        self._load()
+
+    # === StorageAPI ===
+
+    def get(self, key: str) -> Any:
+        if self._expired(key):
+            return None
+        return self._data.get(key)
+
+    def has(self, key: str) -> bool:
+        return key in self._data and not self._expired(key)
+
+    def set(self, key: str, value: Any) -> None:
+        ttl = self._ttl_policy(key)
+        if ttl is not None:
+            self._expires[key] = time.time() + ttl
+        elif self._data.get(key, _MISSING) == value:
+            return  # unchanged, nothing to write
+        self._data[key] = value
+        self._mark_dirty()
+
+    def remove(self, key: str) -> None:
+        if key in self._data:
+            del self._data[key]
+            self._expires.pop(key, None)
+            self._mark_dirty()
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._expires.clear()
+        self._mark_dirty()
+
+    # === Expiry and flushing ===
+
+    def _expired(self, key: str) -> bool:
+        expires = self._expires.get(key)
+        return expires is not None and expires <= time.time()
+
+    def purge_expired(self) -> int:
+        """Drop every expired key; returns how many were removed"""
+        now = time.time()
+        expired = [key for key, expires in self._expires.items() if expires <= now]
+        for key in expired:
+            self._data.pop(key, None)
+            del self._expires[key]
+        if expired:
+            self._dirty = True
+        return len(expired)
+
+    def _mark_dirty(self):
+        self.writes += 1
+        self._dirty = True
+        if self._flush_handle is not None:
+            return  # already scheduled; this write joins the batch
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()  # no event loop (e.g. setup scripts): write through
+            return
+        self._flush_handle = loop.call_later(self.flush_delay, self._scheduled_flush)
+
+    def _scheduled_flush(self):
+        self._flush_handle = None
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Error flushing agent storage: {e}")
+
+    def flush(self):
+        """Write pending changes now (expired keys are dropped first)"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self.purge_expired()
+        if not self._dirty:
+            return
+        _write_json(self._path, self._data, indent=4)
+        _write_json(self._ttl_path, self._expires)
+        self._dirty = False
+        self.flushes += 1
+        storage_flushes_total.inc()
+
+    def close(self):
+        self.flush()
+
+    def _load(self):
+        if os.path.isfile(self._path):
+            with open(self._path, encoding="utf-8") as f:
+                self._data = json.load(f)
+        if os.path.isfile(self._ttl_path):
+            with open(self._ttl_path, encoding="utf-8") as f:
+                self._expires = {k: v for k, v in json.load(f).items() if k in self._data}
+        if self.purge_expired():
+            self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "keys": len(self._data),
+            "ttl_keys": len(self._expires),
+            "writes": self.writes,
+            "flushes": self.flushes,
+        }
+
+
+_MISSING = object()
+
+
+def _write_json(path: str, data: Dict, indent: Optional[int] = None):
+    """Atomically replace path with data as JSON"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+    os.replace(tmp_path, path)
+
+
+__all__ = ["CoalescingKeyValueStore", "session_key_ttl"]
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the shared intent classifier
+
+Measures queries/second for intent.classify() with the default token table
+and with several thousand extra token symbols registered, next to the old
+chain of substring checks for reference.
+
+Usage: python benchmarks/bench_intent.py [--queries 50000] [--tokens 5000]
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from intent import IntentClassifier  # noqa: E402
+
+SAMPLE_QUERIES = [
+    "What's the current ETH price?",
+    "Should I buy ETH now?",
+    "should i sell my eth before the weekend",
+    "Swap 1.5k USDC to ETH on arbitrum",
+    "ETH forecast for next week",
+    "market analysis please",
+    "cross-chain bridge from polygon to optimism",
+    "I'm busy, just tell me the trend",
+    "swap 250 WBTC to ARB on arbitrum",
+    "hello",
+]
+
+
+def legacy_classify(query: str) -> str:
+    """The substring chain the response generators used before intent.py"""
+    query_lower = query.lower()
+    if "buy" in query_lower or "purchase" in query_lower:
+        return "buy"
+    elif "sell" in query_lower:
+        return "sell"
+    elif "swap" in query_lower:
+        return "swap"
+    elif "price" in query_lower:
+        return "price"
+    elif "cross" in query_lower and "chain" in query_lower:
+        return "cross_chain"
+    return "general"
+
+
+def random_symbols(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    return [
+        "".join(rng.choices(string.ascii_uppercase, k=rng.randint(3, 6)))
+        for _ in range(count)
+    ]
+
+
+def run(label: str, classify, queries: list) -> float:
+    start = time.perf_counter()
+    for query in queries:
+        classify(query)
+    elapsed = time.perf_counter() - start
+    rate = len(queries) / elapsed
+    print(f"{label:<38} {rate:>12,.0f} queries/s  ({elapsed * 1000:.1f} ms)")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the NeuroTrade intent classifier")
+    parser.add_argument("--queries", type=int, default=50000, help="number of queries to classify")
+    parser.add_argument("--tokens", type=int, default=5000, help="extra token symbols to register")
+    args = parser.parse_args()
+
+    queries = [SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)] for i in range(args.queries)]
+
+    default_classifier = IntentClassifier()
+    large_classifier = IntentClassifier()
+    large_classifier.add_tokens(random_symbols(args.tokens))
+
+    print(f"📊 Intent classifier benchmark ({args.queries:,} queries)")
+    print("=" * 70)
+    run("legacy substring chain", legacy_classify, queries)
+    run(f"classify ({default_classifier.token_count} tokens)", default_classifier.classify, queries)
+    run(f"classify ({large_classifier.token_count:,} tokens)", large_classifier.classify, queries)
+
+
+if __name__ == "__main__":
+    main()
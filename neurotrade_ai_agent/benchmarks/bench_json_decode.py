@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark: typed JSON decoding vs dict decoding + float() per field
+
+Builds large subgraph responses (a `tokens` and a `pools` page, numbers as
+strings, as the API returns them) or loads recorded ones, then times the
+old path - json.loads into nested dicts and float()/int() on every numeric
+field afterwards - against typed_json's decoders for each available backend
+(msgspec, orjson, stdlib json), and checks they produce the same numbers.
+
+Usage: python benchmarks/bench_json_decode.py [--tokens 10000] [--pools 5000] [--repeat 5]
+       python benchmarks/bench_json_decode.py --tokens-file tokens.json --pools-file pools.json
+       python benchmarks/bench_json_decode.py --record DIR   # write the synthetic payloads to DIR
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_upstreams import fake_pool, fake_token  # noqa: E402
+from typed_json import JSON_BACKEND, PoolRecord, TokenRecord, graph_decoders  # noqa: E402
+
+TOKEN_NUMBERS = (("derivedETH", float), ("totalSupply", float), ("volume", float), ("volumeUSD", float),
+                 ("feesUSD", float), ("txCount", int), ("totalValueLockedUSD", float))
+POOL_NUMBERS = (("feeTier", int), ("liquidity", float), ("sqrtPrice", float), ("tick", int),
+                ("token0Price", float), ("token1Price", float), ("volumeUSD", float), ("txCount", int),
+                ("totalValueLockedUSD", float))
+
+
+def synthetic_payload(key: str, count: int) -> bytes:
+    make = fake_token if key == "tokens" else fake_pool
+    return json.dumps({"data": {key: [make(f"0x{i + 1:040x}") for i in range(count)]}}).encode()
+
+
+def dict_decode(raw: bytes, key: str, numbers) -> list:
+    """The pre-typed path: nested dicts, then one float()/int() per field"""
+    rows = json.loads(raw)["data"][key]
+    for row in rows:
+        for field, convert in numbers:
+            if row.get(field) is not None:
+                row[field] = convert(row[field])
+        for side in ("token0", "token1"):
+            if side in row:
+                row[side]["decimals"] = int(row[side]["decimals"])
+    return rows
+
+
+def best_of(repeat: int, fn, *args):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(label: str, raw: bytes, key: str, record_type, numbers, repeat: int):
+    baseline_time, baseline = best_of(repeat, dict_decode, raw, key, numbers)
+    print(f"\n{label}: {len(baseline):,} records, {len(raw) / 1e6:.1f} MB")
+    print(f"{'dicts + float()':<18} {baseline_time * 1000:>10.2f} ms   {len(baseline) / baseline_time:>12,.0f} records/s")
+    for name, decode in graph_decoders().items():
+        elapsed, records = best_of(repeat, decode, raw, key, record_type, True)
+        for row, record in zip(baseline, records):
+            assert record.id == row["id"]
+            assert record.volume_usd == row["volumeUSD"]
+            assert record.tx_count == row["txCount"]
+        marker = " (active)" if name == JSON_BACKEND else ""
+        print(f"typed {name:<12} {elapsed * 1000:>10.2f} ms   {len(records) / elapsed:>12,.0f} records/s   "
+              f"{baseline_time / elapsed:>5.1f}x{marker}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark NeuroTrade JSON decoding")
+    parser.add_argument("--tokens", type=int, default=10000, help="tokens in the synthetic tokens page")
+    parser.add_argument("--pools", type=int, default=5000, help="pools in the synthetic pools page")
+    parser.add_argument("--tokens-file", help="recorded `tokens` GraphQL response to decode instead")
+    parser.add_argument("--pools-file", help="recorded `pools` GraphQL response to decode instead")
+    parser.add_argument("--record", metavar="DIR", help="write the synthetic payloads to DIR and exit")
+    parser.add_argument("--repeat", type=int, default=5, help="timing repetitions (best is reported)")
+    args = parser.parse_args()
+
+    if args.tokens_file:
+        with open(args.tokens_file, "rb") as f:
+            tokens_raw = f.read()
+    else:
+        tokens_raw = synthetic_payload("tokens", args.tokens)
+    if args.pools_file:
+        with open(args.pools_file, "rb") as f:
+            pools_raw = f.read()
+    else:
+        pools_raw = synthetic_payload("pools", args.pools)
+
+    if args.record:
+        os.makedirs(args.record, exist_ok=True)
+        for name, raw in (("tokens.json", tokens_raw), ("pools.json", pools_raw)):
+            with open(os.path.join(args.record, name), "wb") as f:
+                f.write(raw)
+        print(f"Wrote tokens.json and pools.json to {args.record}")
+        return
+
+    print(f"⚡ JSON decode benchmark (best of {args.repeat}, active backend: {JSON_BACKEND})")
+    print("=" * 78)
+    run("tokens", tokens_raw, "tokens", TokenRecord, TOKEN_NUMBERS, args.repeat)
+    run("pools", pools_raw, "pools", PoolRecord, POOL_NUMBERS, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Benchmark: multi-hop swap routing over the in-memory pool graph
+
+Builds a synthetic chain (a few deep hub tokens, a long tail of tokens
+paired with the hubs and with each other), loads it into a PoolGraph, then
+times the full build, incremental pool updates and best_route() between
+random token pairs. Before timing, the bounded search is checked against
+an exhaustive search over every path of up to 3 hops on a small graph.
+
+Usage: python benchmarks/bench_routes.py [--pools 20000] [--tokens 4000] [--routes 2000]
+"""
+
+import argparse
+import math
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pool_math import Q96_FLOAT  # noqa: E402
+from swap_router import PoolGraph  # noqa: E402
+from typed_json import PoolRecord, PoolTokenRecord  # noqa: E402
+
+HUBS = 8
+FEE_TIERS = (100, 500, 3000, 10000)
+
+
+def synthetic_pools(pool_count: int, token_count: int, seed: int = 7):
+    """Pools over token_count tokens; every token gets a hub pool, the rest are random pairs"""
+    rng = random.Random(seed)
+    tokens = [PoolTokenRecord(id=f"0x{i + 1:040x}", symbol=f"T{i}", decimals=rng.choice((6, 8, 18)))
+              for i in range(token_count)]
+    # A USD price per token, so pools of the same pair agree on price up to a small spread
+    prices = [1.0 if i < 2 else 10 ** rng.uniform(-3, 4) for i in range(token_count)]
+    pairs = set()
+    pools = []
+
+    def add(a: int, b: int, tvl: float):
+        a, b = (a, b) if tokens[a].id < tokens[b].id else (b, a)
+        fee_tier = rng.choice(FEE_TIERS)
+        if (a, b, fee_tier) in pairs:
+            return
+        pairs.add((a, b, fee_tier))
+        token0, token1 = tokens[a], tokens[b]
+        # price of token0 in token1, in raw units, with up to 1% disagreement between pools
+        price = prices[a] / prices[b] * rng.uniform(0.99, 1.01) * 10 ** (token1.decimals - token0.decimals)
+        sqrt_price = math.sqrt(price)
+        # TVL split evenly: value of token1 side = tvl / 2 -> reserve1 = L * sqrtP
+        reserve1_raw = tvl / 2 / prices[b] * 10 ** token1.decimals
+        pools.append(PoolRecord(
+            id=f"0x{len(pools) + 1:040x}", fee_tier=fee_tier, token0=token0, token1=token1,
+            liquidity=reserve1_raw / sqrt_price, sqrt_price=sqrt_price * Q96_FLOAT,
+            total_value_locked_usd=tvl,
+        ))
+
+    for a in range(HUBS):
+        for b in range(a + 1, HUBS):
+            add(a, b, 10 ** rng.uniform(7, 9))
+    for t in range(HUBS, token_count):
+        add(t, rng.randrange(HUBS), 10 ** rng.uniform(4, 7))
+    while len(pools) < pool_count:
+        a, b = rng.randrange(token_count), rng.randrange(token_count)
+        if a != b:
+            add(a, b, 10 ** rng.uniform(4, 6.5))
+    return tokens, pools
+
+
+def exhaustive_best(graph: PoolGraph, token_in: str, token_out: str, amount: float, max_hops: int = 3) -> float:
+    """Best output over every simple path of up to max_hops pools (small graphs only)"""
+    best = 0.0
+    stack = [(token_in, amount, (token_in,), 0)]
+    while stack:
+        token, held, path, hops = stack.pop()
+        for edge in graph._by_token.get(token, {}).values():
+            neighbour = edge.other(token)
+            if neighbour in path:
+                continue
+            out = edge.quote(token, held)
+            if neighbour == token_out:
+                best = max(best, out)
+            elif hops + 1 < max_hops:
+                stack.append((neighbour, out, path + (neighbour,), hops + 1))
+    return best
+
+
+def check_against_exhaustive(samples: int = 200):
+    tokens, pools = synthetic_pools(600, 150, seed=11)
+    graph = PoolGraph("bench", fanout=10_000)   # unbounded fan-out: must match exactly
+    bounded = PoolGraph("bench")
+    graph.update_pools(pools)
+    bounded.update_pools(pools)
+    rng = random.Random(3)
+    worst = 1.0
+    for _ in range(samples):
+        a, b = rng.sample(tokens, 2)
+        amount = 10 ** rng.uniform(-2, 3)
+        exact = exhaustive_best(graph, a.id, b.id, amount)
+        found = graph.best_route(a.id, b.id, amount)
+        assert math.isclose(found.amount_out if found else 0.0, exact, rel_tol=1e-9)
+        capped = bounded.best_route(a.id, b.id, amount)
+        if exact > 0:
+            worst = min(worst, (capped.amount_out if capped else 0.0) / exact)
+    print(f"Checked {samples} routes against an exhaustive 3-hop search "
+          f"(bounded search worst case: {worst:.2%} of the best output)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark NeuroTrade swap routing")
+    parser.add_argument("--pools", type=int, default=20000, help="pools in the synthetic graph")
+    parser.add_argument("--tokens", type=int, default=4000, help="tokens in the synthetic graph")
+    parser.add_argument("--routes", type=int, default=2000, help="routes to time")
+    parser.add_argument("--updates", type=int, default=1000, help="incremental pool updates to time")
+    parser.add_argument("--fanout", type=int, default=None, help="pools followed per token on inner hops")
+    args = parser.parse_args()
+
+    print("🧭 Swap route benchmark")
+    print("=" * 60)
+    check_against_exhaustive()
+
+    tokens, pools = synthetic_pools(args.pools, args.tokens)
+    graph = PoolGraph("bench") if args.fanout is None else PoolGraph("bench", fanout=args.fanout)
+    start = time.perf_counter()
+    graph.update_pools(pools)
+    build = time.perf_counter() - start
+    print(f"\nGraph: {len(graph):,} pools, {graph.token_count:,} tokens, built in {build * 1000:.1f} ms "
+          f"(fan-out {graph.fanout})")
+
+    rng = random.Random(5)
+    pairs = [(rng.choice(tokens).id, rng.choice(tokens).id, 10 ** rng.uniform(-1, 3)) for _ in range(args.routes)]
+    pairs = [(a, b, amount) for a, b, amount in pairs if a != b]
+
+    def time_routes():
+        timings, hops, found = [], [0, 0, 0, 0], 0
+        for a, b, amount in pairs:
+            started = time.perf_counter()
+            route = graph.best_route(a, b, amount)
+            timings.append(time.perf_counter() - started)
+            if route is not None:
+                found += 1
+                hops[route.hops] += 1
+        return sorted(timings), hops, found
+
+    time_routes()   # first pass ranks every token's fan-out list
+    timings, hops, found = time_routes()
+    p50 = statistics.median(timings)
+    p95 = timings[int(len(timings) * 0.95)]
+    print(f"Routes: {len(pairs):,} pairs, {found:,} routed ({hops[1]} direct, {hops[2]} 2-hop, {hops[3]} 3-hop)")
+    print(f"  p50 {p50 * 1000:.3f} ms   p95 {p95 * 1000:.3f} ms   max {timings[-1] * 1000:.3f} ms")
+
+    # Incremental refresh: new reserves for random pools, then route again (fan-out lists re-ranked lazily)
+    refreshed = rng.sample(pools, min(args.updates, len(pools)))
+    start = time.perf_counter()
+    for pool in refreshed:
+        graph.update_pool(PoolRecord(
+            id=pool.id, fee_tier=pool.fee_tier, token0=pool.token0, token1=pool.token1,
+            liquidity=pool.liquidity * rng.uniform(0.5, 1.5), sqrt_price=pool.sqrt_price * rng.uniform(0.99, 1.01),
+            total_value_locked_usd=pool.total_value_locked_usd * rng.uniform(0.5, 1.5),
+        ))
+    update = time.perf_counter() - start
+    print(f"Updates: {len(refreshed):,} pools in {update * 1000:.1f} ms "
+          f"({update / len(refreshed) * 1e6:.1f} µs per pool)")
+    timings, _, _ = time_routes()
+    print(f"Routes after updates: p50 {statistics.median(timings) * 1000:.3f} ms   "
+          f"p95 {timings[int(len(timings) * 0.95)] * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Local stand-ins for the CoinGecko and The Graph APIs
+
+FakeUpstreams runs one aiohttp web server that answers CoinGecko
+`simple/price` requests and Uniswap v3 subgraph GraphQL queries with
+synthetic data. Latency, jitter and error rate are configurable, and every
+request is counted so benchmarks can report upstream calls per message.
+
+Point the agent at it with COINGECKO_API_BASE / GRAPH_API_BASE (see
+FakeUpstreams.env()) before importing the agent modules.
+"""
+
+import asyncio
+import random
+import re
+from collections import Counter
+from typing import Dict, Optional
+
+from aiohttp import web
+
+_ID_RE = re.compile(r'"(0x[0-9a-fA-F]+)"')
+_FIRST_RE = re.compile(r"first:\s*(\d+)")
+_ID_GT_RE = re.compile(r'id_gt:\s*"(0x[0-9a-fA-F]*)"')
+_SIDE_RE = re.compile(r'(token[01]):\s*"(0x[0-9a-fA-F]+)"')
+
+
+def fake_token(address: str) -> Dict:
+    seed = int(address[-6:], 16) if len(address) > 6 else 1
+    return {
+        "id": address.lower(),
+        "symbol": f"T{seed % 10000}",
+        "name": f"Token {seed % 10000}",
+        "decimals": "18",
+        "derivedETH": f"{(seed % 1000 + 1) / 1000:.6f}",
+        "totalSupply": "1000000000",
+        "volume": f"{seed * 10}",
+        "volumeUSD": f"{seed * 25.5:.2f}",
+        "feesUSD": f"{seed * 0.3:.2f}",
+        "txCount": str(seed % 100000),
+        "totalValueLockedUSD": f"{seed * 100.0:.2f}",
+    }
+
+
+def fake_pool(address: str, index: int = 0) -> Dict:
+    seed = int(address[-6:], 16) if len(address) > 6 else index + 1
+    token0 = f"0x{(seed * 2) % (1 << 160):040x}"
+    token1 = f"0x{(seed * 2 + 1) % (1 << 160):040x}"
+    pool = {
+        "id": address.lower(),
+        "feeTier": str((500, 3000, 10000)[seed % 3]),
+        "token0": {"id": token0, "symbol": f"T{seed % 997}", "name": f"Token {seed % 997}", "decimals": "6"},
+        "token1": {"id": token1, "symbol": f"T{(seed + 1) % 997}", "name": f"Token {(seed + 1) % 997}", "decimals": "18"},
+        "liquidity": str(10 ** 18 + seed * 7919),
+        "sqrtPrice": str(1771595571142957166518320255467520 + seed),
+        "tick": str(195000 + seed % 1000),
+        "token0Price": "0.0004",
+        "token1Price": "2500",
+        "volumeUSD": f"{seed * 1000.5:.2f}",
+        "txCount": str(seed % 100000),
+        "totalValueLockedUSD": f"{seed * 5000.0:.2f}",
+    }
+    if seed % 997 == 0:
+        # Created but never initialized: no price, no liquidity, tick is null
+        pool.update({"liquidity": "0", "sqrtPrice": "0", "tick": None, "totalValueLockedUSD": "0"})
+    return pool
+
+
+class FakeUpstreams:
+    """CoinGecko + subgraph stand-in with latency, jitter and error injection"""
+
+    def __init__(
+        self,
+        latency_ms: float = 50.0,
+        jitter_ms: float = 10.0,
+        error_rate: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: Optional[int] = None,
+        pool_count: int = 10000,
+        token_count: int = 10000,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.host = host
+        self.port = port
+        # Size of the synthetic subgraph, for paginated (id_gt) scans
+        self.pool_count = pool_count
+        self.token_count = token_count
+        self.calls: Counter = Counter()
+        self._random = random.Random(seed)
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def env(self) -> Dict[str, str]:
+        """Environment overrides that route the agent's upstream calls here"""
+        return {
+            "COINGECKO_API_BASE": f"{self.base_url}/api/v3",
+            "GRAPH_API_BASE": f"{self.base_url}/subgraphs/name",
+        }
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/api/v3/simple/price", self._simple_price)
+        app.router.add_post("/subgraphs/name/{owner}/{name}", self._graphql)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # Resolve the real port when 0 (ephemeral) was requested
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _delay_or_fail(self, endpoint: str) -> Optional[web.Response]:
+        self.calls[endpoint] += 1
+        delay = max(0.0, self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms))
+        await asyncio.sleep(delay / 1000)
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.calls[f"{endpoint}:error"] += 1
+            return web.json_response({"error": "injected failure"}, status=503)
+        return None
+
+    async def _simple_price(self, request: web.Request) -> web.Response:
+        failure = await self._delay_or_fail("coingecko")
+        if failure is not None:
+            return failure
+
+        quote = request.query.get("vs_currencies", "usd")
+        result = {}
+        for asset in request.query.get("ids", "ethereum").split(","):
+            price = 2500.0 + self._random.uniform(-25, 25)
+            data = {quote: round(price, 2)}
+            if request.query.get("include_24hr_change") == "true":
+                data[f"{quote}_24h_change"] = round(self._random.uniform(-4, 4), 4)
+            if request.query.get("include_24hr_vol") == "true":
+                data[f"{quote}_24h_vol"] = round(self._random.uniform(5e9, 2e10), 2)
+            if request.query.get("include_market_cap") == "true":
+                data[f"{quote}_market_cap"] = round(price * 120_000_000, 2)
+            result[asset] = data
+        return web.json_response(result)
+
+    async def _graphql(self, request: web.Request) -> web.Response:
+        chain = request.match_info["name"]
+        failure = await self._delay_or_fail(f"graph:{chain}")
+        if failure is not None:
+            return failure
+
+        body = await request.json()
+        query = body.get("query", "")
+        ids = _ID_RE.findall(query)
+        first = int(_FIRST_RE.search(query).group(1)) if _FIRST_RE.search(query) else 100
+
+        if "pools(" in query:
+            data = {"pools": self._page(query, first, self.pool_count, fake_pool)}
+        elif "pool(" in query:
+            data = {"pool": fake_pool(ids[0]) if ids else None}
+        elif "tokens(" in query and "id_in" in query:
+            data = {"tokens": [fake_token(address) for address in ids]}
+        elif "tokens(" in query:
+            data = {"tokens": self._page(query, first, self.token_count, fake_token)}
+        elif "token(" in query:
+            data = {"token": fake_token(ids[0]) if ids else None}
+        else:
+            data = {}
+        return web.json_response({"data": data})
+
+    @staticmethod
+    def _page(query: str, first: int, count: int, make) -> list:
+        """Entities 0x..01 to `count` in id order, after the id_gt cursor and matching token0/token1"""
+        cursor = _ID_GT_RE.search(query)
+        start = int(cursor.group(1), 16) if cursor and cursor.group(1) not in ("", "0x") else 0
+        sides = _SIDE_RE.findall(query)
+        page = []
+        for index in range(start + 1, count + 1):
+            entity = make(f"0x{index:040x}")
+            if all(entity[side]["id"] == token.lower() for side, token in sides):
+                page.append(entity)
+                if len(page) == first:
+                    break
+        return page
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Load-test harness for the NeuroTrade AI Agent
+
+Starts local stand-ins for CoinGecko and The Graph (see fake_upstreams.py),
+points the agent at them and drives the message handlers with a stub
+Context at a target message rate:
+
+  - trading_query: neurotrade_agent.handle_trading_query_message
+  - chat_proto:    chat_proto.handle_message (ChatMessage), with the remote
+                   structured-output agent simulated locally
+  - exact_chat:    exact_chat_protocol.handle_chat_message
+
+Reports throughput, p50/p95/p99 latency and upstream calls per message, and
+writes the results as JSON so runs can be compared.
+
+Usage:
+  python benchmarks/load_test.py --rate 200 --messages 2000 --output run.json
+  python benchmarks/load_test.py --scenarios chat_proto --latency-ms 120 --error-rate 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from uuid import uuid4
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, ".."))
+sys.path.insert(0, BENCH_DIR)
+
+from fake_upstreams import FakeUpstreams  # noqa: E402
+
+SCENARIOS = ("trading_query", "chat_proto", "exact_chat")
+
+QUERIES = [
+    "What's the current ETH price?",
+    "Should I buy ETH now?",
+    "Should I sell ETH?",
+    "Swap 1000 USDC to ETH",
+    "ETH forecast",
+    "market analysis",
+    "hello",
+]
+
+
+class StubLogger:
+    """Drop-in for ctx.logger that only keeps error counts"""
+
+    def __init__(self):
+        self.errors = 0
+
+    def debug(self, *args, **kwargs):
+        pass
+
+    info = debug
+
+    def warning(self, *args, **kwargs):
+        pass
+
+    def error(self, *args, **kwargs):
+        self.errors += 1
+
+
+class StubStorage:
+    """In-memory replacement for ctx.storage"""
+
+    def __init__(self):
+        self._data: Dict[str, Any] = {}
+
+    def get(self, key: str) -> Any:
+        return self._data.get(key)
+
+    def has(self, key: str) -> bool:
+        return key in self._data
+
+    def set(self, key: str, value: Any):
+        self._data[key] = value
+
+    def remove(self, key: str):
+        self._data.pop(key, None)
+
+
+class StubContext:
+    """Minimal uAgents Context: logger, storage, session and send()"""
+
+    def __init__(self, harness: "LoadHarness", session=None):
+        self.logger = harness.logger
+        self.storage = harness.storage
+        self.session = session or uuid4()
+        self._harness = harness
+
+    async def send(self, destination: str, message: Any):
+        await self._harness.on_send(self, destination, message)
+
+
+class LoadHarness:
+    """Routes stub sends, simulates the remote parser and records completions"""
+
+    FINAL_MESSAGES = {"TradingResponseMessage", "ChatMessage"}
+
+    def __init__(self, remote_latency_ms: float):
+        self.logger = StubLogger()
+        self.storage = StubStorage()
+        self.remote_latency_ms = remote_latency_ms
+        self._waiting: Dict[str, asyncio.Future] = {}
+        self.sends = 0
+
+    def expect(self, sender: str) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[sender] = future
+        return future
+
+    async def on_send(self, ctx: StubContext, destination: str, message: Any):
+        self.sends += 1
+        import chat_proto
+
+        if destination == chat_proto.AI_AGENT_ADDRESS:
+            asyncio.ensure_future(self._remote_parse(ctx.session, message))
+            return
+
+        future = self._waiting.get(destination)
+        if future is not None and not future.done() and type(message).__name__ in self.FINAL_MESSAGES:
+            future.set_result(message)
+
+    async def _remote_parse(self, session, prompt):
+        """Stand-in for the structured-output agent behind AI_AGENT_ADDRESS"""
+        import chat_proto
+
+        await asyncio.sleep(self.remote_latency_ms / 1000)
+        response = chat_proto.StructuredOutputResponse(
+            output={"query": prompt.prompt, "action_type": "general"}
+        )
+        ctx = StubContext(self, session=session)
+        await chat_proto.handle_structured_output_response(ctx, chat_proto.AI_AGENT_ADDRESS, response)
+
+
+def build_scenarios() -> Dict[str, Callable[[StubContext, str, str], Awaitable]]:
+    """Map scenario name -> coroutine that delivers one query to the handler"""
+    import chat_proto
+    import exact_chat_protocol
+    import neurotrade_agent
+    from uagents_core.contrib.protocols.chat import ChatMessage, TextContent
+
+    async def trading_query(ctx, sender, query):
+        msg = neurotrade_agent.TradingQueryMessage(query=query, chain="ethereum")
+        await neurotrade_agent.handle_trading_query_message(ctx, sender, msg)
+
+    async def chat_proto_message(ctx, sender, query):
+        msg = ChatMessage(
+            timestamp=datetime.utcnow(),
+            msg_id=uuid4(),
+            content=[TextContent(type="text", text=query)],
+        )
+        await chat_proto.handle_message(ctx, sender, msg)
+
+    async def exact_chat(ctx, sender, query):
+        msg = exact_chat_protocol.ChatMessage(
+            timestamp=datetime.utcnow(),
+            msg_id=str(uuid4()),
+            content=[exact_chat_protocol.TextContent(text=query)],
+        )
+        await exact_chat_protocol.handle_chat_message(ctx, sender, msg)
+
+    return {
+        "trading_query": trading_query,
+        "chat_proto": chat_proto_message,
+        "exact_chat": exact_chat,
+    }
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+async def run_scenario(
+    name: str,
+    deliver: Callable[[StubContext, str, str], Awaitable],
+    harness: LoadHarness,
+    upstreams: FakeUpstreams,
+    rate: float,
+    messages: int,
+    timeout: float,
+) -> Dict[str, Any]:
+    """Drive one handler open-loop at rate msg/s and collect latency stats"""
+    from admission import admission
+
+    loop = asyncio.get_running_loop()
+    shed_before = admission.shed
+    latencies: List[float] = []
+    failures = 0
+    calls_before = upstreams.total_calls
+    errors_before = harness.logger.errors
+
+    async def one(index: int):
+        nonlocal failures
+        sender = f"agent1loadtest{name}{index:07d}"
+        future = harness.expect(sender)
+        start = time.perf_counter()
+        try:
+            await deliver(StubContext(harness), sender, QUERIES[index % len(QUERIES)])
+            await asyncio.wait_for(future, timeout)
+            latencies.append(time.perf_counter() - start)
+        except Exception:
+            failures += 1
+
+    tasks = []
+    started = loop.time()
+    for index in range(messages):
+        delay = started + index / rate - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(one(index)))
+    await asyncio.gather(*tasks)
+    elapsed = loop.time() - started
+
+    latencies.sort()
+    upstream_calls = upstreams.total_calls - calls_before
+    return {
+        "messages": messages,
+        "completed": len(latencies),
+        "failed": failures,
+        "handler_errors": harness.logger.errors - errors_before,
+        "shed": admission.shed - shed_before,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_msg_s": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "latency_ms": {
+            "p50": _ms(percentile(latencies, 50)),
+            "p95": _ms(percentile(latencies, 95)),
+            "p99": _ms(percentile(latencies, 99)),
+            "max": _ms(latencies[-1] if latencies else None),
+        },
+        "upstream_calls": upstream_calls,
+        "upstream_calls_per_message": round(upstream_calls / messages, 4) if messages else 0,
+    }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 3) if seconds is not None else None
+
+
+async def snapshot_refresher(interval: float):
+    """Background market snapshot refresh, as the agent's on_interval would run it"""
+    from market_snapshot import market_snapshots
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await market_snapshots.refresh()
+        except Exception as e:
+            print(f"⚠️ Snapshot refresh failed: {e}")
+
+
+async def main_async(args) -> Dict[str, Any]:
+    upstreams = FakeUpstreams(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    await upstreams.start()
+    os.environ.update(upstreams.env())
+    # Keep runs independent: no subgraph cache carried over from a previous run
+    os.environ.setdefault("GRAPH_CACHE_PATH", ":memory:")
+
+    # Import after the env overrides so the agent modules pick up the fake URLs
+    import http_client
+    from market_snapshot import market_snapshots
+    from resilience import upstream_stats
+
+    scenarios = build_scenarios()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    await http_client.open_session()
+    await market_snapshots.refresh()
+    refresher = asyncio.ensure_future(snapshot_refresher(args.refresh_interval))
+
+    harness = LoadHarness(remote_latency_ms=args.remote_latency_ms)
+    results = {}
+    try:
+        for name in args.scenarios:
+            print(f"▶️  {name}: {args.messages} messages at {args.rate} msg/s ...")
+            results[name] = await run_scenario(
+                name, scenarios[name], harness, upstreams, args.rate, args.messages, args.timeout
+            )
+            stats = results[name]
+            print(
+                f"   {stats['throughput_msg_s']} msg/s | "
+                f"p50 {stats['latency_ms']['p50']} ms | p95 {stats['latency_ms']['p95']} ms | "
+                f"p99 {stats['latency_ms']['p99']} ms | "
+                f"{stats['upstream_calls_per_message']} upstream calls/msg | "
+                f"{stats['shed']} shed | {stats['failed']} failed"
+            )
+            if name == "chat_proto":
+                import chat_proto
+
+                stats["parse"] = chat_proto.parse_stats()
+                print(
+                    f"   parsed locally {stats['parse']['local']} | memo {stats['parse']['memo']} | "
+                    f"remote {stats['parse']['remote']} | "
+                    f"{stats['parse']['local_rate']:.1%} without the remote parser"
+                )
+    finally:
+        refresher.cancel()
+        await http_client.close_session()
+        await upstreams.stop()
+
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "config": {
+            "rate": args.rate,
+            "messages": args.messages,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "error_rate": args.error_rate,
+            "remote_latency_ms": args.remote_latency_ms,
+            "refresh_interval": args.refresh_interval,
+        },
+        "upstream_calls_by_endpoint": dict(upstreams.calls),
+        "upstream_health": upstream_stats(),
+        "scenarios": results,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the NeuroTrade AI Agent handlers")
+    parser.add_argument("--rate", type=float, default=200.0, help="target messages per second")
+    parser.add_argument("--messages", type=int, default=1000, help="messages per scenario")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="fake upstream base latency")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="fake upstream latency jitter (+/-)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of upstream requests that fail")
+    parser.add_argument("--remote-latency-ms", type=float, default=150.0,
+                        help="simulated structured-output agent round trip (chat_proto)")
+    parser.add_argument("--refresh-interval", type=float, default=5.0, help="market snapshot refresh period")
+    parser.add_argument("--timeout", type=float, default=10.0, help="per-message completion timeout")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for latency/error injection")
+    parser.add_argument("--output", help="write results JSON to this path")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print("🔥 NeuroTrade load test")
+    print("=" * 70)
+    results = asyncio.run(main_async(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
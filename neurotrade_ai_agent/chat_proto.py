@@ -1,7 +1,14 @@
 from datetime import datetime
 from uuid import uuid4
-from typing import Any
-import aiohttp
+from typing import Any, Callable, Dict, Optional
+from admission import admission_controlled, busy_text
+from indicators import indicator_summary, market_signals
+from intent import classify
+from market_snapshot import SnapshotRenderCache, data_notice, format_price
+from metrics import handler_stage, messages_total, registry
+from pending_requests import PendingRequest, PendingRequestTable
+from prompt_memo import PromptMemo, normalize_prompt
+from sessions import sessions
 
 from uagents import Context, Model, Protocol
 
@@ -28,86 +35,82 @@ class TradingRequest(Model):
 
 
 # Trading analysis function
-async def get_trading_info(query: str) -> str:
-    """Get ETH trading information and analysis"""
-    try:
-        # Get real-time ETH price from CoinGecko
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                "https://api.coingecko.com/api/v3/simple/price",
-                params={
-                    "ids": "ethereum",
-                    "vs_currencies": "usd",
-                    "include_24hr_change": "true",
-                    "include_24hr_vol": "true"
-                }
-            ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    eth_data = data.get("ethereum", {})
-                    price = eth_data.get("usd", 2500)
-                    change_24h = eth_data.get("usd_24h_change", 0)
-                    volume_24h = eth_data.get("usd_24h_vol", 0)
-                else:
-                    price, change_24h, volume_24h = 2500, 0, 0
-    except Exception as e:
-        price, change_24h, volume_24h = 2500, 0, 0
+def render_trading_info(action: str, eth_data: dict) -> str:
+    """Render the ETH analysis text for one intent action"""
+    change_24h = eth_data["change_24h"]
+    volume_24h = eth_data["volume_24h"]
+    signals = market_signals(eth_data)
     
-    # Generate trading analysis
-    query_lower = query.lower()
-    
-    analysis = f"🚀 **NeuroTrade AI Analysis**\n\n"
-    analysis += f"💰 **Current ETH Price**: ${price:,.2f} USD\n"
-    analysis += f"📈 **24h Change**: {change_24h:+.2f}%\n"
-    analysis += f"💹 **24h Volume**: ${volume_24h:,.0f} USD\n\n"
+    parts = [f"🚀 **NeuroTrade AI Analysis**\n\n"]
+    parts.append(data_notice(eth_data))
+    parts.append(f"💰 **Current ETH Price**: {format_price(eth_data)}\n")
+    parts.append(f"📈 **24h Change**: {change_24h:+.2f}%\n")
+    parts.append(f"💹 **24h Volume**: ${volume_24h:,.0f} USD\n")
+    parts.append(indicator_summary(eth_data))
+    parts.append("\n")
     
     # Market sentiment
-    sentiment = "🟢 Bullish" if change_24h > 0 else "🔴 Bearish" if change_24h < -2 else "🟡 Neutral"
-    analysis += f"🎯 **Market Sentiment**: {sentiment}\n\n"
+    sentiment = {"bullish": "🟢 Bullish", "bearish": "🔴 Bearish"}.get(signals.trend, "🟡 Neutral")
+    parts.append(f"🎯 **Market Sentiment**: {sentiment}\n\n")
     
-    if "price" in query_lower:
-        analysis += f"📊 **Price Analysis**:\n"
-        analysis += f"• ETH is {'up' if change_24h > 0 else 'down'} {abs(change_24h):.2f}% today\n"
-        analysis += f"• Trading volume is {'high' if volume_24h > 10000000000 else 'normal'}\n"
-        analysis += f"• Price momentum: {'Bullish' if change_24h > 1 else 'Bearish' if change_24h < -1 else 'Neutral'}\n\n"
-    elif "buy" in query_lower:
-        analysis += f"🔵 **Buy Signal Analysis**:\n"
-        if change_24h > 0:
-            analysis += f"✅ **Positive momentum** - Consider buying\n"
-            analysis += f"• Entry point: Current levels look favorable\n"
-            analysis += f"• Strategy: Dollar-cost averaging recommended\n"
+    if action == "price":
+        parts.append(f"📊 **Price Analysis**:\n")
+        parts.append(f"• ETH is {'up' if change_24h > 0 else 'down'} {abs(change_24h):.2f}% today\n")
+        parts.append(f"• Trading volume is {'high' if volume_24h > 10000000000 else 'normal'}\n")
+        parts.append(f"• Price momentum: {signals.trend.capitalize()}"
+                     f"{' (' + signals.momentum + ')' if signals.momentum != 'neutral' else ''}\n\n")
+    elif action == "buy":
+        parts.append(f"🔵 **Buy Signal Analysis**:\n")
+        if signals.momentum == "overbought":
+            parts.append(f"⚠️ **Overbought (RSI)** - Wait for a pullback\n")
+            parts.append(f"• Entry point: Consider lower levels\n")
+            parts.append(f"• Strategy: Scale in with limit orders\n")
+        elif signals.trend != "bearish":
+            parts.append(f"✅ **Positive momentum** - Consider buying\n")
+            parts.append(f"• Entry point: Current levels look favorable\n")
+            parts.append(f"• Strategy: Dollar-cost averaging recommended\n")
         else:
-            analysis += f"⚠️ **Negative momentum** - Wait for confirmation\n"
-            analysis += f"• Entry point: Consider lower levels\n"
-            analysis += f"• Strategy: Set buy orders below current price\n"
-        analysis += f"• Risk Level: Moderate\n\n"
-    elif "sell" in query_lower:
-        analysis += f"🔴 **Sell Signal Analysis**:\n"
-        if change_24h < -2:
-            analysis += f"⚠️ **Strong downward pressure** - Consider selling\n"
-            analysis += f"• Exit strategy: Take profits if in green\n"
-            analysis += f"• Risk management: Set stop-losses\n"
+            parts.append(f"⚠️ **Negative momentum** - Wait for confirmation\n")
+            parts.append(f"• Entry point: Consider lower levels\n")
+            parts.append(f"• Strategy: Set buy orders below current price\n")
+        parts.append(f"• Risk Level: Moderate\n\n")
+    elif action == "sell":
+        parts.append(f"🔴 **Sell Signal Analysis**:\n")
+        if signals.trend == "bearish" and signals.momentum != "oversold":
+            parts.append(f"⚠️ **Strong downward pressure** - Consider selling\n")
+            parts.append(f"• Exit strategy: Take profits if in green\n")
+            parts.append(f"• Risk management: Set stop-losses\n")
+        elif signals.momentum == "overbought":
+            parts.append(f"⚠️ **Overbought (RSI)** - Consider taking profits\n")
+            parts.append(f"• Exit strategy: Scale out into strength\n")
         else:
-            analysis += f"✅ **Price holding well** - Partial profit taking\n"
-            analysis += f"• Exit strategy: Trailing stops recommended\n"
-        analysis += f"• Risk Level: Moderate\n\n"
-    elif "swap" in query_lower:
-        analysis += f"🔄 **Swap Analysis**:\n"
-        analysis += f"• Current ETH price: ${price:,.2f}\n"
-        analysis += f"• Gas fees: Check current network congestion\n"
-        analysis += f"• Liquidity: {'Good' if volume_24h > 5000000000 else 'Check DEX pools'}\n"
-        analysis += f"• Timing: {'Favorable' if abs(change_24h) < 3 else 'Volatile - use limit orders'}\n\n"
+            parts.append(f"✅ **Price holding well** - Partial profit taking\n")
+            parts.append(f"• Exit strategy: Trailing stops recommended\n")
+        parts.append(f"• Risk Level: Moderate\n\n")
+    elif action == "swap":
+        parts.append(f"🔄 **Swap Analysis**:\n")
+        parts.append(f"• Current ETH price: {format_price(eth_data)}\n")
+        parts.append(f"• Gas fees: Check current network congestion\n")
+        parts.append(f"• Liquidity: {'Good' if volume_24h > 5000000000 else 'Check DEX pools'}\n")
+        parts.append(f"• Timing: {'Volatile - use limit orders' if signals.volatility == 'high' else 'Favorable'}\n\n")
     else:
-        analysis += f"💡 **General Trading Info**:\n"
-        analysis += f"• Ask me about 'ETH price', 'buy ETH', 'sell ETH', or 'swap ETH'\n"
-        analysis += f"• I provide real-time analysis and recommendations\n"
-        analysis += f"• Multi-chain support: Ethereum, Arbitrum, Polygon, Optimism, Base\n\n"
+        parts.append(f"💡 **General Trading Info**:\n")
+        parts.append(f"• Ask me about 'ETH price', 'buy ETH', 'sell ETH', or 'swap ETH'\n")
+        parts.append(f"• I provide real-time analysis and recommendations\n")
+        parts.append(f"• Multi-chain support: Ethereum, Arbitrum, Polygon, Optimism, Base\n\n")
     
-    analysis += f"---\n"
-    analysis += f"🤖 **NeuroTrade AI** - Your Smart Trading Assistant\n"
-    analysis += f"⚡ **Real-time Data** | 🔒 **Secure** | 🎯 **Accurate**"
+    parts.append(f"---\n")
+    parts.append(f"🤖 **NeuroTrade AI** - Your Smart Trading Assistant\n")
+    parts.append(f"⚡ **Real-time Data** | 🔒 **Secure** | 🎯 **Accurate**")
     
-    return analysis
+    return "".join(parts)
+
+# Analysis bodies only depend on (intent, snapshot), so render each once per refresh
+_trading_info_cache = SnapshotRenderCache(render_trading_info)
+
+async def get_trading_info(query: str) -> str:
+    """Get ETH trading information and analysis"""
+    return _trading_info_cache.get(classify(query).action)
 
 def create_text_chat(text: str, end_session: bool = False) -> ChatMessage:
     content = [TextContent(type="text", text=text)]
@@ -135,28 +138,141 @@ class StructuredOutputResponse(Model):
     output: dict[str, Any]
 
 
-@chat_proto.on_message(ChatMessage)
-async def handle_message(ctx: Context, sender: str, msg: ChatMessage):
-    ctx.logger.info(f"Got a message from {sender}: {msg.content}")
-    ctx.storage.set(str(ctx.session), sender)
+def local_trading_request(prompt: str) -> TradingRequest:
+    """TradingRequest parsed locally, as the remote parser would return it"""
+    return TradingRequest(query=prompt, action_type=classify(prompt).action)
+
+
+# Prompts the remote parser already answered, and counts of how each chat
+# prompt was parsed (local, memo or remote)
+prompt_memo = PromptMemo()
+chat_parse_total = registry.counter(
+    "neurotrade_chat_parse_total", "Chat prompts by how they were parsed", ("path",),
+)
+parse_paths: Dict[str, int] = {"local": 0, "memo": 0, "remote": 0}
+
+
+def _count_parse(path: str):
+    parse_paths[path] += 1
+    chat_parse_total.inc(path=path)
+
+
+def fast_parse(prompt: str) -> Optional[TradingRequest]:
+    """Parse without the remote agent when possible: memoised or unambiguous prompts"""
+    memoized = prompt_memo.get(prompt)
+    if memoized is not None:
+        _count_parse("memo")
+        return memoized
+    intent = classify(prompt)
+    if intent.confident:
+        _count_parse("local")
+        return TradingRequest(query=prompt, action_type=intent.action)
+    return None
+
+
+def parse_stats() -> Dict[str, float]:
+    """Share of chat prompts answered without the remote parser"""
+    total = sum(parse_paths.values())
+    local = parse_paths["local"] + parse_paths["memo"]
+    return {
+        **parse_paths,
+        "local_rate": round(local / total, 4) if total else 0.0,
+        "prompt_memo": prompt_memo.stats(),
+    }
+
+
+async def send_trading_reply(ctx: Context, session_sender: str, trading_request: TradingRequest):
+    """Answer the chat session with the analysis for a parsed request"""
+    try:
+        with handler_stage("chat_proto", "generate"):
+            trading_info = await get_trading_info(trading_request.query)
+    except Exception as err:
+        ctx.logger.error(f"Error getting trading info: {err}")
+        await ctx.send(
+            session_sender,
+            create_text_chat(
+                "Sorry, I couldn't process your trading request. Please try again later."
+            ),
+        )
+        return
+
+    chat_message = create_text_chat(trading_info)
+    with handler_stage("chat_proto", "reply"):
+        await ctx.send(session_sender, chat_message)
+
+
+async def answer_locally(request: PendingRequest):
+    """The remote parser missed its deadline: answer from a local parse"""
+    await send_trading_reply(request.context, request.sender, local_trading_request(request.payload))
+
+
+# Prompts forwarded to AI_AGENT_ADDRESS, keyed by chat session
+remote_parses = PendingRequestTable("structured_output", answer_locally)
+
+
+def answers_prompt(msg: "StructuredOutputResponse") -> Callable[[str], bool]:
+    """Tie-break between a session's pending prompts: the one the answer echoes as its query"""
+    query = msg.output.get("query") if isinstance(msg.output, dict) else None
+    key = normalize_prompt(query) if isinstance(query, str) else None
+    return lambda prompt: key is not None and normalize_prompt(prompt) == key
+
+registry.gauge(
+    "neurotrade_remote_requests_pending", "Prompts waiting for the structured-output agent",
+    callback=lambda: len(remote_parses),
+)
+
+
+async def send_busy_chat(ctx: Context, sender: str, msg: ChatMessage):
+    """Acknowledge a shed chat message and answer from cached data"""
     await ctx.send(
         sender,
         ChatAcknowledgement(timestamp=datetime.utcnow(), acknowledged_msg_id=msg.msg_id),
     )
+    await ctx.send(sender, create_text_chat(busy_text()))
+
+
+async def send_busy_structured_output(ctx: Context, sender: str, msg: "StructuredOutputResponse"):
+    """Answer the waiting chat session from cached data"""
+    pending = remote_parses.resolve(str(ctx.session), answers_prompt(msg))
+    if pending is not None:
+        await ctx.send(pending.sender, create_text_chat(busy_text()))
+
+
+@chat_proto.on_message(ChatMessage)
+@admission_controlled("chat_proto", send_busy_chat)
+async def handle_message(ctx: Context, sender: str, msg: ChatMessage):
+    ctx.logger.info(f"Got a message from {sender}: {msg.content}")
+    messages_total.inc(handler="chat_proto")
+    with handler_stage("chat_proto", "ack"):
+        await ctx.send(
+            sender,
+            ChatAcknowledgement(timestamp=datetime.utcnow(), acknowledged_msg_id=msg.msg_id),
+        )
 
     for item in msg.content:
         if isinstance(item, StartSessionContent):
             ctx.logger.info(f"Got a start session message from {sender}")
+            sessions.start("chat_proto", sender, str(ctx.session))
             continue
         elif isinstance(item, TextContent):
             ctx.logger.info(f"Got a message from {sender}: {item.text}")
-            ctx.storage.set(str(ctx.session), sender)
-            await ctx.send(
-                AI_AGENT_ADDRESS,
-                StructuredOutputPrompt(
-                    prompt=item.text, output_schema=TradingRequest.schema()
-                ),
-            )
+            sessions.touch("chat_proto", sender)
+            trading_request = fast_parse(item.text)
+            if trading_request is not None:
+                await send_trading_reply(ctx, sender, trading_request)
+                continue
+            _count_parse("remote")
+            remote_parses.add(str(ctx.session), sender, item.text, ctx)
+            with handler_stage("chat_proto", "forward"):
+                await ctx.send(
+                    AI_AGENT_ADDRESS,
+                    StructuredOutputPrompt(
+                        prompt=item.text, output_schema=TradingRequest.schema()
+                    ),
+                )
+        elif isinstance(item, EndSessionContent):
+            ctx.logger.info(f"Got an end session message from {sender}")
+            sessions.end("chat_proto", sender)
         else:
             ctx.logger.info(f"Got unexpected content from {sender}")
 
@@ -169,15 +285,17 @@ async def handle_ack(ctx: Context, sender: str, msg: ChatAcknowledgement):
 
 
 @struct_output_client_proto.on_message(StructuredOutputResponse)
+@admission_controlled("structured_output", send_busy_structured_output)
 async def handle_structured_output_response(
     ctx: Context, sender: str, msg: StructuredOutputResponse
 ):
-    session_sender = ctx.storage.get(str(ctx.session))
-    if session_sender is None:
-        ctx.logger.error(
-            "Discarding message because no session sender found in storage"
+    pending = remote_parses.resolve(str(ctx.session), answers_prompt(msg))
+    if pending is None:
+        ctx.logger.warning(
+            "Discarding structured output: no prompt pending for this session"
         )
         return
+    session_sender = pending.sender
 
     if "<UNKNOWN>" in str(msg.output):
         await ctx.send(
@@ -200,17 +318,5 @@ async def handle_structured_output_response(
         )
         return
 
-    try:
-        trading_info = await get_trading_info(trading_request.query)
-    except Exception as err:
-        ctx.logger.error(f"Error getting trading info: {err}")
-        await ctx.send(
-            session_sender,
-            create_text_chat(
-                "Sorry, I couldn't process your trading request. Please try again later."
-            ),
-        )
-        return
-
-    chat_message = create_text_chat(trading_info)
-    await ctx.send(session_sender, chat_message)
\ No newline at end of file
+    prompt_memo.put(pending.payload, trading_request)
+    await send_trading_reply(ctx, session_sender, trading_request)
@@ -1,7 +1,13 @@
 from datetime import datetime
 from uuid import uuid4
 from typing import List, Union, Dict, Any, Optional, Literal
-import aiohttp
+from admission import admission_controlled, busy_text
+from indicators import indicator_summary, market_signals
+from intent import classify
+from market_snapshot import SnapshotRenderCache, data_notice, format_price
+from metrics import handler_stage, messages_total
+from sessions import sessions
+from swap_router import describe_swap
 
 from uagents import Context, Model, Protocol
 from pydantic import Field
@@ -70,150 +76,210 @@ exact_chat_protocol = Protocol(
 )
 
 # === TRADING LOGIC ===
-async def get_eth_trading_analysis(query: str) -> str:
-    """Get comprehensive ETH trading analysis"""
-    try:
-        # Get real-time ETH data
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                "https://api.coingecko.com/api/v3/simple/price",
-                params={
-                    "ids": "ethereum",
-                    "vs_currencies": "usd",
-                    "include_24hr_change": "true",
-                    "include_24hr_vol": "true",
-                    "include_market_cap": "true"
-                }
-            ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    eth_data = data.get("ethereum", {})
-                    
-                    price = eth_data.get("usd", 2500)
-                    change_24h = eth_data.get("usd_24h_change", 0)
-                    volume_24h = eth_data.get("usd_24h_vol", 0)
-                    market_cap = eth_data.get("usd_market_cap", 0)
-                else:
-                    price, change_24h, volume_24h, market_cap = 2500, 0, 0, 0
-                    
-    except Exception as e:
-        price, change_24h, volume_24h, market_cap = 2500, 0, 0, 0
-    
-    # Generate comprehensive analysis
-    query_lower = query.lower()
+def render_eth_trading_analysis(action: str, eth_data: dict) -> str:
+    """Render the comprehensive ETH analysis text for one intent action"""
+    price = eth_data["price"]
+    change_24h = eth_data["change_24h"]
+    volume_24h = eth_data["volume_24h"]
+    market_cap = eth_data["market_cap"]
+    signals = market_signals(eth_data)
+    # Levels derived from the placeholder price would look like real advice
+    has_price = eth_data.get("data_source") != "fallback"
+    no_levels = "• Price levels: unavailable until live prices return\n"
     
     # Header with current data
-    analysis = f"🚀 **NeuroTrade AI - Live ETH Analysis**\n\n"
-    analysis += f"💰 **Current Price**: ${price:,.2f} USD\n"
-    analysis += f"📊 **24h Change**: {change_24h:+.2f}%\n"
-    analysis += f"💹 **24h Volume**: ${volume_24h:,.0f}\n"
-    analysis += f"🏆 **Market Cap**: ${market_cap:,.0f}\n\n"
+    parts = [f"🚀 **NeuroTrade AI - {'Live ' if eth_data.get('data_source', 'live') == 'live' else ''}ETH Analysis**\n\n"]
+    parts.append(data_notice(eth_data))
+    parts.append(f"💰 **Current Price**: {format_price(eth_data)}\n")
+    parts.append(f"📊 **24h Change**: {change_24h:+.2f}%\n")
+    parts.append(f"💹 **24h Volume**: ${volume_24h:,.0f}\n")
+    parts.append(f"🏆 **Market Cap**: ${market_cap:,.0f}\n")
+    parts.append(indicator_summary(eth_data))
+    parts.append("\n")
     
     # Market sentiment
-    if change_24h > 2:
+    if signals.trend == "bullish" and signals.momentum != "overbought":
         sentiment = "🟢 **Bullish** - Strong upward momentum"
-    elif change_24h > 0:
+    elif signals.trend == "bullish":
         sentiment = "🟡 **Neutral-Bullish** - Positive but cautious"
-    elif change_24h > -2:
+    elif signals.trend == "neutral":
         sentiment = "🟡 **Neutral** - Sideways movement"
     else:
         sentiment = "🔴 **Bearish** - Downward pressure"
     
-    analysis += f"🎯 **Market Sentiment**: {sentiment}\n\n"
+    parts.append(f"🎯 **Market Sentiment**: {sentiment}\n\n")
     
     # Specific analysis based on query
-    if any(word in query_lower for word in ["price", "cost", "value"]):
-        analysis += f"📈 **Price Analysis**:\n"
-        analysis += f"• Current trend: {'Upward' if change_24h > 0 else 'Downward' if change_24h < -1 else 'Sideways'}\n"
-        analysis += f"• Volatility: {'High' if abs(change_24h) > 3 else 'Moderate' if abs(change_24h) > 1 else 'Low'}\n"
-        analysis += f"• Volume status: {'Above average' if volume_24h > 10000000000 else 'Normal'}\n"
-        analysis += f"• Support level: ~${price * 0.95:.2f}\n"
-        analysis += f"• Resistance level: ~${price * 1.05:.2f}\n\n"
+    if action == "price":
+        parts.append(f"📈 **Price Analysis**:\n")
+        parts.append(f"• Current trend: {'Upward' if signals.trend == 'bullish' else 'Downward' if signals.trend == 'bearish' else 'Sideways'}\n")
+        parts.append(f"• Volatility: {signals.volatility.capitalize()}\n")
+        parts.append(f"• Volume status: {'Above average' if volume_24h > 10000000000 else 'Normal'}\n")
+        if has_price:
+            parts.append(f"• Support level: ~${price * 0.95:.2f}\n")
+            parts.append(f"• Resistance level: ~${price * 1.05:.2f}\n")
+        else:
+            parts.append(no_levels)
+        parts.append("\n")
         
-    elif any(word in query_lower for word in ["buy", "purchase", "long"]):
-        analysis += f"🔵 **Buy Signal Analysis**:\n"
-        if change_24h > 1:
-            analysis += f"✅ **Signal**: POSITIVE\n"
-            analysis += f"• Strong upward momentum detected\n"
-            analysis += f"• Volume confirms buying interest\n"
-            analysis += f"• Entry strategy: Consider immediate entry\n"
-        elif change_24h > -1:
-            analysis += f"⚠️ **Signal**: NEUTRAL\n"
-            analysis += f"• Price consolidating, wait for breakout\n"
-            analysis += f"• Entry strategy: Set buy orders at ${price * 0.98:.2f}\n"
+    elif action == "buy":
+        parts.append(f"🔵 **Buy Signal Analysis**:\n")
+        if signals.trend == "bullish" and signals.momentum != "overbought":
+            parts.append(f"✅ **Signal**: POSITIVE\n")
+            parts.append(f"• Strong upward momentum detected\n")
+            parts.append(f"• Volume confirms buying interest\n")
+            parts.append(f"• Entry strategy: Consider immediate entry\n")
+        elif signals.trend != "bearish" or signals.momentum == "oversold":
+            parts.append(f"⚠️ **Signal**: NEUTRAL\n")
+            parts.append(f"• {'Overbought, wait for a pullback' if signals.momentum == 'overbought' else 'Oversold, watch for a reversal' if signals.momentum == 'oversold' else 'Price consolidating, wait for breakout'}\n")
+            if has_price:
+                parts.append(f"• Entry strategy: Set buy orders at ${price * 0.98:.2f}\n")
+            else:
+                parts.append(f"• Entry strategy: Wait for live prices before placing orders\n")
         else:
-            analysis += f"❌ **Signal**: NEGATIVE\n"
-            analysis += f"• Downward trend, avoid buying\n"
-            analysis += f"• Entry strategy: Wait for reversal confirmation\n"
-        analysis += f"• Stop-loss: ${price * 0.92:.2f}\n"
-        analysis += f"• Take-profit: ${price * 1.15:.2f}\n\n"
+            parts.append(f"❌ **Signal**: NEGATIVE\n")
+            parts.append(f"• Downward trend, avoid buying\n")
+            parts.append(f"• Entry strategy: Wait for reversal confirmation\n")
+        if has_price:
+            parts.append(f"• Stop-loss: ${price * 0.92:.2f}\n")
+            parts.append(f"• Take-profit: ${price * 1.15:.2f}\n\n")
+        else:
+            parts.append(no_levels + "\n")
         
-    elif any(word in query_lower for word in ["sell", "exit", "short"]):
-        analysis += f"🔴 **Sell Signal Analysis**:\n"
-        if change_24h < -1:
-            analysis += f"✅ **Signal**: POSITIVE for selling\n"
-            analysis += f"• Downward momentum confirmed\n"
-            analysis += f"• Volume suggests selling pressure\n"
-            analysis += f"• Exit strategy: Consider immediate exit\n"
-        elif change_24h < 1:
-            analysis += f"⚠️ **Signal**: NEUTRAL\n"
-            analysis += f"• Price range-bound, partial profit taking\n"
-            analysis += f"• Exit strategy: Trim positions on strength\n"
+    elif action == "sell":
+        parts.append(f"🔴 **Sell Signal Analysis**:\n")
+        if signals.trend == "bearish" and signals.momentum != "oversold":
+            parts.append(f"✅ **Signal**: POSITIVE for selling\n")
+            parts.append(f"• Downward momentum confirmed\n")
+            parts.append(f"• Volume suggests selling pressure\n")
+            parts.append(f"• Exit strategy: Consider immediate exit\n")
+        elif signals.trend != "bullish" or signals.momentum == "overbought":
+            parts.append(f"⚠️ **Signal**: NEUTRAL\n")
+            parts.append(f"• Price range-bound, partial profit taking\n")
+            parts.append(f"• Exit strategy: Trim positions on strength\n")
+        else:
+            parts.append(f"❌ **Signal**: NEGATIVE for selling\n")
+            parts.append(f"• Upward trend intact, hold positions\n")
+            parts.append(f"• Exit strategy: Set trailing stops\n")
+        if has_price:
+            parts.append(f"• Stop-loss: ${price * 1.08:.2f}\n")
+            parts.append(f"• Target: ${price * 0.85:.2f}\n\n")
         else:
-            analysis += f"❌ **Signal**: NEGATIVE for selling\n"
-            analysis += f"• Upward trend intact, hold positions\n"
-            analysis += f"• Exit strategy: Set trailing stops\n"
-        analysis += f"• Stop-loss: ${price * 1.08:.2f}\n"
-        analysis += f"• Target: ${price * 0.85:.2f}\n\n"
+            parts.append(no_levels + "\n")
         
-    elif any(word in query_lower for word in ["swap", "exchange", "trade"]):
-        analysis += f"🔄 **Swap Analysis**:\n"
-        analysis += f"• Current ETH price: ${price:,.2f}\n"
-        analysis += f"• Gas fees: {'High' if price > 3000 else 'Moderate' if price > 2000 else 'Low'} (network congestion)\n"
-        analysis += f"• Slippage risk: {'High' if volume_24h < 5000000000 else 'Low'}\n"
-        analysis += f"• Best timing: {'Wait for lower gas' if price > 3000 else 'Good timing'}\n"
-        analysis += f"• DEX recommendation: Use aggregators for best rates\n\n"
+    elif action == "swap":
+        parts.append(f"🔄 **Swap Analysis**:\n")
+        parts.append(f"• Current ETH price: {format_price(eth_data)}\n")
+        parts.append(f"• Gas fees: {'High' if price > 3000 else 'Moderate' if price > 2000 else 'Low'} (network congestion)\n")
+        parts.append(f"• Slippage risk: {'High' if volume_24h < 5000000000 else 'Low'}\n")
+        parts.append(f"• Best timing: {'Volatile - use limit orders' if signals.volatility == 'high' else 'Wait for lower gas' if price > 3000 else 'Good timing'}\n")
+        parts.append(f"• DEX recommendation: Use aggregators for best rates\n\n")
         
-    elif any(word in query_lower for word in ["forecast", "prediction", "future"]):
-        analysis += f"🔮 **Market Forecast**:\n"
-        if change_24h > 2:
-            analysis += f"• Short-term (24h): Continued bullish momentum likely\n"
-            analysis += f"• Medium-term (7d): Expect some consolidation\n"
-            analysis += f"• Target: ${price * 1.10:.2f} - ${price * 1.20:.2f}\n"
-        elif change_24h < -2:
-            analysis += f"• Short-term (24h): Further downside possible\n"
-            analysis += f"• Medium-term (7d): Look for bounce signals\n"
-            analysis += f"• Target: ${price * 0.90:.2f} - ${price * 0.80:.2f}\n"
+    elif action == "forecast":
+        parts.append(f"🔮 **Market Forecast**:\n")
+        if signals.trend == "bullish":
+            parts.append(f"• Short-term (24h): Continued bullish momentum likely\n")
+            parts.append(f"• Medium-term (7d): Expect some consolidation\n")
+            if has_price:
+                parts.append(f"• Target: ${price * 1.10:.2f} - ${price * 1.20:.2f}\n")
+        elif signals.trend == "bearish":
+            parts.append(f"• Short-term (24h): Further downside possible\n")
+            parts.append(f"• Medium-term (7d): Look for bounce signals\n")
+            if has_price:
+                parts.append(f"• Target: ${price * 0.90:.2f} - ${price * 0.80:.2f}\n")
         else:
-            analysis += f"• Short-term (24h): Range-bound trading expected\n"
-            analysis += f"• Medium-term (7d): Awaiting directional catalyst\n"
-            analysis += f"• Range: ${price * 0.95:.2f} - ${price * 1.05:.2f}\n"
-        analysis += f"\n"
+            parts.append(f"• Short-term (24h): Range-bound trading expected\n")
+            parts.append(f"• Medium-term (7d): Awaiting directional catalyst\n")
+            if has_price:
+                parts.append(f"• Range: ${price * 0.95:.2f} - ${price * 1.05:.2f}\n")
+        if not has_price:
+            parts.append(no_levels)
+        parts.append(f"\n")
         
     else:
         # General analysis
-        analysis += f"💡 **General Market Status**:\n"
-        analysis += f"• ETH is showing {'strength' if change_24h > 0 else 'weakness'} today\n"
-        analysis += f"• Trading volume is {'healthy' if volume_24h > 8000000000 else 'light'}\n"
-        analysis += f"• Market structure: {'Bullish' if change_24h > 1 else 'Bearish' if change_24h < -1 else 'Neutral'}\n"
-        analysis += f"• Opportunity level: {'High' if abs(change_24h) > 3 else 'Moderate'}\n\n"
+        parts.append(f"💡 **General Market Status**:\n")
+        parts.append(f"• ETH is showing {'weakness' if signals.trend == 'bearish' else 'strength'} today\n")
+        parts.append(f"• Trading volume is {'healthy' if volume_24h > 8000000000 else 'light'}\n")
+        parts.append(f"• Market structure: {signals.trend.capitalize()}\n")
+        parts.append(f"• Opportunity level: {'High' if signals.volatility == 'high' else 'Moderate'}\n\n")
         
-        analysis += f"🎯 **What I Can Help With**:\n"
-        analysis += f"• 'ETH price analysis' - Detailed price breakdown\n"
-        analysis += f"• 'Should I buy ETH?' - Buy signal analysis\n"
-        analysis += f"• 'Should I sell ETH?' - Sell signal analysis\n"
-        analysis += f"• 'ETH swap analysis' - Trading execution tips\n"
-        analysis += f"• 'ETH forecast' - Market predictions\n\n"
+        parts.append(f"🎯 **What I Can Help With**:\n")
+        parts.append(f"• 'ETH price analysis' - Detailed price breakdown\n")
+        parts.append(f"• 'Should I buy ETH?' - Buy signal analysis\n")
+        parts.append(f"• 'Should I sell ETH?' - Sell signal analysis\n")
+        parts.append(f"• 'ETH swap analysis' - Trading execution tips\n")
+        parts.append(f"• 'ETH forecast' - Market predictions\n\n")
     
     # Footer
-    analysis += f"---\n"
-    analysis += f"🤖 **NeuroTrade AI** - Real-time Ethereum Trading Intelligence\n"
-    analysis += f"🌐 **Multi-Chain**: Ethereum • Arbitrum • Polygon • Optimism • Base\n"
-    analysis += f"⚡ **Live Data** • 🔒 **Secure** • 🎯 **Accurate**\n"
-    analysis += f"💬 **Ask me anything about ETH trading!**"
+    parts.append(f"---\n")
+    parts.append(f"🤖 **NeuroTrade AI** - Real-time Ethereum Trading Intelligence\n")
+    parts.append(f"🌐 **Multi-Chain**: Ethereum • Arbitrum • Polygon • Optimism • Base\n")
+    parts.append(f"⚡ **Live Data** • 🔒 **Secure** • 🎯 **Accurate**\n")
+    parts.append(f"💬 **Ask me anything about ETH trading!**")
     
+    return "".join(parts)
+
+# Analysis bodies only depend on (intent, snapshot), so render each once per refresh
+_analysis_cache = SnapshotRenderCache(render_eth_trading_analysis)
+
+async def get_eth_trading_analysis(query: str) -> str:
+    """Get comprehensive ETH trading analysis"""
+    intent = classify(query)
+    analysis = _analysis_cache.get(intent.action)
+    if intent.action == "swap":
+        # The route depends on the query, so it goes on top of the cached render
+        route = describe_swap(query, intent)
+        if route is not None:
+            return f"{route}\n\n{analysis}"
     return analysis
 
+# === STATIC TEXTS (built once at import) ===
+
+WELCOME_TEXT = (
+    "🎉 **Welcome to NeuroTrade AI!**\n\n"
+    "🚀 I'm your intelligent Ethereum trading assistant.\n\n"
+    "💡 **I can help you with**:\n"
+    "• Real-time ETH price analysis\n"
+    "• Smart buy/sell recommendations\n"
+    "• Swap optimization strategies\n"
+    "• Market forecasting\n"
+    "• Cross-chain opportunities\n\n"
+    "🎯 **Try asking**: 'What's ETH price?' or 'Should I buy ETH?'"
+)
+
+GOODBYE_TEXT = (
+    "👋 **Thank you for using NeuroTrade AI!**\n\n"
+    "🎯 **Session Summary**: We analyzed ETH market conditions\n"
+    "📊 **Market Status**: Live data processed successfully\n"
+    "🚀 **Come back anytime** for more trading insights!\n\n"
+    "🌐 **Find me on ASI:One** for 24/7 trading intelligence\n"
+    "💬 **NeuroTrade AI** - Your Smart Trading Partner"
+)
+
+HELP_TEXT = (
+    "💬 **NeuroTrade AI Ready!**\n\n"
+    "🔥 **Live ETH Trading Intelligence**\n\n"
+    "💡 **Ask me about**:\n"
+    "• 'ETH price' - Current market analysis\n"
+    "• 'Buy ETH' - Purchase recommendations\n"
+    "• 'Sell ETH' - Exit strategies\n"
+    "• 'ETH forecast' - Market predictions\n"
+    "• 'Swap ETH' - Trading execution\n\n"
+    "🎯 **Start chatting** - I'm here to help!"
+)
+
+ERROR_TEXT = (
+    "❌ **Error Processing Request**\n\n"
+    "🔧 Sorry, I encountered an issue processing your query.\n\n"
+    "💡 **Please try**:\n"
+    "• 'ETH price' - For current price\n"
+    "• 'Buy ETH' - For buy analysis\n"
+    "• 'Sell ETH' - For sell analysis\n"
+    "• 'ETH forecast' - For predictions\n\n"
+    "🤖 **NeuroTrade AI** is ready to help!"
+)
+
 def create_chat_response(text: str) -> ChatMessage:
     """Create a chat message response"""
     return ChatMessage(
@@ -224,104 +290,81 @@ def create_chat_response(text: str) -> ChatMessage:
 
 # === PROTOCOL HANDLERS ===
 
+async def send_busy_chat(ctx: Context, sender: str, msg: ChatMessage):
+    """Acknowledge a shed chat message and answer from cached data"""
+    await ctx.send(sender, ChatAcknowledgement(timestamp=datetime.utcnow(), acknowledged_msg_id=msg.msg_id))
+    await ctx.send(sender, create_chat_response(busy_text()))
+
 @exact_chat_protocol.on_message(ChatMessage)
+@admission_controlled("exact_chat", send_busy_chat)
 async def handle_chat_message(ctx: Context, sender: str, msg: ChatMessage):
     """Handle incoming chat messages - EXACT implementation"""
     try:
         ctx.logger.info(f"🎯 NeuroTrade Chat: Message from {sender}")
+        messages_total.inc(handler="exact_chat")
         
         # Send acknowledgment (required by protocol)
         ack = ChatAcknowledgement(
             timestamp=datetime.utcnow(),
             acknowledged_msg_id=msg.msg_id
         )
-        await ctx.send(sender, ack)
+        with handler_stage("exact_chat", "ack"):
+            await ctx.send(sender, ack)
         
         # Extract text content
-        user_text = ""
+        text_parts = []
         session_started = False
         session_ended = False
         
         for content in msg.content:
             if isinstance(content, TextContent):
-                user_text += content.text + " "
+                text_parts.append(content.text)
             elif isinstance(content, StartSessionContent):
                 session_started = True
             elif isinstance(content, EndSessionContent):
                 session_ended = True
         
-        user_text = user_text.strip()
+        user_text = " ".join(text_parts).strip()
         
         # Handle session start
         if session_started:
-            welcome_text = "🎉 **Welcome to NeuroTrade AI!**\n\n"
-            welcome_text += "🚀 I'm your intelligent Ethereum trading assistant.\n\n"
-            welcome_text += "💡 **I can help you with**:\n"
-            welcome_text += "• Real-time ETH price analysis\n"
-            welcome_text += "• Smart buy/sell recommendations\n"
-            welcome_text += "• Swap optimization strategies\n"
-            welcome_text += "• Market forecasting\n"
-            welcome_text += "• Cross-chain opportunities\n\n"
-            welcome_text += "🎯 **Try asking**: 'What's ETH price?' or 'Should I buy ETH?'"
-            
-            response = create_chat_response(welcome_text)
+            sessions.start("exact_chat", sender, str(ctx.session))
+            response = create_chat_response(WELCOME_TEXT)
             await ctx.send(sender, response)
             return
         
         # Handle session end
         if session_ended:
-            goodbye_text = "👋 **Thank you for using NeuroTrade AI!**\n\n"
-            goodbye_text += "🎯 **Session Summary**: We analyzed ETH market conditions\n"
-            goodbye_text += "📊 **Market Status**: Live data processed successfully\n"
-            goodbye_text += "🚀 **Come back anytime** for more trading insights!\n\n"
-            goodbye_text += "🌐 **Find me on ASI:One** for 24/7 trading intelligence\n"
-            goodbye_text += "💬 **NeuroTrade AI** - Your Smart Trading Partner"
-            
-            response = create_chat_response(goodbye_text)
+            sessions.end("exact_chat", sender)
+            response = create_chat_response(GOODBYE_TEXT)
             await ctx.send(sender, response)
             return
         
         # Handle regular chat
         if not user_text:
             # Empty message - send help
-            help_text = "💬 **NeuroTrade AI Ready!**\n\n"
-            help_text += "🔥 **Live ETH Trading Intelligence**\n\n"
-            help_text += "💡 **Ask me about**:\n"
-            help_text += "• 'ETH price' - Current market analysis\n"
-            help_text += "• 'Buy ETH' - Purchase recommendations\n"
-            help_text += "• 'Sell ETH' - Exit strategies\n"
-            help_text += "• 'ETH forecast' - Market predictions\n"
-            help_text += "• 'Swap ETH' - Trading execution\n\n"
-            help_text += "🎯 **Start chatting** - I'm here to help!"
-            
-            response = create_chat_response(help_text)
+            response = create_chat_response(HELP_TEXT)
             await ctx.send(sender, response)
             return
         
         # Process trading query
         ctx.logger.info(f"Processing query: {user_text}")
+        sessions.touch("exact_chat", sender)
         
         # Get analysis
-        analysis = await get_eth_trading_analysis(user_text)
+        with handler_stage("exact_chat", "generate"):
+            analysis = await get_eth_trading_analysis(user_text)
         
         # Send response
         response = create_chat_response(analysis)
-        await ctx.send(sender, response)
+        with handler_stage("exact_chat", "reply"):
+            await ctx.send(sender, response)
         
     except Exception as e:
         ctx.logger.error(f"Chat handler error: {e}")
         
         # Send error response
-        error_text = "❌ **Error Processing Request**\n\n"
-        error_text += "🔧 Sorry, I encountered an issue processing your query.\n\n"
-        error_text += "💡 **Please try**:\n"
-        error_text += "• 'ETH price' - For current price\n"
-        error_text += "• 'Buy ETH' - For buy analysis\n"
-        error_text += "• 'Sell ETH' - For sell analysis\n"
-        error_text += "• 'ETH forecast' - For predictions\n\n"
-        error_text += "🤖 **NeuroTrade AI** is ready to help!"
-        
-        error_response = create_chat_response(error_text)
+        error_response = create_chat_response(ERROR_TEXT)
         await ctx.send(sender, error_response)
 
 @exact_chat_protocol.on_message(ChatAcknowledgement)
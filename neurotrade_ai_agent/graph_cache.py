@@ -0,0 +1,235 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from metrics import cache_requests_total, registry
+from typed_json import decode_record, record_to_dict
+
+logger = logging.getLogger(__name__)
+
+# 🗃️ PERSISTENT SUBGRAPH CACHE
+# Token and pool entities from The Graph are kept in a local SQLite file,
+# keyed by (chain, entity, id), so a restarted agent answers from disk
+# instead of paying full subgraph latency. Entries younger than the soft TTL
+# are served as-is; between the soft and hard TTL they are served
+# immediately while a background refresh runs (stale-while-revalidate);
+# past the hard TTL they are fetched again. The file is kept under
+# GRAPH_CACHE_MAX_BYTES by dropping the oldest entries. Typed records
+# (typed_json) are stored as JSON under the subgraph's field names and, given
+# record_type, decoded straight back into records on a hit.
+
+GRAPH_CACHE_PATH = os.getenv("GRAPH_CACHE_PATH", "graph_cache.sqlite3")
+GRAPH_CACHE_SOFT_TTL = float(os.getenv("GRAPH_CACHE_SOFT_TTL", "60"))
+GRAPH_CACHE_HARD_TTL = float(os.getenv("GRAPH_CACHE_HARD_TTL", "3600"))
+GRAPH_CACHE_MAX_BYTES = int(os.getenv("GRAPH_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# Eviction frees space down to this fraction of the size limit
+EVICTION_TARGET = 0.9
+
+CacheKey = Tuple[str, str, str]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    chain TEXT NOT NULL,
+    entity TEXT NOT NULL,
+    id TEXT NOT NULL,
+    value TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (chain, entity, id)
+);
+CREATE INDEX IF NOT EXISTS entries_fetched_at ON entries (fetched_at);
+"""
+
+
+class PersistentSWRCache:
+    """SQLite-backed stale-while-revalidate cache with single-flight loading"""
+
+    def __init__(
+        self,
+        path: str = GRAPH_CACHE_PATH,
+        soft_ttl: float = GRAPH_CACHE_SOFT_TTL,
+        hard_ttl: float = GRAPH_CACHE_HARD_TTL,
+        max_bytes: int = GRAPH_CACHE_MAX_BYTES,
+        name: str = "graph",
+    ):
+        self.path = path or ":memory:"
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = max(hard_ttl, soft_ttl)
+        self.max_bytes = max_bytes
+        self.name = name
+        self._db: Optional[sqlite3.Connection] = None
+        self._total_bytes = 0
+        self._inflight: Dict[CacheKey, asyncio.Future] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refresh_errors = 0
+        self.evictions = 0
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        """Connection, opened (and the schema created) on first use"""
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(_SCHEMA)
+            self._db.execute("DELETE FROM entries WHERE fetched_at < ?", (time.time() - self.hard_ttl,))
+            self._total_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        return self._db
+
+    def peek(
+        self, chain: str, entity: str, entity_id: str, record_type: Optional[type] = None
+    ) -> Optional[Tuple[Any, float]]:
+        """(value, age in seconds) if an entry within the hard TTL exists
+
+        With record_type the value is decoded into that record; an entry that
+        does not decode is treated as missing.
+        """
+        row = self.db.execute(
+            "SELECT value, fetched_at FROM entries WHERE chain = ? AND entity = ? AND id = ?",
+            (chain, entity, entity_id),
+        ).fetchone()
+        if row is None:
+            return None
+        age = time.time() - row[1]
+        if age >= self.hard_ttl:
+            return None
+        if record_type is None:
+            return json.loads(row[0]), age
+        try:
+            return decode_record(row[0], record_type), age
+        except ValueError as e:
+            logger.warning(f"Ignoring unreadable cached {entity} {entity_id}: {e}")
+            return None
+
+    def set(self, chain: str, entity: str, entity_id: str, value: Any):
+        # Records are written as their subgraph-named dicts
+        encoded = json.dumps(value, separators=(",", ":"), default=record_to_dict)
+        size = len(encoded)
+        previous = self.db.execute(
+            "SELECT size FROM entries WHERE chain = ? AND entity = ? AND id = ?", (chain, entity, entity_id)
+        ).fetchone()
+        self.db.execute(
+            "INSERT OR REPLACE INTO entries (chain, entity, id, value, fetched_at, size) VALUES (?, ?, ?, ?, ?, ?)",
+            (chain, entity, entity_id, encoded, time.time(), size),
+        )
+        self._total_bytes += size - (previous[0] if previous else 0)
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+
+    def invalidate(self, chain: str, entity: str, entity_id: str):
+        key = (chain, entity, entity_id)
+        row = self.db.execute("SELECT size FROM entries WHERE chain = ? AND entity = ? AND id = ?", key).fetchone()
+        if row:
+            self.db.execute("DELETE FROM entries WHERE chain = ? AND entity = ? AND id = ?", key)
+            self._total_bytes -= row[0]
+
+    def _evict(self):
+        """Drop expired entries, then the oldest ones, until under the size target"""
+        target = int(self.max_bytes * EVICTION_TARGET)
+        self.db.execute("DELETE FROM entries WHERE fetched_at < ?", (time.time() - self.hard_ttl,))
+        self._total_bytes = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if self._total_bytes <= target:
+            return
+        doomed, freed = [], 0
+        for rowid, size in self.db.execute("SELECT rowid, size FROM entries ORDER BY fetched_at"):
+            doomed.append((rowid,))
+            freed += size
+            if self._total_bytes - freed <= target:
+                break
+        self.db.executemany("DELETE FROM entries WHERE rowid = ?", doomed)
+        self._total_bytes -= freed
+        self.evictions += len(doomed)
+        logger.debug(f"🧹 Evicted {len(doomed)} {self.name} cache entries ({freed} bytes)")
+
+    async def get_or_fetch(
+        self,
+        chain: str,
+        entity: str,
+        entity_id: str,
+        fetcher: Callable[[], Awaitable[Any]],
+        record_type: Optional[type] = None,
+    ) -> Any:
+        """Cached value for the key, refreshing in the background once it is stale
+
+        Pass record_type when fetcher returns typed_json records, so hits
+        come back as records too.
+        """
+        key = (chain, entity, entity_id)
+        cached = self.peek(*key, record_type)
+        if cached is not None:
+            value, age = cached
+            if age < self.soft_ttl:
+                self.hits += 1
+                cache_requests_total.inc(cache=self.name, result="hit")
+            else:
+                self.stale_hits += 1
+                cache_requests_total.inc(cache=self.name, result="stale")
+                if key not in self._inflight:
+                    self._load(key, fetcher).add_done_callback(self._log_refresh_error)
+            return value
+
+        if key in self._inflight:
+            self.coalesced += 1
+            cache_requests_total.inc(cache=self.name, result="coalesced")
+        else:
+            self.misses += 1
+            cache_requests_total.inc(cache=self.name, result="miss")
+        # Shield so a cancelled caller does not cancel the load for the others
+        return await asyncio.shield(self._load(key, fetcher))
+
+    def _load(self, key: CacheKey, fetcher: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        """Start (or join) the single in-flight fetch for key"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_and_store(key, fetcher))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return task
+
+    async def _fetch_and_store(self, key: CacheKey, fetcher: Callable[[], Awaitable[Any]]) -> Any:
+        value = await fetcher()
+        # Unknown entities (None) are not cached so the next caller retries
+        if value is not None:
+            self.set(*key, value)
+        return value
+
+    def _log_refresh_error(self, task: asyncio.Future):
+        if not task.cancelled() and task.exception() is not None:
+            self.refresh_errors += 1
+            logger.warning(f"Background {self.name} cache refresh failed: {task.exception()}")
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def stats(self) -> Dict[str, int]:
+        """Cache counters for logging and metrics"""
+        return {
+            "bytes": self._total_bytes,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "refresh_errors": self.refresh_errors,
+            "evictions": self.evictions,
+        }
+
+
+graph_cache = PersistentSWRCache()
+
+registry.gauge(
+    "neurotrade_graph_cache_bytes", "Size of the cached subgraph entities on disk",
+    callback=lambda: graph_cache.stats()["bytes"],
+)
+
+
+__all__ = ["PersistentSWRCache", "graph_cache"]
@@ -0,0 +1,81 @@
+import asyncio
+import logging
+import os
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# 🌐 SHARED HTTP CLIENT
+# One pooled aiohttp session for the whole process, so upstream calls to
+# CoinGecko and The Graph reuse keep-alive connections instead of paying a
+# fresh TCP+TLS handshake per chat message. aiohttp itself is only imported
+# when the session is first built, which keeps `import` of the agent modules
+# cheap for tooling.
+
+HTTP_TOTAL_TIMEOUT = float(os.getenv("HTTP_TOTAL_TIMEOUT", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "8"))
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "20"))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "30"))
+HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))
+
+_session: Optional["aiohttp.ClientSession"] = None
+_session_lock: Optional[asyncio.Lock] = None
+
+
+def _build_session() -> "aiohttp.ClientSession":
+    """Create a pooled session with keep-alive, per-host limits and DNS caching"""
+    import aiohttp
+
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_POOL_LIMIT,
+        limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+        keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+        use_dns_cache=True,
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=HTTP_TOTAL_TIMEOUT,
+        sock_connect=HTTP_CONNECT_TIMEOUT,
+        sock_read=HTTP_READ_TIMEOUT,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=timeout,
+        headers={"User-Agent": "NeuroTrade-AI-Agent"},
+    )
+
+
+async def open_session() -> "aiohttp.ClientSession":
+    """Open the shared session (called from the agent startup event)"""
+    global _session, _session_lock
+    if _session_lock is None:
+        _session_lock = asyncio.Lock()
+    async with _session_lock:
+        if _session is None or _session.closed:
+            _session = _build_session()
+            logger.info("🌐 Shared HTTP session opened")
+    return _session
+
+
+async def get_session() -> "aiohttp.ClientSession":
+    """Return the shared session, opening it lazily if startup has not run yet"""
+    if _session is not None and not _session.closed:
+        return _session
+    return await open_session()
+
+
+async def close_session():
+    """Close the shared session (called from the agent shutdown event)"""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+        logger.info("🌐 Shared HTTP session closed")
+    _session = None
+
+
+__all__ = ["get_session", "open_session", "close_session"]
@@ -0,0 +1,439 @@
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Deque, Dict, Mapping, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# 📐 TECHNICAL INDICATORS
+# Streaming indicators updated in O(1) per market tick (SMA/EMA, RSI,
+# realized volatility, VWAP, drawdown), plus compute_indicators(), a
+# vectorized batch path that produces the same values over a whole history
+# (e.g. a price_history range read). Windows are counted in ticks.
+# NumPy is only imported by the batch path, so the streaming indicators
+# (and the chat renders that use them) do not pay for it.
+
+SECONDS_PER_YEAR = 365 * 86400
+
+INDICATOR_NAMES = ("sma_fast", "sma_slow", "ema_fast", "ema_slow", "rsi", "volatility", "vwap", "drawdown")
+
+
+@dataclass(frozen=True)
+class IndicatorConfig:
+    """Indicator windows, in ticks"""
+    sma_fast: int = 20
+    sma_slow: int = 50
+    ema_fast: int = 12
+    ema_slow: int = 26
+    rsi_period: int = 14
+    volatility_window: int = 60
+    vwap_window: int = 60
+    drawdown_window: int = 1440
+
+    @property
+    def lookback(self) -> int:
+        """Ticks of history needed to warm every indicator up"""
+        return max(self.sma_slow, self.ema_slow * 4, self.rsi_period * 4, self.volatility_window + 1,
+                   self.vwap_window, self.drawdown_window)
+
+
+DEFAULT_CONFIG = IndicatorConfig()
+
+
+# === STREAMING INDICATORS ===
+
+class SMA:
+    """Simple moving average over the last window prices"""
+    __slots__ = ("window", "_values", "_sum")
+
+    def __init__(self, window: int):
+        self.window = window
+        self._values: Deque[float] = deque()
+        self._sum = 0.0
+
+    def update(self, price: float):
+        if len(self._values) == self.window:
+            self._sum -= self._values.popleft()
+        self._values.append(price)
+        self._sum += price
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._sum / self.window if len(self._values) == self.window else None
+
+
+class EMA:
+    """Exponential moving average (alpha = 2 / (period + 1)), seeded with the first price"""
+    __slots__ = ("period", "alpha", "_value", "_count")
+
+    def __init__(self, period: int):
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self._value = 0.0
+        self._count = 0
+
+    def update(self, price: float):
+        self._value = price if self._count == 0 else self._value + self.alpha * (price - self._value)
+        self._count += 1
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._value if self._count >= self.period else None
+
+
+class RSI:
+    """Wilder's relative strength index, seeded with the first price change"""
+    __slots__ = ("period", "_previous", "_gain", "_loss", "_count")
+
+    def __init__(self, period: int):
+        self.period = period
+        self._previous: Optional[float] = None
+        self._gain = 0.0
+        self._loss = 0.0
+        self._count = 0
+
+    def update(self, price: float):
+        if self._previous is not None:
+            change = price - self._previous
+            gain, loss = max(change, 0.0), max(-change, 0.0)
+            if self._count == 0:
+                self._gain, self._loss = gain, loss
+            else:
+                self._gain += (gain - self._gain) / self.period
+                self._loss += (loss - self._loss) / self.period
+            self._count += 1
+        self._previous = price
+
+    @property
+    def value(self) -> Optional[float]:
+        if self._count < self.period:
+            return None
+        return _rsi(self._gain, self._loss)
+
+
+class RealizedVolatility:
+    """Annualized realized volatility (%) from log returns over the last window ticks"""
+    __slots__ = ("window", "_returns", "_timestamps", "_sum_sq", "_previous")
+
+    def __init__(self, window: int):
+        self.window = window
+        self._returns: Deque[float] = deque()
+        self._timestamps: Deque[float] = deque()
+        self._sum_sq = 0.0
+        self._previous: Optional[float] = None
+
+    def update(self, timestamp: float, price: float):
+        self._timestamps.append(timestamp)
+        if len(self._timestamps) > self.window + 1:
+            self._timestamps.popleft()
+        if self._previous is not None and self._previous > 0 and price > 0:
+            ret = math.log(price / self._previous)
+            if len(self._returns) == self.window:
+                old = self._returns.popleft()
+                self._sum_sq -= old * old
+            self._returns.append(ret)
+            self._sum_sq += ret * ret
+        self._previous = price
+
+    @property
+    def value(self) -> Optional[float]:
+        if len(self._returns) < self.window or len(self._timestamps) <= self.window:
+            return None
+        span = self._timestamps[-1] - self._timestamps[0]
+        if span <= 0:
+            return None
+        return math.sqrt(max(self._sum_sq, 0.0) * SECONDS_PER_YEAR / span) * 100
+
+
+class VWAP:
+    """Volume-weighted average price over up to the last window ticks"""
+    __slots__ = ("window", "_ticks", "_pv", "_volume")
+
+    def __init__(self, window: int):
+        self.window = window
+        self._ticks: Deque[Tuple[float, float]] = deque()
+        self._pv = 0.0
+        self._volume = 0.0
+
+    def update(self, price: float, volume: float):
+        if len(self._ticks) == self.window:
+            old_pv, old_volume = self._ticks.popleft()
+            self._pv -= old_pv
+            self._volume -= old_volume
+        self._ticks.append((price * volume, volume))
+        self._pv += price * volume
+        self._volume += volume
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._pv / self._volume if self._volume > 0 else None
+
+
+class Drawdown:
+    """Percent below the highest price of up to the last window ticks (<= 0)"""
+    __slots__ = ("window", "_peaks", "_index", "_price")
+
+    def __init__(self, window: int):
+        self.window = window
+        # Monotonic (index, price) queue: the front is the window maximum
+        self._peaks: Deque[Tuple[int, float]] = deque()
+        self._index = 0
+        self._price: Optional[float] = None
+
+    def update(self, price: float):
+        while self._peaks and self._peaks[-1][1] <= price:
+            self._peaks.pop()
+        self._peaks.append((self._index, price))
+        if self._peaks[0][0] <= self._index - self.window:
+            self._peaks.popleft()
+        self._index += 1
+        self._price = price
+
+    @property
+    def value(self) -> Optional[float]:
+        if self._price is None or self._peaks[0][1] <= 0:
+            return None
+        return (self._price / self._peaks[0][1] - 1) * 100
+
+
+def _rsi(gain: float, loss: float) -> float:
+    if loss == 0:
+        return 50.0 if gain == 0 else 100.0
+    return 100.0 - 100.0 / (1.0 + gain / loss)
+
+
+class IndicatorEngine:
+    """All indicators for one asset, updated together on each tick"""
+
+    def __init__(self, config: IndicatorConfig = DEFAULT_CONFIG):
+        self.config = config
+        self.sma_fast = SMA(config.sma_fast)
+        self.sma_slow = SMA(config.sma_slow)
+        self.ema_fast = EMA(config.ema_fast)
+        self.ema_slow = EMA(config.ema_slow)
+        self.rsi = RSI(config.rsi_period)
+        self.volatility = RealizedVolatility(config.volatility_window)
+        self.vwap = VWAP(config.vwap_window)
+        self.drawdown = Drawdown(config.drawdown_window)
+        self.samples = 0
+        self.last_timestamp: Optional[float] = None
+
+    def update(self, timestamp: float, price: float, volume: float = 0.0) -> Dict[str, Optional[float]]:
+        """Feed one tick (ticks not newer than the last one are ignored)"""
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            return self.values()
+        self.sma_fast.update(price)
+        self.sma_slow.update(price)
+        self.ema_fast.update(price)
+        self.ema_slow.update(price)
+        self.rsi.update(price)
+        self.volatility.update(timestamp, price)
+        self.vwap.update(price, volume)
+        self.drawdown.update(price)
+        self.samples += 1
+        self.last_timestamp = timestamp
+        return self.values()
+
+    def warm_up(self, timestamps: Sequence[float], prices: Sequence[float], volumes: Sequence[float]) -> int:
+        """Replay recorded ticks; returns how many were applied"""
+        before = self.samples
+        for timestamp, price, volume in zip(timestamps, prices, volumes):
+            self.update(float(timestamp), float(price), float(volume))
+        return self.samples - before
+
+    def values(self) -> Dict[str, Optional[float]]:
+        return {
+            "sma_fast": self.sma_fast.value,
+            "sma_slow": self.sma_slow.value,
+            "ema_fast": self.ema_fast.value,
+            "ema_slow": self.ema_slow.value,
+            "rsi": self.rsi.value,
+            "volatility": self.volatility.value,
+            "vwap": self.vwap.value,
+            "drawdown": self.drawdown.value,
+            "samples": self.samples,
+        }
+
+
+_engines: Dict[str, IndicatorEngine] = {}
+
+
+def indicator_engine(symbol: str = "ETH") -> IndicatorEngine:
+    """Process-wide engine for one asset"""
+    engine = _engines.get(symbol.upper())
+    if engine is None:
+        engine = _engines[symbol.upper()] = IndicatorEngine()
+    return engine
+
+
+# === BATCH PATH ===
+
+def _ewm(values: "np.ndarray", alpha: float, initial: float) -> "np.ndarray":
+    """y[k] = (1 - alpha) * y[k-1] + alpha * x[k] with y[-1] = initial, vectorized in blocks
+
+    Within a block the recurrence is a scaled cumulative sum; blocks are
+    sized so the decay powers stay well inside float range.
+    """
+    import numpy as np
+    decay = 1.0 - alpha
+    out = np.empty(len(values), dtype=np.float64)
+    if decay <= 0.0:
+        out[:] = values
+        return out
+    block = max(1, int(50.0 / -math.log(decay)))
+    powers = decay ** np.arange(min(block, len(values)), dtype=np.float64)
+    previous = initial
+    for start in range(0, len(values), block):
+        chunk = values[start:start + block]
+        p = powers[:len(chunk)]
+        out[start:start + len(chunk)] = alpha * p * np.cumsum(chunk / p) + previous * decay * p
+        previous = out[start + len(chunk) - 1]
+    return out
+
+
+def _rolling_sum(values: "np.ndarray", window: int, partial: bool = False) -> "np.ndarray":
+    """Sum of the last window values at each index (NaN before a full window unless partial)"""
+    import numpy as np
+    cumulative = np.concatenate(([0.0], np.cumsum(values)))
+    out = np.empty(len(values), dtype=np.float64)
+    if len(values) >= window:
+        out[window - 1:] = cumulative[window:] - cumulative[:-window]
+    head = min(window - 1, len(values))
+    out[:head] = cumulative[1:head + 1] if partial else np.nan
+    return out
+
+
+def compute_indicators(
+    timestamps: Sequence[float],
+    prices: Sequence[float],
+    volumes: Optional[Sequence[float]] = None,
+    config: IndicatorConfig = DEFAULT_CONFIG,
+) -> Dict[str, "np.ndarray"]:
+    """Every indicator at every tick of a history, matching IndicatorEngine
+
+    Values an engine would report as None are NaN here.
+    """
+    import numpy as np
+    t = np.asarray(timestamps, dtype=np.float64)
+    p = np.asarray(prices, dtype=np.float64)
+    v = np.zeros_like(p) if volumes is None else np.asarray(volumes, dtype=np.float64)
+    n = len(p)
+    result = {name: np.full(n, np.nan) for name in INDICATOR_NAMES}
+    if n == 0:
+        return result
+
+    index = np.arange(n)
+    result["sma_fast"] = _rolling_sum(p, config.sma_fast) / config.sma_fast
+    result["sma_slow"] = _rolling_sum(p, config.sma_slow) / config.sma_slow
+    for name, period in (("ema_fast", config.ema_fast), ("ema_slow", config.ema_slow)):
+        ema = _ewm(p, 2.0 / (period + 1), p[0])
+        result[name] = np.where(index >= period - 1, ema, np.nan)
+
+    if n > 1:
+        deltas = np.diff(p)
+        gains, losses = np.maximum(deltas, 0.0), np.maximum(-deltas, 0.0)
+        avg_gain = _ewm(gains, 1.0 / config.rsi_period, gains[0])
+        avg_loss = _ewm(losses, 1.0 / config.rsi_period, losses[0])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0),
+                           100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+        result["rsi"][1:] = np.where(index[1:] >= config.rsi_period, rsi, np.nan)
+
+        window = config.volatility_window
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log_returns = np.log(p[1:] / p[:-1])
+        squared = np.concatenate(([0.0], np.nan_to_num(log_returns * log_returns)))
+        if n > window:
+            sum_sq = _rolling_sum(squared, window)[window:]
+            span = t[window:] - t[:-window]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                vol = np.sqrt(np.maximum(sum_sq, 0.0) * SECONDS_PER_YEAR / span) * 100
+            result["volatility"][window:] = np.where(span > 0, vol, np.nan)
+
+    pv_sum = _rolling_sum(p * v, config.vwap_window, partial=True)
+    v_sum = _rolling_sum(v, config.vwap_window, partial=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result["vwap"] = np.where(v_sum > 0, pv_sum / v_sum, np.nan)
+
+    window = config.drawdown_window
+    padded = np.concatenate((np.full(window - 1, -np.inf), p))
+    peaks = np.lib.stride_tricks.sliding_window_view(padded, window).max(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result["drawdown"] = np.where(peaks > 0, (p / peaks - 1) * 100, np.nan)
+    return result
+
+
+# === SIGNALS FOR THE ANALYSIS TEXT ===
+
+RSI_OVERBOUGHT = 70.0
+RSI_OVERSOLD = 30.0
+# Fast/slow EMA gap (fraction of price) below which the trend is "neutral"
+TREND_THRESHOLD = 0.001
+# Annualized realized volatility (%) bands
+VOLATILITY_HIGH = 80.0
+VOLATILITY_MODERATE = 40.0
+
+
+@dataclass(frozen=True)
+class MarketSignals:
+    """Trend / momentum / volatility read from indicators (or the 24h change before warm-up)"""
+    trend: str       # "bullish", "bearish" or "neutral"
+    momentum: str    # "overbought", "oversold" or "neutral"
+    volatility: str  # "high", "moderate" or "low"
+    from_indicators: bool
+
+
+def market_signals(eth_data: Mapping) -> MarketSignals:
+    """Classify the market from eth_data["indicators"], falling back to the 24h change"""
+    values = eth_data.get("indicators") or {}
+    change_24h = eth_data.get("change_24h", 0) or 0
+    ema_fast, ema_slow = values.get("ema_fast"), values.get("ema_slow")
+    rsi, volatility = values.get("rsi"), values.get("volatility")
+
+    if ema_fast is not None and ema_slow:
+        gap = ema_fast / ema_slow - 1
+        trend = "bullish" if gap > TREND_THRESHOLD else "bearish" if gap < -TREND_THRESHOLD else "neutral"
+    else:
+        trend = "bullish" if change_24h > 1 else "bearish" if change_24h < -1 else "neutral"
+
+    if rsi is not None:
+        momentum = "overbought" if rsi >= RSI_OVERBOUGHT else "oversold" if rsi <= RSI_OVERSOLD else "neutral"
+    else:
+        momentum = "neutral"
+
+    if volatility is not None:
+        level = "high" if volatility > VOLATILITY_HIGH else "moderate" if volatility > VOLATILITY_MODERATE else "low"
+    else:
+        level = "high" if abs(change_24h) > 3 else "moderate" if abs(change_24h) > 1 else "low"
+
+    return MarketSignals(trend, momentum, level, from_indicators=ema_fast is not None and rsi is not None)
+
+
+def indicator_summary(eth_data: Mapping) -> str:
+    """One-line indicator readout for the analysis text ("" until warmed up)"""
+    values = eth_data.get("indicators") or {}
+    parts = []
+    if values.get("rsi") is not None:
+        parts.append(f"RSI {values['rsi']:.1f}")
+    if values.get("ema_fast") is not None and values.get("ema_slow") is not None:
+        arrow = "▲" if values["ema_fast"] >= values["ema_slow"] else "▼"
+        parts.append(f"EMA fast/slow {arrow}")
+    if values.get("vwap") is not None:
+        parts.append(f"VWAP ${values['vwap']:,.2f}")
+    if values.get("volatility") is not None:
+        parts.append(f"Volatility {values['volatility']:.0f}% ann.")
+    if values.get("drawdown") is not None:
+        parts.append(f"Drawdown {values['drawdown']:.2f}%")
+    return f"📐 **Indicators**: {' | '.join(parts)}\n" if parts else ""
+
+
+__all__ = [
+    "IndicatorConfig",
+    "IndicatorEngine",
+    "MarketSignals",
+    "compute_indicators",
+    "indicator_engine",
+    "indicator_summary",
+    "market_signals",
+]
@@ -0,0 +1,200 @@
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+# 🧠 INTENT / ENTITY EXTRACTION
+# One compiled tokenizer plus dict lookups, shared by every response
+# generator. The text is scanned once; each word is matched on word
+# boundaries (so "busy" is not "buy") and looked up in O(1), which keeps the
+# cost flat as the token-symbol table grows to thousands of entries.
+
+# Action -> trigger words, listed in priority order: when a query contains
+# several actions the first one here wins. The order is the one the chat
+# protocols checked in (price first); generators with their own order use
+# Intent.first_of(). The words are the keywords the response generators
+# matched before, plus the inflections their substring checks also caught
+# ("prices", "buying", "crosschain").
+ACTION_WORDS: Dict[str, Tuple[str, ...]] = {
+    "price": ("price", "prices", "cost", "value"),
+    "buy": ("buy", "buying", "purchase", "long"),
+    "sell": ("sell", "selling", "exit", "short"),
+    "swap": ("swap", "swapping", "exchange", "trade"),
+    "forecast": ("forecast", "prediction", "future"),
+    "analysis": ("analysis", "market"),
+    "cross_chain": ("crosschain",),
+}
+ACTION_PRIORITY = tuple(ACTION_WORDS)
+
+# Two-word phrases that map to an action ("cross chain", "cross-chain")
+ACTION_PHRASES: Dict[Tuple[str, str], str] = {
+    ("cross", "chain"): "cross_chain",
+}
+
+CHAIN_WORDS: Dict[str, str] = {
+    "ethereum": "ethereum",
+    "mainnet": "ethereum",
+    "arbitrum": "arbitrum",
+    "polygon": "polygon",
+    "optimism": "optimism",
+    "base": "base",
+}
+
+# Symbol/alias -> canonical symbol. More can be added with add_tokens().
+DEFAULT_TOKENS: Dict[str, str] = {
+    "eth": "ETH", "ether": "ETH", "weth": "WETH",
+    "usdc": "USDC", "usdt": "USDT", "dai": "DAI",
+    "wbtc": "WBTC", "btc": "BTC", "bitcoin": "BTC",
+    "arb": "ARB", "op": "OP", "matic": "MATIC",
+    "uni": "UNI", "link": "LINK", "aave": "AAVE",
+}
+
+# Words that carry no intent of their own. A query made only of these plus
+# recognised actions, tokens and chains is unambiguous enough to answer
+# without a remote parse (see Intent.confident).
+FILLER_WORDS = frozenset((
+    "a", "an", "the", "i", "me", "my", "we", "you", "it", "is", "are", "am",
+    "be", "do", "does", "should", "would", "can", "could", "will", "what",
+    "whats", "s", "how", "much", "now", "today", "current", "currently",
+    "right", "please", "to", "for", "from", "into", "of", "on", "in", "at",
+    "with", "some", "any", "give", "show", "tell", "check", "get", "think",
+    "and", "or",
+))
+
+_AMOUNT_SUFFIXES = {"k": 1e3, "m": 1e6, "b": 1e9}
+
+# A single pass yields numbers (with optional $ and k/m/b suffix) and words
+_TOKEN_RE = re.compile(
+    r"(?P<num>\$?\d+(?:,\d{3})*(?:\.\d+)?[kmb]?)(?![a-z0-9])|(?P<word>[a-z][a-z0-9]*)"
+)
+
+
+@dataclass(frozen=True)
+class Intent:
+    """Action and entities extracted from a user query"""
+    action: str = "general"
+    actions: Tuple[str, ...] = ()
+    tokens: Tuple[str, ...] = ()
+    chains: Tuple[str, ...] = ()
+    amounts: Tuple[Tuple[float, Optional[str]], ...] = ()
+    unknown_words: int = 0
+
+    def has_token(self, symbol: str) -> bool:
+        return symbol in self.tokens
+
+    def has_action(self, action: str) -> bool:
+        return action in self.actions
+
+    def first_of(self, order: Iterable[str]) -> str:
+        """The first action in order that the query mentions, "general" if none"""
+        return next((action for action in order if action in self.actions), "general")
+
+    @property
+    def confident(self) -> bool:
+        """Exactly one action and no words outside the known vocabulary"""
+        return len(self.actions) == 1 and self.unknown_words == 0
+
+
+class IntentClassifier:
+    """Word-boundary aware, single-pass intent and entity extractor"""
+
+    def __init__(self, tokens: Optional[Dict[str, str]] = None):
+        self._actions: Dict[str, str] = {
+            word: action for action, words in ACTION_WORDS.items() for word in words
+        }
+        self._chains: Dict[str, str] = dict(CHAIN_WORDS)
+        self._tokens: Dict[str, str] = dict(DEFAULT_TOKENS if tokens is None else tokens)
+
+    def add_tokens(self, symbols: Iterable[str], aliases: Optional[Dict[str, str]] = None):
+        """Register more token symbols (and optional alias -> symbol mappings)"""
+        for symbol in symbols:
+            if symbol:
+                self._tokens[symbol.lower()] = symbol.upper()
+        for alias, symbol in (aliases or {}).items():
+            self._tokens[alias.lower()] = symbol.upper()
+
+    def token_symbol(self, word: str) -> Optional[str]:
+        """Canonical symbol for a token word or alias, None if unknown"""
+        return self._tokens.get(word.lower())
+
+    @property
+    def token_count(self) -> int:
+        return len(self._tokens)
+
+    def classify(self, text: str) -> Intent:
+        """Extract action, tokens, chains and amounts from text in one pass"""
+        actions = {}
+        tokens = {}
+        chains = {}
+        amounts = []
+        pending_amount: Optional[float] = None
+        previous_word: Optional[str] = None
+        previous_unknown = False
+        unknown_words = 0
+
+        for match in _TOKEN_RE.finditer(text.lower()):
+            number = match.group("num")
+            if number is not None:
+                if pending_amount is not None:
+                    amounts.append((pending_amount, None))
+                pending_amount = _parse_amount(number)
+                previous_word = None
+                continue
+
+            word = match.group("word")
+            action = self._actions.get(word)
+            if action is None and previous_word is not None:
+                action = ACTION_PHRASES.get((previous_word, word))
+                if action is not None and previous_unknown:
+                    unknown_words -= 1  # first word of a known phrase
+            if action is not None:
+                actions[action] = True
+
+            chain = self._chains.get(word)
+            if chain is not None:
+                chains[chain] = True
+
+            symbol = self._tokens.get(word)
+            if symbol is not None:
+                tokens[symbol] = True
+                if pending_amount is not None:
+                    amounts.append((pending_amount, symbol))
+                    pending_amount = None
+
+            previous_unknown = (
+                action is None and chain is None and symbol is None and word not in FILLER_WORDS
+            )
+            if previous_unknown:
+                unknown_words += 1
+            previous_word = word
+
+        if pending_amount is not None:
+            amounts.append((pending_amount, None))
+
+        ordered_actions = tuple(action for action in ACTION_PRIORITY if action in actions)
+        return Intent(
+            action=ordered_actions[0] if ordered_actions else "general",
+            actions=ordered_actions,
+            tokens=tuple(tokens),
+            chains=tuple(chains),
+            amounts=tuple(amounts),
+            unknown_words=unknown_words,
+        )
+
+
+def _parse_amount(text: str) -> float:
+    text = text.lstrip("$").replace(",", "")
+    multiplier = _AMOUNT_SUFFIXES.get(text[-1], 1)
+    if multiplier != 1:
+        text = text[:-1]
+    return float(text) * multiplier
+
+
+intent_classifier = IntentClassifier()
+
+
+def classify(text: str) -> Intent:
+    """Classify text with the shared classifier"""
+    return intent_classifier.classify(text)
+
+
+__all__ = ["Intent", "IntentClassifier", "intent_classifier", "classify"]
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from http_client import get_session
+from metrics import cache_requests_total, upstream_errors_total, upstream_timer
+from resilience import UpstreamError, upstream, upstream_failures
+from typed_json import read_json
+
+logger = logging.getLogger(__name__)
+
+# 💾 SHARED MARKET-DATA CACHE
+# Every chat message used to trigger its own CoinGecko request. Entries here
+# live for MARKET_CACHE_TTL seconds, and concurrent misses on the same key
+# are coalesced so that N waiting handlers cause exactly one upstream call.
+
+MARKET_CACHE_TTL = float(os.getenv("MARKET_CACHE_TTL", "30"))
+
+COINGECKO_API_BASE = os.getenv("COINGECKO_API_BASE", "https://api.coingecko.com/api/v3")
+COINGECKO_SIMPLE_PRICE_URL = f"{COINGECKO_API_BASE}/simple/price"
+
+
+class TTLCache:
+    """Async TTL cache with single-flight loading per key"""
+
+    def __init__(self, ttl: float = MARKET_CACHE_TTL, name: str = "market"):
+        self.ttl = ttl
+        self.name = name
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Return a fresh cached value without triggering a fetch"""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value for key with the configured TTL"""
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, key: Hashable):
+        """Drop a cached value so the next read goes upstream"""
+        self._entries.pop(key, None)
+
+    async def get_or_fetch(self, key: Hashable, fetcher: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for key, or load it once for all concurrent callers"""
+        value = self.peek(key)
+        if value is not None:
+            self.hits += 1
+            cache_requests_total.inc(cache=self.name, result="hit")
+            return value
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            cache_requests_total.inc(cache=self.name, result="miss")
+            task = asyncio.ensure_future(self._load(key, fetcher))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+            cache_requests_total.inc(cache=self.name, result="coalesced")
+
+        # Shield so a cancelled caller does not cancel the load for the others
+        return await asyncio.shield(task)
+
+    async def _load(self, key: Hashable, fetcher: Callable[[], Awaitable[Any]]) -> Any:
+        value = await fetcher()
+        # Failed lookups (None) are not cached so the next caller retries
+        if value is not None:
+            self.set(key, value)
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        """Cache counters for logging and metrics"""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
+
+
+market_cache = TTLCache()
+
+
+async def _fetch_simple_price(asset: str, quote: str, fields: Tuple[str, ...]) -> Optional[Dict]:
+    """Fetch one asset from CoinGecko's simple/price endpoint"""
+    params = {"ids": asset, "vs_currencies": quote}
+    for field in fields:
+        params[f"include_{field}"] = "true"
+
+    async def request() -> Dict:
+        session = await get_session()
+        try:
+            with upstream_timer("coingecko_simple_price"):
+                async with session.get(COINGECKO_SIMPLE_PRICE_URL, params=params) as response:
+                    if response.status != 200:
+                        raise UpstreamError(f"CoinGecko API error: {response.status}")
+                    return await read_json(response)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            upstream_errors_total.inc(endpoint="coingecko_simple_price")
+            raise
+
+    try:
+        data = await upstream("coingecko").call(request)
+    except upstream_failures() as e:
+        logger.error(str(e) or repr(e))
+        return None
+    return data.get(asset) or None
+
+
+async def get_simple_price(
+    asset: str = "ethereum",
+    quote: str = "usd",
+    fields: Tuple[str, ...] = (),
+) -> Optional[Dict]:
+    """Get CoinGecko price data for asset through the shared cache
+
+    fields selects the optional CoinGecko extras, e.g. ("24hr_change", "24hr_vol",
+    "market_cap"). Returns the raw per-asset dict (keys like "usd",
+    "usd_24h_change") or None if the upstream call failed.
+    """
+    fields = tuple(sorted(fields))
+    key = (asset, quote, fields)
+    return await market_cache.get_or_fetch(
+        key, lambda: _fetch_simple_price(asset, quote, fields)
+    )
+
+
+__all__ = ["TTLCache", "market_cache", "get_simple_price"]
@@ -0,0 +1,251 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional
+
+from metrics import cache_requests_total, fallback_price_total
+
+logger = logging.getLogger(__name__)
+
+# 📸 MARKET SNAPSHOT SERVICE
+# A background refresher collects prices and pool stats and publishes them
+# as one immutable, versioned snapshot. Handlers read the current snapshot
+# reference (a single attribute load, no locks) and never touch the network.
+
+SNAPSHOT_REFRESH_INTERVAL = float(os.getenv("SNAPSHOT_REFRESH_INTERVAL", "60"))
+SNAPSHOT_MAX_AGE = float(os.getenv("SNAPSHOT_MAX_AGE", "300"))
+# Prices older than this are reported to users as cached rather than live
+PRICE_STALE_AFTER = float(os.getenv("PRICE_STALE_AFTER", str(2 * SNAPSHOT_REFRESH_INTERVAL)))
+
+# Used until the first snapshot has been published
+FALLBACK_ETH_PRICE = 2500.0
+FALLBACK_ETH_DATA = {
+    "price": FALLBACK_ETH_PRICE, "change_24h": 0, "volume_24h": 0, "market_cap": 0,
+    "data_source": "fallback", "fetched_at": None,
+}
+
+
+def _frozen(mapping: Optional[Mapping]) -> Mapping:
+    return MappingProxyType(dict(mapping or {}))
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    """Immutable view of the market at one refresh"""
+    version: int
+    prices: Mapping[str, float] = field(default_factory=dict)
+    change_24h: Mapping[str, float] = field(default_factory=dict)
+    volume_24h: Mapping[str, float] = field(default_factory=dict)
+    market_cap: Mapping[str, float] = field(default_factory=dict)
+    pools: Mapping[str, Mapping[str, Any]] = field(default_factory=dict)
+    fetched_at: Mapping[str, float] = field(default_factory=dict)
+    indicators: Mapping[str, Mapping[str, Optional[float]]] = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
+
+    def age(self) -> float:
+        """Seconds since this snapshot was published"""
+        return max(0.0, time.time() - self.created_at)
+
+    def is_stale(self, max_age: float = SNAPSHOT_MAX_AGE) -> bool:
+        return self.age() > max_age
+
+    def asset_data(self, symbol: str = "ETH") -> Dict[str, float]:
+        """Price, 24h change, volume, market cap and indicator values for one asset
+
+        data_source says where the price comes from: "live", "cached" (the
+        last successful fetch is older than PRICE_STALE_AFTER) or "fallback"
+        (no price has been fetched yet).
+        """
+        price = self.prices.get(symbol)
+        fetched_at = self.fetched_at.get("coingecko")
+        if price is None:
+            data_source = "fallback"
+        elif fetched_at is None or time.time() - fetched_at > PRICE_STALE_AFTER:
+            data_source = "cached"
+        else:
+            data_source = "live"
+        return {
+            "price": price if price is not None else (FALLBACK_ETH_PRICE if symbol == "ETH" else 0),
+            "change_24h": self.change_24h.get(symbol, 0),
+            "volume_24h": self.volume_24h.get(symbol, 0),
+            "market_cap": self.market_cap.get(symbol, 0),
+            "indicators": dict(self.indicators.get(symbol, {})),
+            "data_source": data_source,
+            "fetched_at": fetched_at,
+        }
+
+
+class MarketSnapshotStore:
+    """Holds the current snapshot and swaps in new ones atomically"""
+
+    def __init__(self, max_age: float = SNAPSHOT_MAX_AGE):
+        self.max_age = max_age
+        self._current: Optional[MarketSnapshot] = None
+        self._version = 0
+        self._collector: Optional[Callable[[], Awaitable[Optional[Dict[str, Any]]]]] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def current(self) -> Optional[MarketSnapshot]:
+        """The latest published snapshot (None before the first refresh)"""
+        return self._current
+
+    def age(self) -> Optional[float]:
+        """Age of the current snapshot in seconds, or None if nothing is published"""
+        snapshot = self._current
+        return snapshot.age() if snapshot is not None else None
+
+    def publish(self, **data) -> MarketSnapshot:
+        """Build a new snapshot from data and make it the current one
+
+        created_at defaults to now; a snapshot relayed from another process
+        passes the time its data was collected.
+        """
+        self._version += 1
+        snapshot = MarketSnapshot(
+            version=self._version,
+            prices=_frozen(data.get("prices")),
+            change_24h=_frozen(data.get("change_24h")),
+            volume_24h=_frozen(data.get("volume_24h")),
+            market_cap=_frozen(data.get("market_cap")),
+            pools=MappingProxyType({k: _frozen(v) for k, v in (data.get("pools") or {}).items()}),
+            fetched_at=_frozen(data.get("fetched_at")),
+            indicators=MappingProxyType({k: _frozen(v) for k, v in (data.get("indicators") or {}).items()}),
+            created_at=data.get("created_at") or time.time(),
+        )
+        # Single reference assignment: readers see either the old or the new snapshot
+        self._current = snapshot
+        return snapshot
+
+    def set_collector(self, collector: Callable[[], Awaitable[Optional[Dict[str, Any]]]]):
+        """Register the coroutine that gathers data for a new snapshot
+
+        The collector may return None to keep the current snapshot.
+        """
+        self._collector = collector
+
+    async def refresh(self) -> Optional[MarketSnapshot]:
+        """Collect fresh data and publish it; concurrent calls share one refresh"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._refresh())
+        return await asyncio.shield(self._refresh_task)
+
+    async def _refresh(self) -> Optional[MarketSnapshot]:
+        if self._collector is None:
+            return self._current
+        data = await self._collector()
+        if data is None:
+            return self._current
+        return self.publish(**data)
+
+    def request_refresh(self):
+        """Schedule a background refresh without waiting for it"""
+        if self._collector is None:
+            return
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._refresh())
+            self._refresh_task.add_done_callback(_log_refresh_error)
+
+    def read(self) -> Optional[MarketSnapshot]:
+        """Current snapshot for a request handler; kicks off a refresh if it is stale"""
+        snapshot = self._current
+        if snapshot is None or snapshot.is_stale(self.max_age):
+            self.request_refresh()
+        return snapshot
+
+
+class SnapshotRenderCache:
+    """Lookup table of texts rendered once per published snapshot
+
+    render(key, eth_data) is called at most once per key for each snapshot
+    version; later reads for the same version are a dict lookup.
+    """
+
+    def __init__(self, render: Callable[[str, Dict[str, float]], str], store: "MarketSnapshotStore" = None):
+        self._render = render
+        self._store = store
+        self._version: Optional[int] = None
+        self._texts: Dict[str, str] = {}
+
+    def get(self, key: str) -> str:
+        snapshot = (self._store or market_snapshots).read()
+        version = snapshot.version if snapshot is not None else 0
+        if version != self._version:
+            self._texts = {}
+            self._version = version
+        text = self._texts.get(key)
+        if text is not None:
+            cache_requests_total.inc(cache="render", result="hit")
+        else:
+            cache_requests_total.inc(cache="render", result="miss")
+            if snapshot is not None:
+                eth_data = snapshot.asset_data("ETH")
+            else:
+                fallback_price_total.inc(source="render")
+                eth_data = dict(FALLBACK_ETH_DATA)
+            text = self._texts[key] = self._render(key, eth_data)
+        return text
+
+
+def _log_refresh_error(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Market snapshot refresh failed: {task.exception()}")
+
+
+market_snapshots = MarketSnapshotStore()
+
+
+def current_eth_data() -> Dict[str, float]:
+    """ETH price data from the current snapshot, with fallbacks before the first refresh"""
+    snapshot = market_snapshots.read()
+    if snapshot is None:
+        fallback_price_total.inc(source="snapshot")
+        return dict(FALLBACK_ETH_DATA, snapshot_age=None)
+    eth_data = snapshot.asset_data("ETH")
+    eth_data["snapshot_age"] = round(snapshot.age(), 1)
+    return eth_data
+
+
+def last_known_price(symbol: str = "ETH") -> Optional[float]:
+    """Price from the latest snapshot that had one, or None if none was ever fetched"""
+    snapshot = market_snapshots.current()
+    if snapshot is None:
+        return None
+    return snapshot.prices.get(symbol)
+
+
+def format_price(eth_data: Dict[str, float]) -> str:
+    """"$1,234.56 USD", or "unavailable" rather than a placeholder number"""
+    if eth_data.get("data_source") == "fallback":
+        return "unavailable"
+    return f"${eth_data['price']:,.2f} USD"
+
+
+def data_notice(eth_data: Dict[str, float]) -> str:
+    """One line telling the user the figures are not live (empty when they are)"""
+    source = eth_data.get("data_source", "live")
+    if source == "cached":
+        fetched_at = eth_data.get("fetched_at")
+        when = (
+            datetime.fromtimestamp(fetched_at, timezone.utc).strftime("%H:%M UTC")
+            if fetched_at else "an earlier update"
+        )
+        return f"🕒 **Cached data**: live prices are unavailable, figures are from {when}\n"
+    if source == "fallback":
+        return "⚠️ **No market data yet**: live prices are unavailable, so price-based signals are not reliable\n"
+    return ""
+
+
+__all__ = [
+    "MarketSnapshot",
+    "MarketSnapshotStore",
+    "SnapshotRenderCache",
+    "market_snapshots",
+    "current_eth_data",
+    "last_known_price",
+    "format_price",
+    "data_notice",
+]
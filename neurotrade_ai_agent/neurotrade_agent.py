@@ -1,19 +1,64 @@
+import time
+
+_import_started = time.perf_counter()
+
+import argparse
 import asyncio
-import aiohttp
 import json
 import os
 import logging
 import signal
 import sys
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Union
 from datetime import datetime
 from dotenv import load_dotenv
 
-from uagents import Agent, Context, Model
-from uagents.setup import fund_agent_if_low
+# uagents itself (~1s to import) is only loaded by build_agent(); the message
+# models only need the Model base class from uagents-core
+from uagents_core.models import Model
+
+from startup_profile import format_startup_profile, record_phase, recorded_seconds, startup_phase
+
+if TYPE_CHECKING:
+    from uagents import Agent, Context
 
-# Load environment variables
-load_dotenv()
+# Load environment variables (before the local modules below read their settings)
+with startup_phase("load .env"):
+    load_dotenv()
+
+from admission import admission_controlled, busy_text
+from graph_cache import graph_cache
+from http_client import get_session, open_session, close_session
+from indicators import indicator_engine
+from intent import classify
+from market_cache import get_simple_price
+from market_snapshot import SNAPSHOT_REFRESH_INTERVAL, current_eth_data, last_known_price, market_snapshots
+from metrics import (
+    fallback_price_total,
+    handler_stage,
+    messages_total,
+    registry,
+    start_metrics_server,
+    stop_metrics_server,
+    upstream_errors_total,
+    upstream_timer,
+)
+from pool_math import analyze_arrays, records_to_arrays
+from pool_scanner import by_tvl, by_volume, deepest_pools, scan
+from resilience import UpstreamError, upstream, upstream_failures
+from swap_router import (
+    ROUTER_CHAINS,
+    ROUTER_SYNC_INTERVAL,
+    describe_swap,
+    load_pool_graphs,
+    pool_graph,
+    start_pool_graph_reload,
+    start_pool_graph_sync,
+    stop_pool_graph_sync,
+)
+from token_index import TOKEN_INDEX_REFRESH_INTERVAL, token_index
+from typed_json import PoolRecord, TokenRecord, decode_graph_list, decode_graph_one, record_builder, record_to_dict
+from price_history import PRICE_HISTORY_ENABLED, price_history
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -23,43 +68,36 @@ logger = logging.getLogger(__name__)
 AGENT_SEED = os.getenv("AGENT_SEED", "neurotrade_ai_agent_seed_2024")
 AGENT_PORT = int(os.getenv("AGENT_PORT", "8001"))
 USE_AGENTVERSE = os.getenv("USE_AGENTVERSE", "true").lower() == "true"
+FUND_AGENT = os.getenv("FUND_AGENT", "true").lower() == "true"
 
 # The Graph endpoints for different chains
+GRAPH_API_BASE = os.getenv("GRAPH_API_BASE", "https://api.thegraph.com/subgraphs/name")
 GRAPH_ENDPOINTS = {
-    "ethereum": "https://api.thegraph.com/subgraphs/name/uniswap/uniswap-v3",
-    "arbitrum": "https://api.thegraph.com/subgraphs/name/ianlapham/arbitrum-minimal",
-    "polygon": "https://api.thegraph.com/subgraphs/name/ianlapham/uniswap-v3-polygon",
-    "optimism": "https://api.thegraph.com/subgraphs/name/ianlapham/optimism-post-regenesis"
+    "ethereum": f"{GRAPH_API_BASE}/uniswap/uniswap-v3",
+    "arbitrum": f"{GRAPH_API_BASE}/ianlapham/arbitrum-minimal",
+    "polygon": f"{GRAPH_API_BASE}/ianlapham/uniswap-v3-polygon",
+    "optimism": f"{GRAPH_API_BASE}/ianlapham/optimism-post-regenesis"
 }
 
-# Create the NeuroTrade AI Agent with proper mailbox configuration
-if True:
-    # Use Agentverse mailbox for hosted agent
-    neurotrade_agent = Agent(
-        name="NeuroTrade",
-        seed=AGENT_SEED,
-        mailbox=True,
-        port=AGENT_PORT,
-        endpoint="https://agentverse.ai/v1/submit"
-    )
-    print("🌐 Agent configured with Agentverse mailbox")
-else:
-    # Fallback to local agent with mailbox enabled
-    neurotrade_agent = Agent(
-        name="NeuroTrade",
-        seed=AGENT_SEED,
-        mailbox=True,
-        port=AGENT_PORT,
-        endpoint=f"http://localhost:{AGENT_PORT}/submit",
-    )
-    print("⚠️ Agent configured locally - add AGENT_MAILBOX_KEY for Agentverse hosting")
+# Batched Graph lookups: ids per `id_in` query and queries in flight per batch
+GRAPH_BATCH_SIZE = int(os.getenv("GRAPH_BATCH_SIZE", "100"))
+GRAPH_BATCH_CONCURRENCY = int(os.getenv("GRAPH_BATCH_CONCURRENCY", "4"))
+
+# Per-chain deadline (seconds) for cross-chain fan-out queries
+GRAPH_CHAIN_TIMEOUT = float(os.getenv("GRAPH_CHAIN_TIMEOUT", "5"))
 
-# Fund the agent if needed (with error handling)
-try:
-    fund_agent_if_low(neurotrade_agent.wallet.address())
-except Exception as e:
-    print(f"⚠️ Warning: Could not fund agent: {e}")
-    print("💡 Agent will continue without funding")
+# Pools tracked in the market snapshot, as comma-separated "chain:address"
+WATCHED_POOLS = [
+    tuple(entry.strip().split(":", 1))
+    for entry in os.getenv(
+        "WATCHED_POOLS",
+        "ethereum:0x88e6a0c2ddd26feeb64f039a2c41296fcb3f5640"  # USDC/WETH 0.05%
+    ).split(",")
+    if ":" in entry
+]
+
+# Order generate_trading_recommendation checks actions in (trades before price)
+RECOMMENDATION_ORDER = ("buy", "sell", "swap", "price", "cross_chain")
 
 # Trading protocol for handling user queries (removed - using direct agent handlers)
 # trading_protocol = Protocol("NeuroTrade Trading Protocol")
@@ -74,102 +112,268 @@ class TradingData:
     async def fetch_token_price(self, token_address: str, chain: str = "ethereum") -> Optional[float]:
         """Fetch token price from The Graph"""
         try:
+            # Token entity served from the persistent cache; the USD conversion
+            # always uses the current ETH price
+            token = await graph_cache.get_or_fetch(
+                chain, "token", token_address.lower(), lambda: self._fetch_token(token_address, chain), TokenRecord
+            )
+            if token is not None:
+                # Convert derivedETH to USD (assuming ETH price)
+                eth_price = await self.get_eth_price()
+                if eth_price and token.derived_eth:
+                    return token.derived_eth * eth_price
+            return None
+        except Exception as e:
+            logger.error(f"Error fetching token price: {e}")
+            return None
+
+    async def _fetch_token(self, token_address: str, chain: str) -> Optional[TokenRecord]:
+        """Query one token entity from The Graph"""
+        query = f"""
+        {{
+            token(id: "{token_address.lower()}") {{
+                id
+                symbol
+                name
+                derivedETH
+                totalSupply
+                volume
+                volumeUSD
+                feesUSD
+                txCount
+            }}
+        }}
+        """
+        raw = await self._graph_request(chain, query, "graph_token")
+        return decode_graph_one(raw, "token", TokenRecord) if raw is not None else None
+
+    async def fetch_token_prices(
+        self,
+        token_addresses: List[str],
+        chain: str = "ethereum",
+        chunk_size: int = GRAPH_BATCH_SIZE,
+        concurrency: int = GRAPH_BATCH_CONCURRENCY,
+    ) -> Dict[str, Optional[float]]:
+        """Fetch USD prices for many tokens on one chain from The Graph
+
+        Addresses are sent in chunks of chunk_size through `id_in` queries, at
+        most concurrency chunks at a time, and the ETH/USD conversion is done
+        once for the whole batch. Returns a dict keyed by lower-cased address;
+        tokens the subgraph does not know map to None.
+        """
+        addresses = list(dict.fromkeys(address.lower() for address in token_addresses))
+        prices: Dict[str, Optional[float]] = {address: None for address in addresses}
+        if not addresses:
+            return prices
+
+        eth_price = await self.get_eth_price()
+        if not eth_price:
+            return prices
+
+        chunk_size = max(1, min(chunk_size, 1000))
+        chunks = [addresses[i:i + chunk_size] for i in range(0, len(addresses), chunk_size)]
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def fetch_chunk(chunk: List[str]) -> List[TokenRecord]:
+            ids = ", ".join(f'"{address}"' for address in chunk)
             query = f"""
             {{
-                token(id: "{token_address.lower()}") {{
+                tokens(first: {len(chunk)}, where: {{id_in: [{ids}]}}) {{
                     id
-                    symbol
-                    name
                     derivedETH
-                    totalSupply
-                    volume
-                    volumeUSD
-                    feesUSD
-                    txCount
                 }}
             }}
             """
-            
-            endpoint = GRAPH_ENDPOINTS.get(chain, GRAPH_ENDPOINTS["ethereum"])
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    endpoint,
-                    json={"query": query},
-                    headers={"Content-Type": "application/json"}
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        if "data" in data and data["data"]["token"]:
-                            token_data = data["data"]["token"]
-                            # Convert derivedETH to USD (assuming ETH price)
-                            eth_price = await self.get_eth_price()
-                            if eth_price and token_data["derivedETH"]:
-                                return float(token_data["derivedETH"]) * eth_price
-                        return None
-                    else:
-                        logger.error(f"Graph API error: {response.status}")
-                        return None
-        except Exception as e:
-            logger.error(f"Error fetching token price: {e}")
+            async with semaphore:
+                raw = await self._graph_request(chain, query, "graph_tokens")
+            # Typed decode: derivedETH arrives as a float, no per-token dict or float() pass
+            return decode_graph_list(raw, "tokens", TokenRecord) if raw is not None else []
+
+        results = await asyncio.gather(
+            *(fetch_chunk(chunk) for chunk in chunks), return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Error fetching token price batch: {result}")
+                continue
+            for token in result:
+                if token.derived_eth:
+                    prices[token.id] = token.derived_eth * eth_price
+
+        return prices
+
+    async def _graph_request(self, chain: str, query: str, label: str = "graph") -> Optional[bytes]:
+        """POST a GraphQL query to the chain's subgraph and return the raw response body"""
+        endpoint = GRAPH_ENDPOINTS.get(chain, GRAPH_ENDPOINTS["ethereum"])
+
+        async def request() -> bytes:
+            session = await get_session()
+            try:
+                with upstream_timer(label, chain):
+                    async with session.post(
+                        endpoint,
+                        json={"query": query},
+                        headers={"Content-Type": "application/json"}
+                    ) as response:
+                        if response.status != 200:
+                            raise UpstreamError(f"Graph API error: {response.status}")
+                        return await response.read()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                upstream_errors_total.inc(endpoint=label, chain=chain)
+                raise
+
+        # One breaker per subgraph: all query types share its health
+        breaker_chain = chain if chain in GRAPH_ENDPOINTS else "ethereum"
+        try:
+            return await upstream(f"graph:{breaker_chain}").call(request)
+        except upstream_failures() as e:
+            logger.error(str(e) or repr(e))
             return None
 
+    def scan_pools(self, chain: str = "ethereum", where: Optional[Dict[str, str]] = None) -> AsyncIterator[PoolRecord]:
+        """Stream every pool on a chain page by page (bounded memory, see pool_scanner)"""
+        return scan(self._graph_request, chain, "pools", where)
+
+    def scan_tokens(self, chain: str = "ethereum", where: Optional[Dict[str, str]] = None) -> AsyncIterator[TokenRecord]:
+        """Stream every token on a chain page by page"""
+        return scan(self._graph_request, chain, "tokens", where)
+
+    async def deepest_pools(
+        self, chain: str = "ethereum", token: Optional[str] = None, k: int = 10, by: str = "tvl",
+    ) -> List[PoolRecord]:
+        """Top k pools by TVL (or by="volume"), optionally only those holding `token`"""
+        key = by_volume if by == "volume" else by_tvl
+        return await deepest_pools(self._graph_request, chain, token, k, key)
+
     async def get_eth_price(self) -> Optional[float]:
-        """Get ETH price in USD"""
+        """Get ETH price in USD (the last known price if CoinGecko is unavailable)"""
         try:
-            # Using a simple API to get ETH price
-            async with aiohttp.ClientSession() as session:
-                async with session.get("https://api.coingecko.com/api/v3/simple/price?ids=ethereum&vs_currencies=usd") as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data.get("ethereum", {}).get("usd", 0)
-                    return 2500.0  # Fallback price
+            # Served from the shared CoinGecko cache
+            eth_data = await get_simple_price("ethereum", "usd")
+            if eth_data:
+                return eth_data.get("usd", 0)
         except Exception as e:
             logger.error(f"Error fetching ETH price: {e}")
-            return 2500.0  # Fallback price
+        fallback_price_total.inc(source="get_eth_price")
+        price = last_known_price("ETH")
+        if price is None:
+            logger.warning("No ETH price available, live or cached")
+        else:
+            logger.warning(f"Using cached ETH price ${price:,.2f}")
+        return price
 
-    async def get_pool_liquidity(self, pool_address: str, chain: str = "ethereum") -> Optional[Dict]:
+    async def get_pool_liquidity(self, pool_address: str, chain: str = "ethereum") -> Optional[PoolRecord]:
         """Get pool liquidity data from The Graph"""
         try:
-            query = f"""
-            {{
-                pool(id: "{pool_address.lower()}") {{
-                    id
-                    token0 {{
-                        symbol
-                        name
-                    }}
-                    token1 {{
-                        symbol
-                        name
-                    }}
-                    liquidity
-                    sqrtPrice
-                    tick
-                    volumeUSD
-                    txCount
-                    totalValueLockedUSD
-                }}
-            }}
-            """
-            
-            endpoint = GRAPH_ENDPOINTS.get(chain, GRAPH_ENDPOINTS["ethereum"])
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    endpoint,
-                    json={"query": query},
-                    headers={"Content-Type": "application/json"}
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        if "data" in data and data["data"]["pool"]:
-                            return data["data"]["pool"]
-                    return None
+            return await graph_cache.get_or_fetch(
+                chain, "pool", pool_address.lower(), lambda: self._fetch_pool(pool_address, chain), PoolRecord
+            )
         except Exception as e:
             logger.error(f"Error fetching pool liquidity: {e}")
             return None
 
+    async def _fetch_pool(self, pool_address: str, chain: str) -> Optional[PoolRecord]:
+        """Query one pool entity from The Graph"""
+        query = f"""
+        {{
+            pool(id: "{pool_address.lower()}") {{
+                id
+                feeTier
+                token0 {{
+                    id
+                    symbol
+                    name
+                    decimals
+                }}
+                token1 {{
+                    id
+                    symbol
+                    name
+                    decimals
+                }}
+                liquidity
+                sqrtPrice
+                tick
+                volumeUSD
+                txCount
+                totalValueLockedUSD
+            }}
+        }}
+        """
+        raw = await self._graph_request(chain, query, "graph_pool")
+        return decode_graph_one(raw, "pool", PoolRecord) if raw is not None else None
+
+    async def fetch_token_price_multichain(
+        self,
+        token_address: Union[str, Dict[str, str]],
+        chains: Optional[List[str]] = None,
+        timeout: float = GRAPH_CHAIN_TIMEOUT,
+    ) -> Dict[str, float]:
+        """Fetch a token price on several chains concurrently
+
+        token_address is either one address used on every chain or a dict of
+        chain -> address. Chains that time out, fail or do not know the token
+        are left out of the result instead of delaying the others.
+        """
+        addresses = self._addresses_by_chain(token_address, chains)
+        return await self._fan_out(
+            addresses,
+            lambda chain, address: self.fetch_token_price(address, chain),
+            timeout,
+        )
+
+    async def get_pool_liquidity_multichain(
+        self,
+        pool_address: Union[str, Dict[str, str]],
+        chains: Optional[List[str]] = None,
+        timeout: float = GRAPH_CHAIN_TIMEOUT,
+    ) -> Dict[str, PoolRecord]:
+        """Fetch pool liquidity on several chains concurrently
+
+        Same partial-result semantics as fetch_token_price_multichain.
+        """
+        addresses = self._addresses_by_chain(pool_address, chains)
+        return await self._fan_out(
+            addresses,
+            lambda chain, address: self.get_pool_liquidity(address, chain),
+            timeout,
+        )
+
+    def _addresses_by_chain(
+        self, address: Union[str, Dict[str, str]], chains: Optional[List[str]]
+    ) -> Dict[str, str]:
+        """Resolve the chain -> address map for a fan-out query"""
+        if chains is None:
+            chains = list(address) if isinstance(address, dict) else list(GRAPH_ENDPOINTS)
+        if isinstance(address, dict):
+            return {chain: address[chain] for chain in chains if chain in address and chain in GRAPH_ENDPOINTS}
+        return {chain: address for chain in chains if chain in GRAPH_ENDPOINTS}
+
+    async def _fan_out(
+        self,
+        addresses: Dict[str, str],
+        fetch: Callable[[str, str], Awaitable],
+        timeout: float,
+    ) -> Dict:
+        """Run fetch(chain, address) for every chain with a per-chain timeout"""
+        chains = list(addresses)
+        results = await asyncio.gather(
+            *(asyncio.wait_for(fetch(chain, addresses[chain]), timeout) for chain in chains),
+            return_exceptions=True,
+        )
+
+        merged = {}
+        for chain, result in zip(chains, results):
+            if isinstance(result, asyncio.TimeoutError):
+                logger.warning(f"Graph query on {chain} timed out after {timeout}s")
+            elif isinstance(result, Exception):
+                logger.error(f"Graph query on {chain} failed: {result}")
+            elif result is not None:
+                merged[chain] = result
+        return merged
+
     def analyze_market_trend(self, price_data: Dict) -> str:
         """Analyze market trend based on price data"""
         if not price_data:
@@ -187,31 +391,36 @@ class TradingData:
 
     def generate_trading_recommendation(self, query: str, market_data: Dict) -> str:
         """Generate AI trading recommendation based on query and market data"""
-        query_lower = query.lower()
+        intent = classify(query)
+        action = intent.first_of(RECOMMENDATION_ORDER)
         
         # Simple rule-based AI recommendations
-        if "buy" in query_lower or "purchase" in query_lower:
-            if "eth" in query_lower:
+        if action == "buy":
+            if intent.has_token("ETH"):
                 return "🔵 ETH Analysis: Based on current market conditions, ETH shows strong fundamentals. Consider dollar-cost averaging for entry."
-            elif "usdc" in query_lower:
+            elif intent.has_token("USDC"):
                 return "🟢 USDC Analysis: USDC is a stable coin. Good for portfolio stability but no growth potential."
             else:
                 return "📊 General Buy Signal: Analyze market trends and consider risk management before purchasing."
         
-        elif "sell" in query_lower:
+        elif action == "sell":
             return "🔴 Sell Analysis: Review your portfolio performance and consider taking profits if you're in positive territory."
         
-        elif "swap" in query_lower:
-            if "usdc" in query_lower and "eth" in query_lower:
+        elif action == "swap":
+            route = describe_swap(query, intent)
+            if route is not None:
+                return route
+            elif intent.has_token("USDC") and intent.has_token("ETH"):
                 return "🔄 USDC → ETH Swap: Good timing for ETH accumulation. Consider gas fees and slippage."
             else:
                 return "🔄 Swap Analysis: Check liquidity pools and compare rates across DEXs for best execution."
         
-        elif "price" in query_lower:
+        elif action == "price":
             eth_price = market_data.get("eth_price", "N/A")
-            return f"💰 Current ETH Price: ${eth_price} USD. Market showing {'bullish' if isinstance(eth_price, (int, float)) and eth_price > 2000 else 'bearish'} sentiment."
+            cached = " (cached, live prices unavailable)" if market_data.get("data_source") == "cached" else ""
+            return f"💰 Current ETH Price: ${eth_price} USD{cached}. Market showing {'bullish' if isinstance(eth_price, (int, float)) and eth_price > 2000 else 'bearish'} sentiment."
         
-        elif "cross" in query_lower and "chain" in query_lower:
+        elif action == "cross_chain":
             return "🌉 Cross-Chain Analysis: LayerZero integration allows seamless cross-chain operations. Consider gas fees on both chains."
         
         else:
@@ -239,8 +448,13 @@ class GenericMessage(Model):
 # Initialize trading data
 trading_data = TradingData()
 
-async def handle_trading_query(ctx: Context, sender: str, msg: TradingQueryMessage):
+async def handle_trading_query(ctx: "Context", sender: str, msg: TradingQueryMessage):
     """Handle incoming trading queries"""
+    messages_total.inc(handler="trading_query")
+    with handler_stage("trading_query", "total"):
+        await _handle_trading_query(ctx, sender, msg)
+
+async def _handle_trading_query(ctx: "Context", sender: str, msg: TradingQueryMessage):
     try:
         # Extract query and chain from message
         query = msg.query
@@ -248,29 +462,34 @@ async def handle_trading_query(ctx: Context, sender: str, msg: TradingQueryMessa
         
         ctx.logger.info(f"Received trading query: {query} on chain: {chain}")
         
-        # Fetch market data
-        eth_price = await trading_data.get_eth_price()
+        # Read market data from the current snapshot (no network I/O here)
+        eth_data = current_eth_data()
         market_data = {
-            "eth_price": eth_price,
+            "eth_price": eth_data["price"] if eth_data["data_source"] != "fallback" else "N/A",
+            "change_24h": eth_data["change_24h"],
             "timestamp": datetime.now().isoformat(),
-            "chain": chain
+            "chain": chain,
+            "snapshot_age": eth_data["snapshot_age"],
+            "data_source": eth_data["data_source"]
         }
         
         # Generate recommendation
-        recommendation = trading_data.generate_trading_recommendation(query, market_data)
-        
-        # Create response
-        response = TradingResponseMessage(
-            agent="NeuroTrade AI Agent",
-            query=query,
-            recommendation=recommendation,
-            market_data=market_data,
-            timestamp=datetime.now().isoformat(),
-            chain=chain
-        )
+        with handler_stage("trading_query", "generate"):
+            recommendation = trading_data.generate_trading_recommendation(query, market_data)
+            
+            # Create response
+            response = TradingResponseMessage(
+                agent="NeuroTrade AI Agent",
+                query=query,
+                recommendation=recommendation,
+                market_data=market_data,
+                timestamp=datetime.now().isoformat(),
+                chain=chain
+            )
         
         # Send response back
-        await ctx.send(sender, response)
+        with handler_stage("trading_query", "reply"):
+            await ctx.send(sender, response)
         
     except Exception as e:
         ctx.logger.error(f"Error handling trading query: {e}")
@@ -284,28 +503,146 @@ async def handle_trading_query(ctx: Context, sender: str, msg: TradingQueryMessa
         )
         await ctx.send(sender, error_response)
 
-@neurotrade_agent.on_interval(period=300.0)  # Every 5 minutes
-async def update_market_data(ctx: Context):
-    """Periodically update market data"""
+async def collect_market_snapshot() -> Dict:
+    """Gather prices and watched pool stats for a new market snapshot"""
+    eth_data, pools = await asyncio.gather(
+        get_simple_price("ethereum", "usd", ("24hr_change", "24hr_vol", "market_cap")),
+        asyncio.gather(
+            *(trading_data.get_pool_liquidity(address, chain) for chain, address in WATCHED_POOLS)
+        ),
+    )
+    now = time.time()
+    snapshot_data = {
+        "prices": {}, "change_24h": {}, "volume_24h": {}, "market_cap": {}, "pools": {}, "fetched_at": {},
+        "indicators": {},
+    }
+
+    if eth_data:
+        snapshot_data["prices"]["ETH"] = eth_data.get("usd", 0)
+        snapshot_data["change_24h"]["ETH"] = eth_data.get("usd_24h_change", 0)
+        snapshot_data["volume_24h"]["ETH"] = eth_data.get("usd_24h_vol", 0)
+        snapshot_data["market_cap"]["ETH"] = eth_data.get("usd_market_cap", 0)
+        snapshot_data["fetched_at"]["coingecko"] = now
+        # One O(1) indicator update per tick, published with the prices it was computed from
+        snapshot_data["indicators"]["ETH"] = indicator_engine("ETH").update(
+            now, snapshot_data["prices"]["ETH"], snapshot_data["volume_24h"]["ETH"]
+        )
+    else:
+        # Keep the last known values rather than publishing an empty snapshot
+        previous = market_snapshots.current()
+        if previous is not None:
+            for key in ("prices", "change_24h", "volume_24h", "market_cap", "indicators"):
+                snapshot_data[key].update(getattr(previous, key))
+            snapshot_data["fetched_at"].update(previous.fetched_at)
+
+    fetched = [(chain, address, pool) for (chain, address), pool in zip(WATCHED_POOLS, pools) if pool]
+    if fetched:
+        # Decode sqrtPrice/liquidity for all watched pools in one vectorized pass
+        stats = analyze_arrays(records_to_arrays([pool for _, _, pool in fetched]))
+        for i, (chain, address, pool) in enumerate(fetched):
+            # Fresh reserves for the route finder between full graph syncs
+            pool_graph(chain).update_pool(pool)
+            snapshot_data["pools"][f"{chain}:{address.lower()}"] = {
+                **record_to_dict(pool),
+                "price0": float(stats["price0"][i]),
+                "price1": float(stats["price1"][i]),
+                "reserve0": float(stats["reserve0"][i]),
+                "reserve1": float(stats["reserve1"][i]),
+            }
+            snapshot_data["fetched_at"][f"graph:{chain}"] = now
+
+    return snapshot_data
+
+build_pool_record = record_builder(PoolRecord)
+
+
+def update_route_pools(pools: Dict[str, Dict]):
+    """Fresh reserves for the route finder between full graph syncs, from a snapshot's "chain:address" pools"""
+    for key, pool in pools.items():
+        try:
+            pool_graph(key.split(":", 1)[0]).update_pool(build_pool_record(pool))
+        except ValueError as e:
+            logger.warning(f"Skipping unreadable pool {key} for routing: {e}")
+
+market_snapshots.set_collector(collect_market_snapshot)
+registry.gauge(
+    "neurotrade_snapshot_age_seconds",
+    "Age of the current market snapshot",
+    callback=market_snapshots.age,
+)
+
+def record_price_history(snapshot):
+    """Append the snapshot's CoinGecko tick to the on-disk price history"""
+    if not PRICE_HISTORY_ENABLED or "coingecko" not in snapshot.fetched_at:
+        return
+    try:
+        # fetched_at only moves when CoinGecko answered, so failed refreshes
+        # (which carry the previous values forward) are not recorded twice
+        for symbol, price in snapshot.prices.items():
+            price_history.append(
+                symbol, "ethereum", snapshot.fetched_at["coingecko"], price, snapshot.volume_24h.get(symbol, 0.0)
+            )
+        price_history.flush()
+    except Exception as e:
+        logger.error(f"Error recording price history: {e}")
+
+def warm_up_indicators():
+    """Seed the ETH indicator engine from recorded price history"""
+    if not PRICE_HISTORY_ENABLED:
+        return
+    try:
+        engine = indicator_engine("ETH")
+        history = price_history.read("ETH", "ethereum")
+        lookback = engine.config.lookback
+        applied = engine.warm_up(
+            history["timestamp"][-lookback:], history["price"][-lookback:], history["volume"][-lookback:]
+        )
+        logger.info(f"📐 Indicators warmed up from {applied} recorded ticks")
+    except Exception as e:
+        logger.error(f"Error warming up indicators: {e}")
+
+def start_route_graph():
+    """Load the pool graph for swap routes and keep it current in the background"""
+    if ROUTER_SYNC_INTERVAL > 0:
+        # Last graph file first, then full subgraph scans
+        load_pool_graphs()
+        start_pool_graph_sync(
+            trading_data._graph_request, [chain for chain in ROUTER_CHAINS if chain in GRAPH_ENDPOINTS],
+        )
+    else:
+        # Another process (the supervisor's dispatcher) scans and rewrites the file
+        start_pool_graph_reload()
+
+async def update_market_data(ctx: "Context"):
+    """Periodically refresh and publish the market snapshot"""
     try:
         ctx.logger.info("Updating market data...")
         
-        # Update ETH price
-        eth_price = await trading_data.get_eth_price()
-        if eth_price:
-            trading_data.token_prices["ETH"] = eth_price
-            ctx.logger.info(f"Updated ETH price: ${eth_price}")
+        snapshot = await market_snapshots.refresh()
+        if snapshot and "ETH" in snapshot.prices:
+            trading_data.token_prices["ETH"] = snapshot.prices["ETH"]
+            ctx.logger.info(f"Updated ETH price: ${snapshot.prices['ETH']} (snapshot v{snapshot.version})")
+            record_price_history(snapshot)
         
         trading_data.last_update = datetime.now()
         
     except Exception as e:
         ctx.logger.error(f"Error updating market data: {e}")
 
-@neurotrade_agent.on_event("startup")
-async def startup_event(ctx: Context):
+async def startup_event(ctx: "Context"):
     """Agent startup event"""
     ctx.logger.info("🚀 NeuroTrade AI Agent starting up...")
-    ctx.logger.info(f"Agent address: {neurotrade_agent.address}")
+    ctx.logger.info(f"Agent address: {get_agent().address}")
+    
+    # Funding is a blocking ledger call: run it in the background so the
+    # agent starts answering straight away
+    start_funding(get_agent().wallet.address())
+    
+    # Open the shared HTTP session used by every upstream fetch
+    await open_session()
+    
+    # Prometheus-text metrics next to the agent port
+    await start_metrics_server()
     
     ctx.logger.info("📬 Mailbox enabled - agent will be discoverable on ASI:One")
     ctx.logger.info("🌐 Agent configured as 'Hosted' with 'Chat with Agent' button")
@@ -314,11 +651,44 @@ async def startup_event(ctx: Context):
     
     ctx.logger.info("✅ NeuroTrade AI Agent ready for trading queries!")
     
-    # Initial market data fetch
+    # Initial market data fetch, on top of the recorded history
+    warm_up_indicators()
     await update_market_data(ctx)
+    
+    # Token symbols from the last snapshot file; the full token lists are
+    # re-scanned in the background
+    token_index.load()
+    if TOKEN_INDEX_REFRESH_INTERVAL > 0:
+        token_index.start_refresh(trading_data._graph_request, GRAPH_ENDPOINTS)
+    
+    # Pool graph for swap routes
+    start_route_graph()
 
-@neurotrade_agent.on_message(model=TradingQueryMessage)
-async def handle_trading_query_message(ctx: Context, sender: str, msg: TradingQueryMessage):
+async def shutdown_event(ctx: "Context"):
+    """Agent shutdown event"""
+    ctx.logger.info("🛑 NeuroTrade AI Agent shutting down...")
+    await stop_metrics_server()
+    await token_index.stop()
+    await stop_pool_graph_sync()
+    await close_session()
+    price_history.close()
+    graph_cache.close()
+    get_agent().storage.close()
+
+async def send_busy_reply(ctx: "Context", sender: str, msg: Model):
+    """Cheap reply for shed messages, built from the cached snapshot"""
+    query = getattr(msg, "query", None) or getattr(msg, "message", None) or getattr(msg, "content", "")
+    await ctx.send(sender, TradingResponseMessage(
+        agent="NeuroTrade AI Agent",
+        query=query,
+        recommendation=busy_text(),
+        market_data=current_eth_data(),
+        timestamp=datetime.now().isoformat(),
+        chain=getattr(msg, "chain", "ethereum")
+    ))
+
+@admission_controlled("trading_query", send_busy_reply)
+async def handle_trading_query_message(ctx: "Context", sender: str, msg: TradingQueryMessage):
     """Handle structured trading query messages"""
     try:
         ctx.logger.info(f"Received trading query from {sender}: {msg.query}")
@@ -329,8 +699,8 @@ async def handle_trading_query_message(ctx: Context, sender: str, msg: TradingQu
     except Exception as e:
         ctx.logger.error(f"Error in structured message handler: {e}")
 
-@neurotrade_agent.on_message(model=SimpleMessage)
-async def handle_simple_message(ctx: Context, sender: str, msg: SimpleMessage):
+@admission_controlled("simple_message", send_busy_reply)
+async def handle_simple_message(ctx: "Context", sender: str, msg: SimpleMessage):
     """Handle simple text messages"""
     try:
         ctx.logger.info(f"Received simple message from {sender}: {msg.message}")
@@ -342,8 +712,8 @@ async def handle_simple_message(ctx: Context, sender: str, msg: SimpleMessage):
     except Exception as e:
         ctx.logger.error(f"Error in simple message handler: {e}")
 
-@neurotrade_agent.on_message(model=GenericMessage)
-async def handle_generic_message(ctx: Context, sender: str, msg: GenericMessage):
+@admission_controlled("generic_message", send_busy_reply)
+async def handle_generic_message(ctx: "Context", sender: str, msg: GenericMessage):
     """Handle generic content messages"""
     try:
         ctx.logger.info(f"Received generic message from {sender}: {msg.content}")
@@ -355,34 +725,140 @@ async def handle_generic_message(ctx: Context, sender: str, msg: GenericMessage)
     except Exception as e:
         ctx.logger.error(f"Error in generic message handler: {e}")
 
-# 🎯 OFFICIAL CHAT PROTOCOL INTEGRATION (Working Example)
-try:
-    from chat_proto import chat_proto, struct_output_client_proto
-    neurotrade_agent.include(chat_proto, publish_manifest=True)
-    neurotrade_agent.include(struct_output_client_proto, publish_manifest=True)
-    print("🚀 Official Chat Protocol loaded successfully!")
-    print("🎯 Protocol: AgentChatProtocol v0.3.0 (Official)")
-    print("✅ Agent should now show 'Chat with Agent' button!")
-    print("💬 Full chat functionality enabled!")
-except Exception as e:
-    print(f"⚠️ Official Chat Protocol failed: {e}")
-    print("💡 Trying fallback protocols...")
+def include_chat_protocols(agent: "Agent"):
+    """Attach the chat protocols, falling back to the custom one if needed"""
+    # 🎯 OFFICIAL CHAT PROTOCOL INTEGRATION (Working Example)
+    try:
+        from chat_proto import chat_proto, struct_output_client_proto
+        agent.include(chat_proto, publish_manifest=True)
+        agent.include(struct_output_client_proto, publish_manifest=True)
+        print("🚀 Official Chat Protocol loaded successfully!")
+        print("🎯 Protocol: AgentChatProtocol v0.3.0 (Official)")
+        print("✅ Agent should now show 'Chat with Agent' button!")
+        print("💬 Full chat functionality enabled!")
+    except Exception as e:
+        print(f"⚠️ Official Chat Protocol failed: {e}")
+        print("💡 Trying fallback protocols...")
+        
+        # Fallback 1: Custom protocol
+        try:
+            from neurotrade_chat_protocol import neurotrade_chat_protocol
+            agent.include(neurotrade_chat_protocol, publish_manifest=True)
+            print("✅ Custom chat protocol loaded!")
+        except Exception as e2:
+            print(f"❌ All chat protocols failed: {e2}")
+            print("💡 Agent will run without chat capabilities")
+
+# === DEFERRED AGENT CONSTRUCTION ===
+# Importing this module only defines things (TradingData, handlers, message
+# models). The uAgents Agent, its storage and protocols are built on first
+# use by get_agent(), and funding runs in the background after startup.
+
+_agent: Optional["Agent"] = None
+_funding_task: Optional[asyncio.Future] = None
+
+def build_agent(
+    name: str = "NeuroTrade", seed: str = AGENT_SEED, port: int = AGENT_PORT, **agent_options
+) -> "Agent":
+    """Create the NeuroTrade agent and register its handlers and protocols
+
+    agent_options (endpoint, resolve, ...) replace the Agentverse mailbox
+    setup, e.g. for supervisor workers on a local endpoint.
+    """
+    with startup_phase("import uagents"):
+        from uagents import Agent
+        from agent_storage import CoalescingKeyValueStore
+    
+    with startup_phase("create agent"):
+        if agent_options:
+            agent = Agent(name=name, seed=seed, port=port, **agent_options)
+        else:
+            # Use Agentverse mailbox for hosted agent
+            agent = Agent(
+                name=name,
+                seed=seed,
+                mailbox=True,
+                port=port,
+                endpoint="https://agentverse.ai/v1/submit"
+            )
+            print("🌐 Agent configured with Agentverse mailbox")
+    
+    with startup_phase("open storage"):
+        # Session -> sender keys are written to ctx.storage on every chat message;
+        # keep them in memory and write the file in batches instead of per set()
+        agent._storage = CoalescingKeyValueStore(agent.address[0:16])
+    
+    with startup_phase("register handlers"):
+        agent.on_interval(period=SNAPSHOT_REFRESH_INTERVAL)(update_market_data)
+        agent.on_event("startup")(startup_event)
+        agent.on_event("shutdown")(shutdown_event)
+        agent.on_message(model=TradingQueryMessage)(handle_trading_query_message)
+        agent.on_message(model=SimpleMessage)(handle_simple_message)
+        agent.on_message(model=GenericMessage)(handle_generic_message)
+    
+    with startup_phase("chat protocols"):
+        include_chat_protocols(agent)
+    
+    return agent
+
+def get_agent(**options) -> "Agent":
+    """The process-wide agent, built (with build_agent options) on first call"""
+    global _agent
+    if _agent is None:
+        _agent = build_agent(**options)
+    return _agent
+
+def __getattr__(name: str):
+    # `neurotrade_agent.neurotrade_agent` still works, but builds lazily
+    if name == "neurotrade_agent":
+        return get_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _fund_agent(address: str):
+    """Fund the agent if needed (with error handling)"""
+    from uagents.setup import fund_agent_if_low
     
-    # Fallback 1: Custom protocol
+    started = time.perf_counter()
     try:
-        from neurotrade_chat_protocol import neurotrade_chat_protocol
-        neurotrade_agent.include(neurotrade_chat_protocol, publish_manifest=True)
-        print("✅ Custom chat protocol loaded!")
-    except Exception as e2:
-        print(f"❌ All chat protocols failed: {e2}")
-        print("💡 Agent will run without chat capabilities")
+        fund_agent_if_low(address)
+        logger.info(f"💰 Funding check finished in {time.perf_counter() - started:.1f}s")
+    except Exception as e:
+        logger.warning(f"⚠️ Could not fund agent: {e}")
+        logger.info("💡 Agent will continue without funding")
+
+def start_funding(address: str) -> Optional[asyncio.Future]:
+    """Run the funding check in a worker thread without waiting for it"""
+    global _funding_task
+    if not FUND_AGENT:
+        return None
+    if _funding_task is None:
+        _funding_task = asyncio.get_running_loop().run_in_executor(None, _fund_agent, address)
+    return _funding_task
+
+# Module import time, less the phases timed inside it (.env loading)
+record_phase("import modules", time.perf_counter() - _import_started - recorded_seconds())
 
 def signal_handler(signum, frame):
     """Handle shutdown signals gracefully"""
     print(f"\n🛑 Received signal {signum}, shutting down gracefully...")
     sys.exit(0)
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the NeuroTrade AI Agent")
+    parser.add_argument(
+        "--profile-startup", action="store_true",
+        help="build the agent, print a per-phase startup timing breakdown and exit",
+    )
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
+    args = parse_args()
+    neurotrade_agent = get_agent()
+    
+    if args.profile_startup:
+        print(format_startup_profile())
+        sys.exit(0)
+    
     # Set up signal handlers
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
@@ -1,7 +1,13 @@
 from datetime import datetime
 from uuid import uuid4
 from typing import List, Optional
-import aiohttp
+from admission import admission_controlled, busy_text
+from indicators import indicator_summary, market_signals
+from intent import classify
+from market_snapshot import SnapshotRenderCache, current_eth_data, data_notice, format_price
+from metrics import handler_stage, messages_total
+from sessions import sessions
+from swap_router import describe_swap
 
 from uagents import Context, Model, Protocol
 
@@ -42,116 +48,171 @@ neurotrade_chat_protocol = Protocol(
     version="1.0.0"
 )
 
-# Active sessions tracking
-active_sessions = {}
-
 async def get_eth_trading_data(query: str) -> dict:
-    """Get real-time ETH trading data"""
-    try:
-        # Fetch ETH price from CoinGecko
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                "https://api.coingecko.com/api/v3/simple/price",
-                params={
-                    "ids": "ethereum",
-                    "vs_currencies": "usd",
-                    "include_24hr_change": "true",
-                    "include_24hr_vol": "true"
-                }
-            ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    eth_data = data.get("ethereum", {})
-                    return {
-                        "price": eth_data.get("usd", 2500),
-                        "change_24h": eth_data.get("usd_24h_change", 0),
-                        "volume_24h": eth_data.get("usd_24h_vol", 0)
-                    }
-                else:
-                    return {"price": 2500, "change_24h": 0, "volume_24h": 0}
-    except Exception as e:
-        print(f"Error fetching ETH data: {e}")
-        return {"price": 2500, "change_24h": 0, "volume_24h": 0}
+    """Get ETH trading data from the current market snapshot"""
+    return current_eth_data()
 
-def generate_trading_response(query: str, trading_data: dict) -> str:
-    """Generate trading response based on query and data"""
-    query_lower = query.lower()
-    price = trading_data.get("price", 2500)
+def render_trading_response(action: str, trading_data: dict) -> str:
+    """Render the trading response text for one intent action"""
     change_24h = trading_data.get("change_24h", 0)
     volume_24h = trading_data.get("volume_24h", 0)
+    signals = market_signals(trading_data)
     
-    response = f"🚀 **NeuroTrade AI Analysis**\n\n"
-    response += f"💰 **Current ETH Price**: ${price:,.2f} USD\n"
-    response += f"📈 **24h Change**: {change_24h:+.2f}%\n"
-    response += f"💹 **24h Volume**: ${volume_24h:,.0f} USD\n\n"
+    parts = [f"🚀 **NeuroTrade AI Analysis**\n\n"]
+    parts.append(data_notice(trading_data))
+    parts.append(f"💰 **Current ETH Price**: {format_price(trading_data)}\n")
+    parts.append(f"📈 **24h Change**: {change_24h:+.2f}%\n")
+    parts.append(f"💹 **24h Volume**: ${volume_24h:,.0f} USD\n")
+    parts.append(indicator_summary(trading_data))
+    parts.append("\n")
     
     # Market sentiment
-    sentiment = "🟢 Bullish" if change_24h > 0 else "🔴 Bearish" if change_24h < -2 else "🟡 Neutral"
-    response += f"🎯 **Market Sentiment**: {sentiment}\n\n"
+    sentiment = {"bullish": "🟢 Bullish", "bearish": "🔴 Bearish"}.get(signals.trend, "🟡 Neutral")
+    parts.append(f"🎯 **Market Sentiment**: {sentiment}\n\n")
     
-    if "price" in query_lower:
-        response += f"📊 **Price Analysis**:\n"
-        response += f"• ETH is {'up' if change_24h > 0 else 'down'} {abs(change_24h):.2f}% in 24h\n"
-        response += f"• Current trend: {'Bullish momentum' if change_24h > 2 else 'Bearish pressure' if change_24h < -2 else 'Sideways movement'}\n"
-        response += f"• Volume: {'High' if volume_24h > 10000000000 else 'Normal'} trading activity\n\n"
+    if action == "price":
+        parts.append(f"📊 **Price Analysis**:\n")
+        parts.append(f"• ETH is {'up' if change_24h > 0 else 'down'} {abs(change_24h):.2f}% in 24h\n")
+        parts.append(f"• Current trend: {'Bullish momentum' if signals.trend == 'bullish' else 'Bearish pressure' if signals.trend == 'bearish' else 'Sideways movement'}\n")
+        parts.append(f"• Volume: {'High' if volume_24h > 10000000000 else 'Normal'} trading activity\n\n")
         
-    elif "buy" in query_lower:
-        response += f"🔵 **Buy Signal Analysis**:\n"
-        if change_24h > 0:
-            response += f"• ✅ Positive momentum detected\n"
-            response += f"• 💡 Consider dollar-cost averaging\n"
-            response += f"• ⚡ Entry point: Current levels look favorable\n"
+    elif action == "buy":
+        parts.append(f"🔵 **Buy Signal Analysis**:\n")
+        if signals.momentum == "overbought":
+            parts.append(f"• ⚠️ Overbought on RSI\n")
+            parts.append(f"• 💡 Wait for a pullback before adding\n")
+            parts.append(f"• 📉 Consider setting buy orders below current price\n")
+        elif signals.trend != "bearish":
+            parts.append(f"• ✅ Positive momentum detected\n")
+            parts.append(f"• 💡 Consider dollar-cost averaging\n")
+            parts.append(f"• ⚡ Entry point: Current levels look favorable\n")
         else:
-            response += f"• ⚠️ Price showing weakness\n"
-            response += f"• 💡 Wait for confirmation or lower entry\n"
-            response += f"• 📉 Consider setting buy orders below current price\n"
-        response += f"• 🎯 **Risk**: Moderate | **Timeframe**: Medium-term\n\n"
+            parts.append(f"• ⚠️ Price showing weakness\n")
+            parts.append(f"• 💡 Wait for confirmation or lower entry\n")
+            parts.append(f"• 📉 Consider setting buy orders below current price\n")
+        parts.append(f"• 🎯 **Risk**: Moderate | **Timeframe**: Medium-term\n\n")
         
-    elif "sell" in query_lower:
-        response += f"🔴 **Sell Signal Analysis**:\n"
-        if change_24h < -2:
-            response += f"• ⚠️ Significant downward pressure\n"
-            response += f"• 💡 Consider taking profits if in green\n"
-            response += f"• 📉 Stop-loss recommended\n"
+    elif action == "sell":
+        parts.append(f"🔴 **Sell Signal Analysis**:\n")
+        if signals.trend == "bearish" and signals.momentum != "oversold":
+            parts.append(f"• ⚠️ Significant downward pressure\n")
+            parts.append(f"• 💡 Consider taking profits if in green\n")
+            parts.append(f"• 📉 Stop-loss recommended\n")
+        elif signals.momentum == "overbought":
+            parts.append(f"• ⚠️ Overbought on RSI\n")
+            parts.append(f"• 💰 Consider scaling out into strength\n")
+            parts.append(f"• 🎯 Set trailing stops\n")
         else:
-            response += f"• ✅ Price holding well\n"
-            response += f"• 💰 Consider partial profit-taking\n"
-            response += f"• 🎯 Set trailing stops\n"
-        response += f"• 🎯 **Risk**: Moderate | **Strategy**: Profit protection\n\n"
+            parts.append(f"• ✅ Price holding well\n")
+            parts.append(f"• 💰 Consider partial profit-taking\n")
+            parts.append(f"• 🎯 Set trailing stops\n")
+        parts.append(f"• 🎯 **Risk**: Moderate | **Strategy**: Profit protection\n\n")
         
-    elif "swap" in query_lower:
-        response += f"🔄 **Swap Analysis**:\n"
-        response += f"• 💱 Current ETH price: ${price:,.2f}\n"
-        response += f"• ⛽ Gas fees: Check current network congestion\n"
-        response += f"• 🌊 Liquidity: {'Good' if volume_24h > 5000000000 else 'Check DEX pools'}\n"
-        response += f"• ⏰ Timing: {'Favorable' if abs(change_24h) < 3 else 'Volatile - use limit orders'}\n\n"
+    elif action == "swap":
+        parts.append(f"🔄 **Swap Analysis**:\n")
+        parts.append(f"• 💱 Current ETH price: {format_price(trading_data)}\n")
+        parts.append(f"• ⛽ Gas fees: Check current network congestion\n")
+        parts.append(f"• 🌊 Liquidity: {'Good' if volume_24h > 5000000000 else 'Check DEX pools'}\n")
+        parts.append(f"• ⏰ Timing: {'Volatile - use limit orders' if signals.volatility == 'high' else 'Favorable'}\n\n")
         
-    elif "analysis" in query_lower or "market" in query_lower:
-        response += f"📈 **Market Analysis**:\n"
-        response += f"• 📊 Technical: {sentiment.split()[1]} bias\n"
-        response += f"• 💹 Volume: {'Above' if volume_24h > 8000000000 else 'Below'} average\n"
-        response += f"• 🎯 Support/Resistance: Monitor key levels\n"
-        response += f"• 🔮 Outlook: {'Positive' if change_24h > 1 else 'Cautious' if change_24h > -1 else 'Bearish'}\n\n"
+    elif action == "analysis":
+        parts.append(f"📈 **Market Analysis**:\n")
+        parts.append(f"• 📊 Technical: {sentiment.split()[1]} bias\n")
+        parts.append(f"• 💹 Volume: {'Above' if volume_24h > 8000000000 else 'Below'} average\n")
+        parts.append(f"• 🎯 Support/Resistance: Monitor key levels\n")
+        parts.append(f"• 🔮 Outlook: {'Positive' if signals.trend == 'bullish' else 'Bearish' if signals.trend == 'bearish' else 'Cautious'}\n\n")
         
     else:
-        response += f"💡 **Available Commands**:\n"
-        response += f"• 'ETH price' - Current price and trends\n"
-        response += f"• 'Should I buy ETH?' - Buy signal analysis\n"
-        response += f"• 'Should I sell ETH?' - Sell signal analysis\n"
-        response += f"• 'ETH swap analysis' - Swap recommendations\n"
-        response += f"• 'Market analysis' - Complete market overview\n\n"
+        parts.append(f"💡 **Available Commands**:\n")
+        parts.append(f"• 'ETH price' - Current price and trends\n")
+        parts.append(f"• 'Should I buy ETH?' - Buy signal analysis\n")
+        parts.append(f"• 'Should I sell ETH?' - Sell signal analysis\n")
+        parts.append(f"• 'ETH swap analysis' - Swap recommendations\n")
+        parts.append(f"• 'Market analysis' - Complete market overview\n\n")
     
-    response += f"---\n"
-    response += f"🤖 **NeuroTrade AI** - Your Smart Trading Assistant\n"
-    response += f"🌐 **Multi-chain Support**: Ethereum, Arbitrum, Polygon, Optimism, Base\n"
-    response += f"⚡ **Real-time Data** | 🔒 **Secure** | 🎯 **Accurate**"
+    parts.append(f"---\n")
+    parts.append(f"🤖 **NeuroTrade AI** - Your Smart Trading Assistant\n")
+    parts.append(f"🌐 **Multi-chain Support**: Ethereum, Arbitrum, Polygon, Optimism, Base\n")
+    parts.append(f"⚡ **Real-time Data** | 🔒 **Secure** | 🎯 **Accurate**")
     
-    return response
+    return "".join(parts)
+
+def generate_trading_response(query: str, trading_data: dict) -> str:
+    """Generate trading response based on query and data"""
+    intent = classify(query)
+    return with_swap_route(query, intent, render_trading_response(intent.action, trading_data))
+
+def with_swap_route(query: str, intent, response: str) -> str:
+    """Put the best route on top of a swap response when the query names two routable tokens"""
+    route = describe_swap(query, intent) if intent.action == "swap" else None
+    return f"{route}\n\n{response}" if route is not None else response
+
+# Response bodies only depend on (intent, snapshot), so render each once per refresh;
+# only a swap route is per query
+_response_cache = SnapshotRenderCache(render_trading_response)
+
+# Static texts (built once at import)
+WELCOME_TEXT = (
+    "👋 **Welcome to NeuroTrade AI!**\n\n"
+    "🚀 I'm your intelligent trading assistant specializing in ETH analysis.\n\n"
+    "💡 **Ask me about**:\n"
+    "• ETH price and trends\n"
+    "• Buy/sell recommendations\n"
+    "• Swap analysis\n"
+    "• Market insights\n\n"
+    "🎯 **Try**: 'What's ETH price?' or 'Should I buy ETH?'"
+)
+
+ERROR_TEXT = (
+    "❌ **Error Processing Request**\n\n"
+    "🔧 Something went wrong while processing your trading query.\n\n"
+    "💡 **Please try**:\n"
+    "• 'ETH price' - For current price\n"
+    "• 'Buy ETH analysis' - For buy signals\n"
+    "• 'Sell ETH analysis' - For sell signals\n"
+    "• 'Market analysis' - For market overview\n\n"
+    "🤖 **NeuroTrade AI** is ready to help!"
+)
+
+SESSION_WELCOME_TEXT = (
+    "🎉 **Session Started!**\n\n"
+    "🚀 **NeuroTrade AI** is now active and ready to assist you.\n\n"
+    "💡 **I can help you with**:\n"
+    "• Real-time ETH price analysis\n"
+    "• Smart buy/sell recommendations\n"
+    "• Swap strategy optimization\n"
+    "• Cross-chain trading insights\n\n"
+    "🎯 **Start by asking**: 'What's ETH doing today?'"
+)
+
+SESSION_GOODBYE_TEMPLATE = (
+    "👋 **Session Ended!**\n\n"
+    "🎯 **NeuroTrade AI** session completed.\n\n"
+    "📊 **Session Summary**:\n"
+    "• Messages processed: {message_count}\n"
+    "• Duration: {duration}\n\n"
+    "🚀 **Thank you for using NeuroTrade AI!**\n"
+    "💡 Come back anytime for smart trading insights.\n\n"
+    "🌐 **Stay connected** on ASI:One for more AI trading tools!"
+)
+
+async def send_busy_response(ctx: Context, sender: str, msg: NeurotradeChatMessage):
+    """Answer a shed chat message from cached data"""
+    await ctx.send(sender, NeurotradeChatResponse(
+        msg_id=str(uuid4()),
+        content=busy_text(),
+        timestamp=datetime.utcnow().isoformat(),
+        trading_data=current_eth_data(),
+        msg_type="busy"
+    ))
 
 @neurotrade_chat_protocol.on_message(NeurotradeChatMessage)
+@admission_controlled("neurotrade_chat", send_busy_response)
 async def handle_neurotrade_chat(ctx: Context, sender: str, msg: NeurotradeChatMessage):
     """Handle incoming chat messages"""
     ctx.logger.info(f"🎯 NeuroTrade Chat: Received message from {sender}")
+    messages_total.inc(handler="neurotrade_chat")
+    sessions.touch("neurotrade_chat", sender)
     
     try:
         # Handle different message types
@@ -160,18 +221,9 @@ async def handle_neurotrade_chat(ctx: Context, sender: str, msg: NeurotradeChatM
             
             # Empty message - send welcome
             if not content:
-                welcome_msg = "👋 **Welcome to NeuroTrade AI!**\n\n"
-                welcome_msg += "🚀 I'm your intelligent trading assistant specializing in ETH analysis.\n\n"
-                welcome_msg += "💡 **Ask me about**:\n"
-                welcome_msg += "• ETH price and trends\n"
-                welcome_msg += "• Buy/sell recommendations\n"
-                welcome_msg += "• Swap analysis\n"
-                welcome_msg += "• Market insights\n\n"
-                welcome_msg += "🎯 **Try**: 'What's ETH price?' or 'Should I buy ETH?'"
-                
                 response = NeurotradeChatResponse(
                     msg_id=str(uuid4()),
-                    content=welcome_msg,
+                    content=WELCOME_TEXT,
                     timestamp=datetime.utcnow().isoformat(),
                     msg_type="welcome"
                 )
@@ -181,11 +233,13 @@ async def handle_neurotrade_chat(ctx: Context, sender: str, msg: NeurotradeChatM
             # Process trading query
             ctx.logger.info(f"Processing query: {content}")
             
-            # Get real-time trading data
-            trading_data = await get_eth_trading_data(content)
-            
-            # Generate response
-            response_content = generate_trading_response(content, trading_data)
+            with handler_stage("neurotrade_chat", "generate"):
+                # Get real-time trading data
+                trading_data = await get_eth_trading_data(content)
+                
+                # Look up the response rendered for this intent and snapshot
+                intent = classify(content)
+                response_content = with_swap_route(content, intent, _response_cache.get(intent.action))
             
             # Send response
             response = NeurotradeChatResponse(
@@ -196,7 +250,8 @@ async def handle_neurotrade_chat(ctx: Context, sender: str, msg: NeurotradeChatM
                 msg_type="response"
             )
             
-            await ctx.send(sender, response)
+            with handler_stage("neurotrade_chat", "reply"):
+                await ctx.send(sender, response)
             
         else:
             # Handle other message types
@@ -206,18 +261,9 @@ async def handle_neurotrade_chat(ctx: Context, sender: str, msg: NeurotradeChatM
         ctx.logger.error(f"Error in NeuroTrade chat handler: {e}")
         
         # Send error response
-        error_msg = "❌ **Error Processing Request**\n\n"
-        error_msg += "🔧 Something went wrong while processing your trading query.\n\n"
-        error_msg += "💡 **Please try**:\n"
-        error_msg += "• 'ETH price' - For current price\n"
-        error_msg += "• 'Buy ETH analysis' - For buy signals\n"
-        error_msg += "• 'Sell ETH analysis' - For sell signals\n"
-        error_msg += "• 'Market analysis' - For market overview\n\n"
-        error_msg += "🤖 **NeuroTrade AI** is ready to help!"
-        
         error_response = NeurotradeChatResponse(
             msg_id=str(uuid4()),
-            content=error_msg,
+            content=ERROR_TEXT,
             timestamp=datetime.utcnow().isoformat(),
             msg_type="error"
         )
@@ -229,25 +275,12 @@ async def handle_session_start(ctx: Context, sender: str, msg: NeurotradeSession
     ctx.logger.info(f"🎯 NeuroTrade: Session started with {sender}")
     
     # Track active session
-    active_sessions[sender] = {
-        "session_id": msg.session_id,
-        "start_time": datetime.utcnow(),
-        "message_count": 0
-    }
+    sessions.start("neurotrade_chat", sender, msg.session_id)
     
     # Send welcome message
-    welcome_msg = "🎉 **Session Started!**\n\n"
-    welcome_msg += "🚀 **NeuroTrade AI** is now active and ready to assist you.\n\n"
-    welcome_msg += "💡 **I can help you with**:\n"
-    welcome_msg += "• Real-time ETH price analysis\n"
-    welcome_msg += "• Smart buy/sell recommendations\n"
-    welcome_msg += "• Swap strategy optimization\n"
-    welcome_msg += "• Cross-chain trading insights\n\n"
-    welcome_msg += "🎯 **Start by asking**: 'What's ETH doing today?'"
-    
     response = NeurotradeChatResponse(
         msg_id=str(uuid4()),
-        content=welcome_msg,
+        content=SESSION_WELCOME_TEXT,
         timestamp=datetime.utcnow().isoformat(),
         msg_type="session_welcome"
     )
@@ -259,19 +292,13 @@ async def handle_session_end(ctx: Context, sender: str, msg: NeurotradeSessionEn
     ctx.logger.info(f"🎯 NeuroTrade: Session ended with {sender}")
     
     # Clean up session
-    if sender in active_sessions:
-        session_info = active_sessions[sender]
-        del active_sessions[sender]
-        
+    session = sessions.end("neurotrade_chat", sender)
+    if session is not None:
         # Send goodbye message
-        goodbye_msg = "👋 **Session Ended!**\n\n"
-        goodbye_msg += "🎯 **NeuroTrade AI** session completed.\n\n"
-        goodbye_msg += "📊 **Session Summary**:\n"
-        goodbye_msg += f"• Messages processed: {session_info.get('message_count', 0)}\n"
-        goodbye_msg += f"• Duration: {datetime.utcnow() - session_info.get('start_time', datetime.utcnow())}\n\n"
-        goodbye_msg += "🚀 **Thank you for using NeuroTrade AI!**\n"
-        goodbye_msg += "💡 Come back anytime for smart trading insights.\n\n"
-        goodbye_msg += "🌐 **Stay connected** on ASI:One for more AI trading tools!"
+        goodbye_msg = SESSION_GOODBYE_TEMPLATE.format(
+            message_count=session.message_count,
+            duration=session.duration
+        )
         
         response = NeurotradeChatResponse(
             msg_id=str(uuid4()),
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# ⏱️ PENDING REMOTE REQUESTS
+# Requests sent to another agent whose answer arrives as a separate message
+# (e.g. the structured-output parser behind chat_proto). Each one is kept in
+# a table keyed by session with its own deadline: an answer resolves the
+# request of that session it names (or else the oldest one), a request that
+# misses its deadline is handed to a local fallback, and answers for a
+# session with nothing pending are dropped.
+
+STRUCTURED_OUTPUT_TIMEOUT = float(os.getenv("STRUCTURED_OUTPUT_TIMEOUT", "8"))
+
+remote_request_seconds = registry.histogram(
+    "neurotrade_remote_request_seconds",
+    "Time until a remote agent answered a pending request",
+    ("remote",),
+)
+remote_requests_total = registry.counter(
+    "neurotrade_remote_requests_total",
+    "Pending remote requests by outcome (answered, timeout, late)",
+    ("remote", "result"),
+)
+
+
+class PendingRequest:
+    """One request waiting for a remote answer"""
+    __slots__ = ("key", "sender", "payload", "context", "sent_at", "deadline", "_timer")
+
+    def __init__(self, key: str, sender: str, payload: Any, context: Any, timeout: float):
+        self.key = key
+        self.sender = sender
+        self.payload = payload
+        self.context = context
+        self.sent_at = time.monotonic()
+        self.deadline = self.sent_at + timeout
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.sent_at
+
+
+class PendingRequestTable:
+    """Per-session FIFO of pending requests with deadlines and a timeout fallback"""
+
+    def __init__(
+        self,
+        name: str,
+        on_timeout: Callable[[PendingRequest], Awaitable[None]],
+        timeout: float = STRUCTURED_OUTPUT_TIMEOUT,
+    ):
+        self.name = name
+        self.timeout = timeout
+        self._on_timeout = on_timeout
+        self._pending: Dict[str, Deque[PendingRequest]] = {}
+        self._count = 0
+        self.answered = 0
+        self.timeouts = 0
+        self.late = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, key: str, sender: str, payload: Any, context: Any = None) -> PendingRequest:
+        """Track a request sent on behalf of sender; must be called inside the event loop"""
+        request = PendingRequest(key, sender, payload, context, self.timeout)
+        request._timer = asyncio.get_running_loop().call_later(self.timeout, self._expire, request)
+        self._pending.setdefault(key, deque()).append(request)
+        self._count += 1
+        return request
+
+    def resolve(self, key: str, prefer: Optional[Callable[[Any], bool]] = None) -> Optional[PendingRequest]:
+        """Pop the pending request for key that an answer belongs to
+
+        The session key is what ties an answer to its requests; when several
+        are pending, prefer(payload) picks the one the answer names (e.g. the
+        prompt it echoes), else the oldest is taken. None means nothing is
+        pending for key: the answer is late or unknown.
+        """
+        queue = self._pending.get(key)
+        if not queue:
+            self.late += 1
+            remote_requests_total.inc(remote=self.name, result="late")
+            return None
+        request = next((pending for pending in queue if prefer(pending.payload)), None) if prefer else None
+        if request is None:
+            request = queue[0]
+        queue.remove(request)
+        self._forget(request, queue)
+        self.answered += 1
+        remote_requests_total.inc(remote=self.name, result="answered")
+        remote_request_seconds.observe(request.elapsed, remote=self.name)
+        return request
+
+    def _forget(self, request: PendingRequest, queue: Deque[PendingRequest]):
+        if request._timer is not None:
+            request._timer.cancel()
+            request._timer = None
+        if not queue:
+            del self._pending[request.key]
+        self._count -= 1
+
+    def _expire(self, request: PendingRequest):
+        queue = self._pending.get(request.key)
+        if not queue or request not in queue:
+            return
+        queue.remove(request)
+        self._forget(request, queue)
+        self.timeouts += 1
+        remote_requests_total.inc(remote=self.name, result="timeout")
+        logger.warning(f"⏱️ {self.name} did not answer within {self.timeout:.1f}s, using local fallback")
+        asyncio.ensure_future(self._on_timeout(request)).add_done_callback(self._log_fallback_error)
+
+    def _log_fallback_error(self, task: asyncio.Future):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"{self.name} timeout fallback failed: {task.exception()}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": self._count,
+            "answered": self.answered,
+            "timeouts": self.timeouts,
+            "late": self.late,
+        }
+
+
+__all__ = ["PendingRequest", "PendingRequestTable", "STRUCTURED_OUTPUT_TIMEOUT"]
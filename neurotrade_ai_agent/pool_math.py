@@ -0,0 +1,190 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from typed_json import PoolRecord
+
+# 🧮 UNISWAP V3 POOL MATH
+# Decodes the raw `sqrtPrice`, `tick` and `liquidity` fields returned by the
+# subgraph. Batches of pools are converted to columnar NumPy arrays so spot
+# prices and in-range virtual reserves for thousands of pools are a handful
+# of vector operations. Raw token amounts that exceed float precision are
+# available through the exact integer path (exact_virtual_reserves). NumPy
+# is imported by the functions that use it, so importing the module (e.g.
+# for Q96_FLOAT) stays cheap.
+
+Q96 = 2 ** 96
+Q96_FLOAT = float(Q96)
+TICK_BASE = 1.0001
+DEFAULT_DECIMALS = 18
+
+
+@dataclass(frozen=True)
+class PoolArrays:
+    """Columnar view of a batch of pools"""
+    ids: "np.ndarray"             # object (pool id strings)
+    sqrt_price_x96: "np.ndarray"  # float64
+    liquidity: "np.ndarray"       # float64
+    tick: "np.ndarray"            # int64
+    decimals0: "np.ndarray"       # int64
+    decimals1: "np.ndarray"       # int64
+    fee_tier: "np.ndarray"        # int64 (hundredths of a bip, e.g. 3000 = 0.3%)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def _token_decimals(token: Dict) -> int:
+    decimals = (token or {}).get("decimals")
+    return int(decimals) if decimals not in (None, "") else DEFAULT_DECIMALS
+
+
+def _column(pools: Sequence[Dict], field: str) -> "np.ndarray":
+    import numpy as np
+    return np.fromiter((float(pool.get(field) or 0) for pool in pools), dtype=np.float64, count=len(pools))
+
+
+def records_to_arrays(pools: Sequence["PoolRecord"]) -> PoolArrays:
+    """NumPy columns from typed_json PoolRecords (numbers already parsed)"""
+    import numpy as np
+    count = len(pools)
+    return PoolArrays(
+        ids=np.array([pool.id for pool in pools], dtype=object),
+        sqrt_price_x96=np.fromiter((pool.sqrt_price for pool in pools), dtype=np.float64, count=count),
+        liquidity=np.fromiter((pool.liquidity for pool in pools), dtype=np.float64, count=count),
+        tick=np.fromiter((pool.tick or 0 for pool in pools), dtype=np.int64, count=count),
+        decimals0=np.fromiter(
+            (pool.token0.decimals if pool.token0 else DEFAULT_DECIMALS for pool in pools), dtype=np.int64, count=count
+        ),
+        decimals1=np.fromiter(
+            (pool.token1.decimals if pool.token1 else DEFAULT_DECIMALS for pool in pools), dtype=np.int64, count=count
+        ),
+        fee_tier=np.fromiter((pool.fee_tier for pool in pools), dtype=np.int64, count=count),
+    )
+
+
+def pools_to_arrays(pools: Sequence[Dict]) -> PoolArrays:
+    """Convert subgraph pool dicts into NumPy columns
+
+    Parsing is the only per-pool Python work; everything downstream runs on
+    the arrays, so a batch can be parsed once and reused.
+    """
+    import numpy as np
+    return PoolArrays(
+        ids=np.array([pool.get("id", "") for pool in pools], dtype=object),
+        sqrt_price_x96=_column(pools, "sqrtPrice"),
+        liquidity=_column(pools, "liquidity"),
+        tick=_column(pools, "tick").astype(np.int64),
+        decimals0=np.fromiter((_token_decimals(pool.get("token0")) for pool in pools), dtype=np.int64, count=len(pools)),
+        decimals1=np.fromiter((_token_decimals(pool.get("token1")) for pool in pools), dtype=np.int64, count=len(pools)),
+        fee_tier=_column(pools, "feeTier").astype(np.int64),
+    )
+
+
+def spot_prices(arrays: PoolArrays) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Price of token0 in token1 and its inverse, adjusted for decimals
+
+    price0 = (sqrtPriceX96 / 2^96)^2 * 10^(decimals0 - decimals1).
+    Pools with a zero sqrtPrice get NaN.
+    """
+    import numpy as np
+    sqrt_price = arrays.sqrt_price_x96 / Q96_FLOAT
+    scale = np.power(10.0, (arrays.decimals0 - arrays.decimals1).astype(np.float64))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        price0 = np.where(sqrt_price > 0, sqrt_price * sqrt_price * scale, np.nan)
+        price1 = 1.0 / price0
+    return price0, price1
+
+
+def tick_prices(arrays: PoolArrays) -> "np.ndarray":
+    """Decimal-adjusted token0 price implied by the current tick (1.0001^tick)"""
+    import numpy as np
+    scale = np.power(10.0, (arrays.decimals0 - arrays.decimals1).astype(np.float64))
+    return np.power(TICK_BASE, arrays.tick.astype(np.float64)) * scale
+
+
+def virtual_reserves(arrays: PoolArrays) -> Tuple["np.ndarray", "np.ndarray"]:
+    """In-range virtual reserves (token units) of token0 and token1
+
+    x = L / sqrtP and y = L * sqrtP in raw units, divided by 10^decimals.
+    """
+    import numpy as np
+    sqrt_price = arrays.sqrt_price_x96 / Q96_FLOAT
+    with np.errstate(divide="ignore", invalid="ignore"):
+        reserve0 = np.where(sqrt_price > 0, arrays.liquidity / sqrt_price, 0.0)
+    reserve1 = arrays.liquidity * sqrt_price
+    reserve0 = reserve0 / np.power(10.0, arrays.decimals0.astype(np.float64))
+    reserve1 = reserve1 / np.power(10.0, arrays.decimals1.astype(np.float64))
+    return reserve0, reserve1
+
+
+def analyze_arrays(arrays: PoolArrays) -> Dict[str, "np.ndarray"]:
+    """Spot prices, inverse prices, tick prices and virtual reserves for parsed pools"""
+    price0, price1 = spot_prices(arrays)
+    reserve0, reserve1 = virtual_reserves(arrays)
+    return {
+        "id": arrays.ids,
+        "price0": price0,
+        "price1": price1,
+        "tick_price0": tick_prices(arrays),
+        "reserve0": reserve0,
+        "reserve1": reserve1,
+        "fee_tier": arrays.fee_tier,
+    }
+
+
+def analyze_pools(pools: Sequence[Dict]) -> Dict[str, "np.ndarray"]:
+    """Parse a batch of subgraph pools and run analyze_arrays on it"""
+    return analyze_arrays(pools_to_arrays(pools))
+
+
+def exact_virtual_reserves(pools: Sequence[Dict]) -> List[Tuple[int, int]]:
+    """Raw in-range virtual reserves as exact integers
+
+    Mirrors the contracts' fixed-point math (x = L * 2^96 / sqrtPriceX96,
+    y = L * sqrtPriceX96 / 2^96, rounded down), for amounts beyond 2^53.
+    """
+    reserves = []
+    for pool in pools:
+        sqrt_price_x96 = int(pool.get("sqrtPrice") or 0)
+        liquidity = int(pool.get("liquidity") or 0)
+        if sqrt_price_x96 == 0:
+            reserves.append((0, 0))
+            continue
+        reserves.append(((liquidity << 96) // sqrt_price_x96, (liquidity * sqrt_price_x96) >> 96))
+    return reserves
+
+
+def analyze_pool(pool: Dict) -> Dict[str, float]:
+    """Pure-Python single-pool version of analyze_pools (reference / small inputs)"""
+    sqrt_price = int(pool.get("sqrtPrice") or 0) / Q96
+    liquidity = float(pool.get("liquidity") or 0)
+    decimals0 = _token_decimals(pool.get("token0"))
+    decimals1 = _token_decimals(pool.get("token1"))
+    scale = 10.0 ** (decimals0 - decimals1)
+    price0 = sqrt_price * sqrt_price * scale if sqrt_price > 0 else float("nan")
+    return {
+        "id": pool.get("id", ""),
+        "price0": price0,
+        "price1": 1.0 / price0 if sqrt_price > 0 else float("nan"),
+        "tick_price0": TICK_BASE ** int(float(pool.get("tick") or 0)) * scale,
+        "reserve0": (liquidity / sqrt_price if sqrt_price > 0 else 0.0) / 10.0 ** decimals0,
+        "reserve1": liquidity * sqrt_price / 10.0 ** decimals1,
+        "fee_tier": int(float(pool.get("feeTier") or 0)),
+    }
+
+
+__all__ = [
+    "PoolArrays",
+    "pools_to_arrays",
+    "records_to_arrays",
+    "spot_prices",
+    "tick_prices",
+    "virtual_reserves",
+    "analyze_arrays",
+    "analyze_pools",
+    "analyze_pool",
+    "exact_virtual_reserves",
+]
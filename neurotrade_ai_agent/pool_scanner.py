@@ -0,0 +1,221 @@
+import asyncio
+import heapq
+import itertools
+import os
+from operator import attrgetter
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+
+from metrics import registry
+from typed_json import PoolRecord, TokenRecord, decode_graph_list
+
+# 🔭 STREAMING SUBGRAPH SCANNER
+# Pages through every pool or token of a subgraph with `id_gt` cursors
+# (orderBy: id), which stays fast at any depth, unlike `skip`. The next page
+# is requested as soon as the current one arrives, so the network wait
+# overlaps with the caller's processing, and at most two pages are held in
+# memory at a time: the one being consumed and the one in flight.
+#
+# TopK keeps the best k records seen so far in a min-heap, so questions like
+# "the deepest USDC pools" stream the whole pool set through O(k) memory.
+
+SCAN_PAGE_SIZE = int(os.getenv("SCAN_PAGE_SIZE", "1000"))
+# The Graph caps `first` at 1000
+MAX_PAGE_SIZE = 1000
+
+POOL_FIELDS = """
+    id
+    feeTier
+    token0 { id symbol name decimals }
+    token1 { id symbol name decimals }
+    liquidity
+    sqrtPrice
+    tick
+    token0Price
+    token1Price
+    volumeUSD
+    txCount
+    totalValueLockedUSD
+"""
+
+TOKEN_FIELDS = """
+    id
+    symbol
+    name
+    decimals
+    derivedETH
+    totalSupply
+    volume
+    volumeUSD
+    feesUSD
+    txCount
+    totalValueLockedUSD
+"""
+
+ENTITIES: Dict[str, Tuple[str, type]] = {
+    "pools": (POOL_FIELDS, PoolRecord),
+    "tokens": (TOKEN_FIELDS, TokenRecord),
+}
+
+R = TypeVar("R")
+# (chain, query, label) -> raw response body, None on failure
+GraphRequest = Callable[[str, str, str], Awaitable[Optional[bytes]]]
+
+scan_pages_total = registry.counter(
+    "neurotrade_scan_pages_total", "Subgraph pages fetched by the streaming scanner", ("chain", "entity"),
+)
+
+
+class ScanError(Exception):
+    """A page could not be fetched; the scan stopped early"""
+
+
+def _where_clause(cursor: str, where: Optional[Dict[str, str]]) -> str:
+    filters = {**(where or {}), "id_gt": cursor}
+    return ", ".join(f'{key}: "{value}"' for key, value in filters.items())
+
+
+def page_query(entity: str, cursor: str, page_size: int, where: Optional[Dict[str, str]] = None) -> str:
+    """GraphQL for the page of `entity` after `cursor` (ids are ordered ascending)"""
+    fields, _ = ENTITIES[entity]
+    return f"""
+    {{
+        {entity}(first: {page_size}, orderBy: id, orderDirection: asc, where: {{{_where_clause(cursor, where)}}}) {{
+            {fields}
+        }}
+    }}
+    """
+
+
+async def scan_pages(
+    request: GraphRequest,
+    chain: str,
+    entity: str = "pools",
+    where: Optional[Dict[str, str]] = None,
+    page_size: int = SCAN_PAGE_SIZE,
+) -> AsyncIterator[List]:
+    """Yield every page of `entity` on `chain`, prefetching the next one
+
+    where adds equality filters (e.g. {"token0": "0x..."}). Raises ScanError
+    if a page fails or cannot be decoded, after yielding the pages that
+    succeeded.
+    """
+    _, record_type = ENTITIES[entity]
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    label = f"graph_scan_{entity}"
+
+    async def fetch(cursor: str) -> List:
+        raw = await request(chain, page_query(entity, cursor, page_size, where), label)
+        if raw is None:
+            raise ScanError(f"{chain} {entity} scan failed after cursor {cursor!r}")
+        try:
+            page = decode_graph_list(raw, entity, record_type, required=True)
+        except ValueError as e:
+            raise ScanError(f"{chain} {entity} scan got an unreadable page after cursor {cursor!r}: {e}") from e
+        scan_pages_total.inc(chain=chain, entity=entity)
+        return page
+
+    pending: Optional[asyncio.Task] = asyncio.ensure_future(fetch(""))
+    try:
+        while pending is not None:
+            page = await pending
+            pending = None
+            if len(page) == page_size:
+                # Cursor is known now: overlap the next request with the caller's work
+                pending = asyncio.ensure_future(fetch(page[-1].id))
+            if page:
+                yield page
+    finally:
+        # The caller stopped early: drop the prefetched page
+        if pending is not None:
+            if not pending.done():
+                pending.cancel()
+            elif not pending.cancelled():
+                pending.exception()
+
+
+async def scan(
+    request: GraphRequest,
+    chain: str,
+    entity: str = "pools",
+    where: Optional[Dict[str, str]] = None,
+    page_size: int = SCAN_PAGE_SIZE,
+) -> AsyncIterator:
+    """Yield every record of `entity` on `chain` one at a time (see scan_pages)"""
+    async for page in scan_pages(request, chain, entity, where, page_size):
+        for record in page:
+            yield record
+
+
+async def scan_pools_with_token(
+    request: GraphRequest, chain: str, token: str, page_size: int = SCAN_PAGE_SIZE,
+) -> AsyncIterator[PoolRecord]:
+    """Every pool that has `token` on either side"""
+    token = token.lower()
+    for side in ("token0", "token1"):
+        async for pool in scan(request, chain, "pools", {side: token}, page_size):
+            yield pool
+
+
+by_tvl = attrgetter("total_value_locked_usd")
+by_volume = attrgetter("volume_usd")
+
+
+class TopK(Generic[R]):
+    """Running top k items by key, in O(k) memory"""
+
+    def __init__(self, k: int, key: Callable[[R], float] = by_tvl):
+        self.k = max(1, k)
+        self.key = key
+        self._heap: List[Tuple[float, int, R]] = []
+        self._counter = itertools.count()
+        self.seen = 0
+
+    def push(self, item: R):
+        self.seen += 1
+        entry = (self.key(item), next(self._counter), item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[0] > self._heap[0][0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def extend(self, items):
+        for item in items:
+            self.push(item)
+
+    def items(self) -> List[R]:
+        """Best first"""
+        return [item for _, _, item in sorted(self._heap, key=lambda entry: (-entry[0], entry[1]))]
+
+
+async def top_k(records: AsyncIterable[R], k: int, key: Callable[[R], float] = by_tvl) -> List[R]:
+    """The k best records of an async stream by key, best first"""
+    best = TopK(k, key)
+    async for record in records:
+        best.push(record)
+    return best.items()
+
+
+async def deepest_pools(
+    request: GraphRequest, chain: str, token: Optional[str] = None, k: int = 10,
+    key: Callable[[PoolRecord], float] = by_tvl, page_size: int = SCAN_PAGE_SIZE,
+) -> List[PoolRecord]:
+    """Top k pools on a chain by TVL (or another key), optionally only those with `token`"""
+    if token is None:
+        records = scan(request, chain, "pools", page_size=page_size)
+    else:
+        records = scan_pools_with_token(request, chain, token, page_size)
+    return await top_k(records, k, key)
+
+
+__all__ = [
+    "ScanError",
+    "TopK",
+    "by_tvl",
+    "by_volume",
+    "deepest_pools",
+    "page_query",
+    "scan",
+    "scan_pages",
+    "scan_pools_with_token",
+    "top_k",
+]
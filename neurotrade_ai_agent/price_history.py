@@ -0,0 +1,306 @@
+import json
+import logging
+import os
+import re
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 🗄️ PRICE HISTORY
+# Append-only, memory-mapped columnar store of market ticks. Each
+# (chain, asset) series lives in its own directory with one float64 file per
+# column, so a time-range read is a binary search on the timestamp column
+# plus read-only slices of the mapped files (no copy, no full file read).
+#
+#   <PRICE_HISTORY_DIR>/<chain>/<ASSET>/raw/{timestamp,price,volume}.f64
+#   <PRICE_HISTORY_DIR>/<chain>/<ASSET>/1m|1h|1d/{timestamp,open,high,low,close,volume}.f64
+#
+# Every tick also updates 1m/1h/1d OHLC bars; each tier has its own
+# retention, after which rows are dropped (and the files compacted).
+# "volume" is the rolling 24h volume sampled at the tick, so bars keep the
+# last sample rather than a sum.
+
+PRICE_HISTORY_ENABLED = os.getenv("PRICE_HISTORY_ENABLED", "true").lower() == "true"
+PRICE_HISTORY_DIR = os.getenv("PRICE_HISTORY_DIR", "price_history")
+
+# Retention per tier in seconds (0 keeps rows forever)
+HISTORY_RETENTION = {
+    "raw": float(os.getenv("HISTORY_RAW_RETENTION", str(7 * 86400))),
+    "1m": float(os.getenv("HISTORY_1M_RETENTION", str(30 * 86400))),
+    "1h": float(os.getenv("HISTORY_1H_RETENTION", str(365 * 86400))),
+    "1d": float(os.getenv("HISTORY_1D_RETENTION", "0")),
+}
+
+RAW_COLUMNS = ("timestamp", "price", "volume")
+BAR_COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+ROLLUPS = (("1m", 60), ("1h", 3600), ("1d", 86400))
+RESOLUTIONS = ("raw",) + tuple(name for name, _ in ROLLUPS)
+
+INITIAL_CAPACITY = 1024
+# Expired rows are only compacted away once there are this many and they
+# make up at least half of the file
+COMPACT_MIN_ROWS = 4096
+
+# Columns are float64; NumPy is imported when a series is first opened
+_DTYPE = "float64"
+_ITEMSIZE = 8
+_UNSAFE_PATH_CHARS = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+class _Column:
+    """One growable float64 column backed by a memory-mapped file"""
+
+    def __init__(self, path: str, capacity: int):
+        import numpy as np
+        self.path = path
+        existing = os.path.getsize(path) // _ITEMSIZE if os.path.exists(path) else 0
+        capacity = max(existing, capacity)
+        if existing < capacity:
+            with open(path, "ab") as f:
+                f.truncate(capacity * _ITEMSIZE)
+        self.data = np.memmap(path, dtype=_DTYPE, mode="r+", shape=(capacity,))
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def grow(self, capacity: int):
+        """Extend the file and remap it (views of the old mapping stay valid)"""
+        import numpy as np
+        self.data.flush()
+        with open(self.path, "r+b") as f:
+            f.truncate(capacity * _ITEMSIZE)
+        self.data = np.memmap(self.path, dtype=_DTYPE, mode="r+", shape=(capacity,))
+
+    def flush(self):
+        self.data.flush()
+
+
+class _Table:
+    """Append-only set of equally long columns with a small JSON header
+
+    The header records the live row range [start, count); rows past count
+    (e.g. written before a crash but never flushed) are ignored.
+    """
+
+    def __init__(self, directory: str, columns: Sequence[str], retention: float = 0.0):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.retention = retention
+        self._meta_path = os.path.join(directory, "meta.json")
+        self.start, self.count = 0, 0
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path) as f:
+                meta = json.load(f)
+            self.start, self.count = int(meta.get("start", 0)), int(meta.get("count", 0))
+        capacity = max(INITIAL_CAPACITY, self.count)
+        self.columns = {
+            name: _Column(os.path.join(directory, f"{name}.f64"), capacity) for name in columns
+        }
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return self.count - self.start
+
+    @property
+    def _timestamps(self) -> "np.ndarray":
+        return self.columns["timestamp"].data[self.start:self.count]
+
+    def last_timestamp(self) -> Optional[float]:
+        if self.count <= self.start:
+            return None
+        return float(self.columns["timestamp"].data[self.count - 1])
+
+    def append(self, row: Sequence[float]):
+        capacity = len(self.columns["timestamp"])
+        if self.count >= capacity:
+            for column in self.columns.values():
+                column.grow(capacity * 2)
+        for column, value in zip(self.columns.values(), row):
+            column.data[self.count] = value
+        self.count += 1
+        self._dirty = True
+
+    def range(self, start: Optional[float] = None, end: Optional[float] = None) -> Dict[str, "np.ndarray"]:
+        """Read-only views of rows with start <= timestamp <= end"""
+        import numpy as np
+        timestamps = self._timestamps
+        lo = int(np.searchsorted(timestamps, start, side="left")) if start is not None else 0
+        hi = int(np.searchsorted(timestamps, end, side="right")) if end is not None else len(timestamps)
+        views = {}
+        for name, column in self.columns.items():
+            view = column.data[self.start + lo:self.start + max(lo, hi)].view(np.ndarray)
+            view.flags.writeable = False
+            views[name] = view
+        return views
+
+    def expire(self, now: float):
+        """Drop rows older than the retention window"""
+        if not self.retention or self.count <= self.start:
+            return
+        import numpy as np
+        cut = int(np.searchsorted(self._timestamps, now - self.retention, side="left"))
+        if cut:
+            self.start += cut
+            self._dirty = True
+        if self.start >= COMPACT_MIN_ROWS and self.start * 2 >= self.count:
+            self._compact()
+
+    def _compact(self):
+        live = self.count - self.start
+        for column in self.columns.values():
+            column.data[:live] = column.data[self.start:self.count]
+        logger.debug(f"🗜️ Compacted {self.directory}: dropped {self.start} expired rows")
+        self.start, self.count = 0, live
+        self._dirty = True
+
+    def flush(self):
+        """Sync column data, then publish the new row range"""
+        if not self._dirty:
+            return
+        for column in self.columns.values():
+            column.flush()
+        tmp_path = self._meta_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"start": self.start, "count": self.count, "columns": list(self.columns)}, f)
+        os.replace(tmp_path, self._meta_path)
+        self._dirty = False
+
+
+class PriceSeries:
+    """Raw ticks plus 1m/1h/1d OHLC rollups for one (asset, chain)"""
+
+    def __init__(self, directory: str, asset: str, chain: str, retention: Dict[str, float] = HISTORY_RETENTION):
+        self.asset = asset
+        self.chain = chain
+        self.raw = _Table(os.path.join(directory, "raw"), RAW_COLUMNS, retention.get("raw", 0))
+        self.rollups = {
+            name: _Table(os.path.join(directory, name), BAR_COLUMNS, retention.get(name, 0))
+            for name, _ in ROLLUPS
+        }
+        # Bars still in progress: [bucket, open, high, low, close, volume]
+        self._open_bars: Dict[str, List[float]] = {}
+        self._restore_open_bars()
+
+    def _restore_open_bars(self):
+        """Rebuild in-progress bars from raw ticks newer than the last stored bar"""
+        for name, width in ROLLUPS:
+            last = self.rollups[name].last_timestamp()
+            ticks = self.raw.range(start=last + width if last is not None else None)
+            for timestamp, price, volume in zip(ticks["timestamp"], ticks["price"], ticks["volume"]):
+                self._roll(name, width, float(timestamp), float(price), float(volume))
+
+    def _roll(self, name: str, width: int, timestamp: float, price: float, volume: float):
+        bucket = timestamp - timestamp % width
+        bar = self._open_bars.get(name)
+        if bar is not None and bar[0] != bucket:
+            self.rollups[name].append(bar)
+            bar = None
+        if bar is None:
+            self._open_bars[name] = [bucket, price, price, price, price, volume]
+        else:
+            bar[2] = max(bar[2], price)
+            bar[3] = min(bar[3], price)
+            bar[4] = price
+            bar[5] = volume
+
+    def append(self, timestamp: float, price: float, volume: float = 0.0) -> bool:
+        """Record one tick; ticks not newer than the last one are ignored"""
+        last = self.raw.last_timestamp()
+        if last is not None and timestamp <= last:
+            if timestamp < last:
+                logger.warning(f"Ignoring out-of-order {self.asset}/{self.chain} tick at {timestamp}")
+            return False
+        self.raw.append((timestamp, price, volume))
+        for name, width in ROLLUPS:
+            self._roll(name, width, timestamp, price, volume)
+        for table in self.tables():
+            table.expire(timestamp)
+        return True
+
+    def read(self, resolution: str = "raw", start: Optional[float] = None, end: Optional[float] = None) -> Dict[str, "np.ndarray"]:
+        """Zero-copy column views for a time range
+
+        Rollups only contain completed bars; see open_bar() for the current
+        one. Views stay valid until the next compaction, so copy them if you
+        keep them across refreshes.
+        """
+        if resolution == "raw":
+            return self.raw.range(start, end)
+        if resolution not in self.rollups:
+            raise ValueError(f"Unknown resolution {resolution!r}, expected one of {RESOLUTIONS}")
+        return self.rollups[resolution].range(start, end)
+
+    def open_bar(self, resolution: str) -> Optional[Dict[str, float]]:
+        bar = self._open_bars.get(resolution)
+        return dict(zip(BAR_COLUMNS, bar)) if bar else None
+
+    def tables(self) -> Tuple[_Table, ...]:
+        return (self.raw,) + tuple(self.rollups.values())
+
+    def flush(self):
+        for table in self.tables():
+            table.flush()
+
+
+class PriceHistoryStore:
+    """Directory of price series, opened lazily per (asset, chain)"""
+
+    def __init__(self, root: str = PRICE_HISTORY_DIR, retention: Optional[Dict[str, float]] = None):
+        self.root = root
+        self.retention = dict(HISTORY_RETENTION, **(retention or {}))
+        self._series: Dict[Tuple[str, str], PriceSeries] = {}
+
+    def series(self, asset: str, chain: str = "ethereum") -> PriceSeries:
+        key = (asset.upper(), chain.lower())
+        series = self._series.get(key)
+        if series is None:
+            directory = os.path.join(
+                self.root, _UNSAFE_PATH_CHARS.sub("_", key[1]), _UNSAFE_PATH_CHARS.sub("_", key[0])
+            )
+            series = self._series[key] = PriceSeries(directory, key[0], key[1], self.retention)
+        return series
+
+    def append(self, asset: str, chain: str, timestamp: float, price: float, volume: float = 0.0) -> bool:
+        return self.series(asset, chain).append(timestamp, price, volume)
+
+    def read(
+        self,
+        asset: str,
+        chain: str = "ethereum",
+        resolution: str = "raw",
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+    ) -> Dict[str, "np.ndarray"]:
+        return self.series(asset, chain).read(resolution, start, end)
+
+    def flush(self):
+        for series in self._series.values():
+            series.flush()
+
+    def close(self):
+        self.flush()
+        self._series.clear()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            f"{chain}:{asset}": {
+                "raw": len(series.raw),
+                **{name: len(table) for name, table in series.rollups.items()},
+            }
+            for (asset, chain), series in self._series.items()
+        }
+
+
+price_history = PriceHistoryStore()
+
+
+__all__ = [
+    "PRICE_HISTORY_ENABLED",
+    "PriceSeries",
+    "PriceHistoryStore",
+    "price_history",
+    "RESOLUTIONS",
+]
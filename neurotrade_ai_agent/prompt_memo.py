@@ -0,0 +1,68 @@
+import os
+import re
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from metrics import cache_requests_total
+
+# 🧾 PROMPT MEMO
+# Bounded LRU from a normalised chat prompt to what the remote
+# structured-output agent parsed it into, so a question that was already
+# asked ("eth price?", "ETH price") skips the agent-to-agent round trip.
+
+PROMPT_MEMO_SIZE = int(os.getenv("PROMPT_MEMO_SIZE", "2048"))
+
+_SEPARATORS = re.compile(r"[^\w$.,]+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Lower-case words joined by single spaces, without surrounding punctuation"""
+    words = (word.strip(".,") for word in _SEPARATORS.split(prompt.lower()))
+    return " ".join(word for word in words if word)
+
+
+class PromptMemo:
+    """LRU of normalised prompt -> parsed request"""
+
+    def __init__(self, max_size: int = PROMPT_MEMO_SIZE, name: str = "prompt_memo"):
+        self.max_size = max(1, max_size)
+        self.name = name
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, prompt: str) -> Optional[Any]:
+        key = normalize_prompt(prompt)
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            cache_requests_total.inc(cache=self.name, result="miss")
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        cache_requests_total.inc(cache=self.name, result="hit")
+        return value
+
+    def put(self, prompt: str, value: Any):
+        key = normalize_prompt(prompt)
+        if not key:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+__all__ = ["PromptMemo", "normalize_prompt"]
@@ -0,0 +1,266 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# 🛡️ UPSTREAM RESILIENCE
+# Every upstream endpoint (CoinGecko, each chain's subgraph) gets its own
+# circuit breaker: after BREAKER_FAILURE_THRESHOLD consecutive failures it
+# opens and calls fail fast with CircuitOpenError for BREAKER_RESET_TIMEOUT
+# seconds, then a single probe decides whether it closes again. Callers
+# answer from cached data meanwhile instead of queueing behind a slow or
+# rate-limiting service.
+#
+# With HEDGE_REQUESTS=true, a call that has not finished after the
+# endpoint's recent p95 latency sends a second, identical request and takes
+# whichever answers first. Hedges are capped at HEDGE_MAX_RATIO of calls so
+# a uniformly slow upstream does not receive double the traffic.
+
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+
+HEDGE_REQUESTS = os.getenv("HEDGE_REQUESTS", "false").lower() == "true"
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "0.05"))
+HEDGE_MAX_DELAY = float(os.getenv("HEDGE_MAX_DELAY", "2.0"))
+HEDGE_MAX_RATIO = float(os.getenv("HEDGE_MAX_RATIO", "0.1"))
+# Successful attempts needed before the p95 is trusted for hedging
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 200
+
+T = TypeVar("T")
+
+circuit_state = registry.gauge(
+    "neurotrade_circuit_state", "Upstream circuit breaker state (0 closed, 1 half-open, 2 open)", ("endpoint",),
+)
+circuit_rejected_total = registry.counter(
+    "neurotrade_circuit_rejected_total", "Upstream calls failed fast because the circuit was open", ("endpoint",),
+)
+hedged_requests_total = registry.counter(
+    "neurotrade_hedged_requests_total", "Hedged upstream requests sent, and how many answered first", ("endpoint", "result"),
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open"""
+
+
+class UpstreamError(Exception):
+    """Upstream answered, but with an error status"""
+
+
+# What an upstream call can fail with, for callers that fall back to cached
+# data: open circuit, error status, connection errors, timeouts and
+# malformed bodies (JSON decode errors are ValueErrors in every backend).
+# Built on first use, like the HTTP session, so importing this module does
+# not import aiohttp: `except upstream_failures():` is only evaluated once
+# something has been raised.
+_upstream_failures: Optional[Tuple[type, ...]] = None
+
+
+def upstream_failures() -> Tuple[type, ...]:
+    """Exception types an upstream call falls back to cached data on"""
+    global _upstream_failures
+    if _upstream_failures is None:
+        import aiohttp
+        _upstream_failures = (CircuitOpenError, UpstreamError, aiohttp.ClientError, asyncio.TimeoutError, ValueError)
+    return _upstream_failures
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe"""
+
+    CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+    _GAUGE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = BREAKER_RESET_TIMEOUT,
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.opened = 0
+        circuit_state.set(0, endpoint=name)
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._set_state(self.HALF_OPEN)
+        return self._state
+
+    def _set_state(self, state: str):
+        if state != self._state:
+            logger.info(f"🛡️ {self.name} circuit {self._state} -> {state}")
+        self._state = state
+        circuit_state.set(self._GAUGE[state], endpoint=self.name)
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now (half-open lets one probe through)"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self._failures = 0
+        self._probing = False
+        self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        self._failures += 1
+        self._probing = False
+        if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                self.opened += 1
+            self._opened_at = time.monotonic()
+            self._set_state(self.OPEN)
+
+    def record_cancelled(self):
+        """A call was cancelled before it could tell us anything"""
+        self._probing = False
+
+
+class Upstream:
+    """Circuit breaker, latency window and hedging policy for one endpoint"""
+
+    def __init__(self, name: str, hedge: bool = HEDGE_REQUESTS):
+        self.name = name
+        self.hedge = hedge
+        self.breaker = CircuitBreaker(name)
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.calls = 0
+        self.rejected = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def p95(self) -> Optional[float]:
+        """p95 of recent successful attempt latencies (None until there are enough)"""
+        if len(self._latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.hedge or self.breaker.state != CircuitBreaker.CLOSED:
+            return None
+        if self.hedges >= HEDGE_MAX_RATIO * self.calls:
+            return None
+        p95 = self.p95()
+        if p95 is None:
+            return None
+        return min(max(p95, HEDGE_MIN_DELAY), HEDGE_MAX_DELAY)
+
+    async def call(self, attempt: Callable[[], Awaitable[T]]) -> T:
+        """Run attempt() through the breaker, hedging it if enabled
+
+        attempt must be idempotent and raise on failure (UpstreamError for an
+        error status). Raises CircuitOpenError without calling it while the
+        circuit is open.
+        """
+        if not self.breaker.allow():
+            self.rejected += 1
+            circuit_rejected_total.inc(endpoint=self.name)
+            raise CircuitOpenError(f"{self.name} is unavailable (circuit open)")
+        self.calls += 1
+        delay = self._hedge_delay()
+        try:
+            if delay is None:
+                result = await self._timed(attempt)
+            else:
+                result = await self._hedged(attempt, delay)
+        except asyncio.CancelledError:
+            self.breaker.record_cancelled()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
+    async def _timed(self, attempt: Callable[[], Awaitable[T]]) -> T:
+        start = time.monotonic()
+        result = await attempt()
+        self._latencies.append(time.monotonic() - start)
+        return result
+
+    async def _hedged(self, attempt: Callable[[], Awaitable[T]], delay: float) -> T:
+        primary = asyncio.ensure_future(self._timed(attempt))
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return primary.result()
+            self.hedges += 1
+            hedged_requests_total.inc(endpoint=self.name, result="sent")
+            backup = asyncio.ensure_future(self._timed(attempt))
+            tasks.add(backup)
+            pending, error = set(tasks), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self.hedge_wins += 1
+                            hedged_requests_total.inc(endpoint=self.name, result="won")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()  # the loser's error is not worth a "never retrieved" warning
+
+    def stats(self) -> Dict[str, object]:
+        p95 = self.p95()
+        return {
+            "state": self.breaker.state,
+            "calls": self.calls,
+            "rejected": self.rejected,
+            "opened": self.breaker.opened,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+
+_upstreams: Dict[str, Upstream] = {}
+
+
+def upstream(name: str) -> Upstream:
+    """Shared Upstream for an endpoint name, created on first use"""
+    endpoint = _upstreams.get(name)
+    if endpoint is None:
+        endpoint = _upstreams[name] = Upstream(name)
+    return endpoint
+
+
+def upstream_stats() -> Dict[str, Dict[str, object]]:
+    return {name: endpoint.stats() for name, endpoint in _upstreams.items()}
+
+
+__all__ = [
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "upstream_failures",
+    "Upstream",
+    "UpstreamError",
+    "upstream",
+    "upstream_stats",
+]
@@ -0,0 +1,148 @@
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Dict, Optional, Tuple
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# 👥 SESSION REGISTRY
+# One bounded registry of chat sessions shared by every chat protocol.
+# Sessions are kept in least-recently-used order, so idle ones (no message
+# for SESSION_IDLE_TTL seconds) and the oldest ones beyond SESSION_MAX are
+# dropped from the front in O(1) - senders who never end their session no
+# longer stay in memory for the life of the agent.
+
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "1800"))
+SESSION_MAX = int(os.getenv("SESSION_MAX", "10000"))
+
+SessionKey = Tuple[str, str]
+
+sessions_evicted_total = registry.counter(
+    "neurotrade_sessions_evicted_total", "Chat sessions dropped without an explicit end", ("reason",),
+)
+
+
+class SessionRecord:
+    """One chat session (kept small: many of these can be alive at once)"""
+    __slots__ = ("protocol", "sender", "session_id", "started_at", "last_seen", "message_count")
+
+    def __init__(self, protocol: str, sender: str, session_id: str = "", now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+        self.protocol = protocol
+        self.sender = sender
+        self.session_id = session_id
+        self.started_at = now
+        self.last_seen = now
+        self.message_count = 0
+
+    @property
+    def duration(self) -> timedelta:
+        """Time since the session started, to the second"""
+        return timedelta(seconds=round(time.monotonic() - self.started_at))
+
+    def idle_for(self, now: Optional[float] = None) -> float:
+        return (time.monotonic() if now is None else now) - self.last_seen
+
+
+class SessionRegistry:
+    """Sessions keyed by (protocol, sender) with idle-TTL and max-size eviction"""
+
+    def __init__(self, idle_ttl: float = SESSION_IDLE_TTL, max_sessions: int = SESSION_MAX):
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max(1, max_sessions)
+        # Least recently seen first; last_seen only moves forward, so the
+        # front is always the most idle session
+        self._sessions: "OrderedDict[SessionKey, SessionRecord]" = OrderedDict()
+        self.started = 0
+        self.ended = 0
+        self.evicted_idle = 0
+        self.evicted_capacity = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def start(self, protocol: str, sender: str, session_id: str = "") -> SessionRecord:
+        """Open (or restart) the sender's session on protocol"""
+        now = time.monotonic()
+        self._expire(now)
+        key = (protocol, sender)
+        record = self._sessions[key] = SessionRecord(protocol, sender, session_id, now)
+        self._sessions.move_to_end(key)
+        self.started += 1
+        self._enforce_capacity()
+        return record
+
+    def touch(self, protocol: str, sender: str) -> SessionRecord:
+        """Count a message on the sender's session, opening one if needed"""
+        now = time.monotonic()
+        self._expire(now)
+        key = (protocol, sender)
+        record = self._sessions.get(key)
+        if record is None:
+            record = self._sessions[key] = SessionRecord(protocol, sender, now=now)
+            self.started += 1
+            self._enforce_capacity()
+        else:
+            self._sessions.move_to_end(key)
+        record.last_seen = now
+        record.message_count += 1
+        return record
+
+    def get(self, protocol: str, sender: str) -> Optional[SessionRecord]:
+        """The live session, without marking it as used"""
+        record = self._sessions.get((protocol, sender))
+        if record is not None and record.idle_for() > self.idle_ttl:
+            return None
+        return record
+
+    def end(self, protocol: str, sender: str) -> Optional[SessionRecord]:
+        """Close the session and return its record (None if unknown or expired)"""
+        record = self._sessions.pop((protocol, sender), None)
+        if record is None:
+            return None
+        if record.idle_for() > self.idle_ttl:
+            self.evicted_idle += 1
+            sessions_evicted_total.inc(reason="idle")
+            return None
+        self.ended += 1
+        return record
+
+    def _expire(self, now: float):
+        while self._sessions:
+            record = next(iter(self._sessions.values()))
+            if now - record.last_seen <= self.idle_ttl:
+                break
+            self._sessions.popitem(last=False)
+            self.evicted_idle += 1
+            sessions_evicted_total.inc(reason="idle")
+
+    def _enforce_capacity(self):
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evicted_capacity += 1
+            sessions_evicted_total.inc(reason="capacity")
+
+    def stats(self) -> Dict[str, int]:
+        self._expire(time.monotonic())
+        return {
+            "live": len(self._sessions),
+            "started": self.started,
+            "ended": self.ended,
+            "evicted_idle": self.evicted_idle,
+            "evicted_capacity": self.evicted_capacity,
+        }
+
+
+sessions = SessionRegistry()
+
+registry.gauge(
+    "neurotrade_sessions_live", "Chat sessions currently tracked",
+    callback=lambda: sessions.stats()["live"],
+)
+
+
+__all__ = ["SessionRecord", "SessionRegistry", "sessions"]
@@ -0,0 +1,140 @@
+import json
+import logging
+import os
+import struct
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Optional, Tuple
+
+from market_snapshot import MarketSnapshot
+from typed_json import loads
+
+logger = logging.getLogger(__name__)
+
+# 🧷 SHARED MARKET SNAPSHOT
+# In supervisor mode one process refreshes market data and publishes every
+# snapshot into a multiprocessing.shared_memory block; worker agents read it
+# from there instead of making their own upstream calls. The block is a
+# small header guarded by a sequence lock plus a JSON payload:
+#
+#   [sequence u64][length u64][published_at f64][payload ...]
+#
+# The writer makes the sequence odd while it writes and even when done;
+# a reader retries if the sequence was odd or changed under it. Workers
+# check the sequence alone first, and only copy the payload out of the
+# block and decode it when it moved, i.e. once per refresh. The copy is
+# what the seqlock validates (the writer may overwrite the block right
+# after), so decoding in place is not an option; a ~100 KB copy plus one
+# decode per refresh interval is noise next to the upstream calls saved.
+#
+# The payload carries the supervisor's created_at, so a worker's snapshot
+# ages from when the data was collected, not from when the worker read it.
+
+SHARED_SNAPSHOT_BYTES = int(os.getenv("SHARED_SNAPSHOT_BYTES", str(1024 * 1024)))
+
+_HEADER = struct.Struct("<QQd")
+_SEQUENCE = struct.Struct("<Q")
+READ_RETRIES = 100
+
+SNAPSHOT_FIELDS = ("prices", "change_24h", "volume_24h", "market_cap", "pools", "fetched_at", "indicators")
+
+
+def snapshot_to_dict(snapshot: MarketSnapshot) -> Dict[str, Any]:
+    """Plain, JSON-ready copy of the fields a snapshot is published from"""
+    data: Dict[str, Any] = {"created_at": snapshot.created_at}
+    for name in SNAPSHOT_FIELDS:
+        mapping = getattr(snapshot, name)
+        data[name] = {
+            key: dict(value) if hasattr(value, "items") else value for key, value in mapping.items()
+        }
+    return data
+
+
+class SharedSnapshot:
+    """Seqlock-protected market snapshot in a named shared memory block"""
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self._shm = shm
+        self.owner = owner
+        self.name = shm.name
+        self.capacity = shm.size - _HEADER.size
+        self._last_read = 0
+
+    @classmethod
+    def create(cls, name: str, size: int = SHARED_SNAPSHOT_BYTES) -> "SharedSnapshot":
+        """Create the block (replacing a stale one left by a crashed supervisor)"""
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=_HEADER.size + size)
+        except FileExistsError:
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=_HEADER.size + size)
+        _HEADER.pack_into(shm.buf, 0, 0, 0, 0.0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedSnapshot":
+        """Open an existing block read-side (the creator stays responsible for unlinking it)
+
+        Each worker is its own interpreter with its own resource tracker,
+        which would unlink the block when the worker exits; unregister it so
+        the block lives as long as the supervisor.
+        """
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, owner=False)
+
+    def publish(self, data: Dict[str, Any]) -> bool:
+        """Write a new snapshot; False if it does not fit"""
+        payload = json.dumps(data, separators=(",", ":")).encode()
+        if len(payload) > self.capacity:
+            logger.error(
+                f"Market snapshot is {len(payload)} bytes, shared block holds {self.capacity}; "
+                "raise SHARED_SNAPSHOT_BYTES"
+            )
+            return False
+        buf = self._shm.buf
+        sequence = _SEQUENCE.unpack_from(buf, 0)[0]
+        _SEQUENCE.pack_into(buf, 0, sequence + 1)
+        buf[_HEADER.size:_HEADER.size + len(payload)] = payload
+        _HEADER.pack_into(buf, 0, sequence + 1, len(payload), time.time())
+        _SEQUENCE.pack_into(buf, 0, sequence + 2)
+        return True
+
+    def read(self) -> Optional[Tuple[int, float, bytes]]:
+        """(sequence, published_at, payload) of a consistent read, None if nothing was published"""
+        buf = self._shm.buf
+        for _ in range(READ_RETRIES):
+            sequence, length, published_at = _HEADER.unpack_from(buf, 0)
+            if sequence == 0:
+                return None
+            if sequence & 1:
+                time.sleep(0)
+                continue
+            payload = bytes(buf[_HEADER.size:_HEADER.size + length])
+            if _SEQUENCE.unpack_from(buf, 0)[0] == sequence:
+                return sequence, published_at, payload
+        logger.warning("Gave up reading the shared market snapshot (writer too busy)")
+        return None
+
+    async def collect(self) -> Optional[Dict[str, Any]]:
+        """Snapshot data if a newer one was published since the last call, else None
+
+        Meant as a MarketSnapshotStore collector in worker processes.
+        """
+        if _SEQUENCE.unpack_from(self._shm.buf, 0)[0] == self._last_read:
+            return None
+        result = self.read()
+        if result is None or result[0] == self._last_read:
+            return None
+        self._last_read = result[0]
+        return loads(result[2])
+
+    def close(self):
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+
+__all__ = ["SharedSnapshot", "snapshot_to_dict"]
@@ -0,0 +1,50 @@
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+
+# ⏱️ STARTUP PROFILE
+# Wall-clock time of each startup phase (imports, agent construction,
+# protocol wiring, ...), printed by `python neurotrade_agent.py
+# --profile-startup` to see where cold-start time goes. Phases must not
+# overlap, or the total counts the same time twice.
+
+_phases: List[Tuple[str, float]] = []
+
+
+def record_phase(name: str, seconds: float):
+    _phases.append((name, seconds))
+
+
+@contextmanager
+def startup_phase(name: str) -> Iterator[None]:
+    """Time the enclosed block as one startup phase"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(name, time.perf_counter() - start)
+
+
+def startup_phases() -> List[Tuple[str, float]]:
+    return list(_phases)
+
+
+def recorded_seconds() -> float:
+    """Time already attributed to a phase (subtract it from an enclosing span)"""
+    return sum(seconds for _, seconds in _phases)
+
+
+def format_startup_profile() -> str:
+    """Per-phase timing table, slowest phases visible at a glance"""
+    total = sum(seconds for _, seconds in _phases)
+    width = max((len(name) for name, _ in _phases), default=5)
+    lines = ["⏱️ Startup profile", "=" * (width + 24)]
+    for name, seconds in _phases:
+        share = seconds / total if total else 0.0
+        lines.append(f"{name:<{width}}  {seconds * 1000:9.1f} ms  {share:6.1%}")
+    lines.append("-" * (width + 24))
+    lines.append(f"{'total':<{width}}  {total * 1000:9.1f} ms")
+    return "\n".join(lines)
+
+
+__all__ = ["record_phase", "startup_phase", "startup_phases", "recorded_seconds", "format_startup_profile"]
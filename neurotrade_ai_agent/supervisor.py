@@ -0,0 +1,430 @@
+import argparse
+import hashlib
+import logging
+import os
+import subprocess
+import sys
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List, Optional, Type
+
+from dotenv import load_dotenv
+from uagents.crypto import Identity
+from uagents.resolver import GlobalResolver, Resolver, RulesBasedResolver
+from uagents_core.models import Model
+
+from metrics import registry
+from shared_snapshot import SharedSnapshot, snapshot_to_dict
+
+if TYPE_CHECKING:
+    from uagents import Agent, Context
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# 🧩 MULTI-PROCESS SUPERVISOR
+# `python supervisor.py --workers N` runs the agent as N+1 processes. The
+# dispatcher keeps the public NeuroTrade address (same seed, port and
+# mailbox), refreshes market data once and publishes every snapshot into a
+# shared memory block (shared_snapshot.py). Worker agents listen on local
+# ports only, read the snapshot from that block and run the normal message
+# handlers, so CPU-bound work (intent parsing, pool math, rendering) spreads
+# over several cores.
+#
+# uAgents addresses belong to a single agent, so messages cannot simply be
+# load-balanced across processes: the dispatcher wraps each inbound message
+# in a ShardRequest for a worker, and the worker's replies come back as
+# ShardReply envelopes that the dispatcher sends on from the public
+# address. A sender is pinned to one worker by hash, and a conversation
+# session to the worker that last answered in it, so the structured-output
+# round trip of a chat message returns to the worker waiting for it.
+
+AGENT_SEED = os.getenv("AGENT_SEED", "neurotrade_ai_agent_seed_2024")
+AGENT_PORT = int(os.getenv("AGENT_PORT", "8001"))
+
+SHARD_BASE_PORT = int(os.getenv("SHARD_BASE_PORT", str(AGENT_PORT + 100)))
+SHARED_SNAPSHOT_POLL = float(os.getenv("SHARED_SNAPSHOT_POLL", "1"))
+SHARD_SESSION_ROUTES = int(os.getenv("SHARD_SESSION_ROUTES", "100000"))
+SHARED_SNAPSHOT_NAME = os.getenv("SHARED_SNAPSHOT_NAME", f"neurotrade_snapshot_{AGENT_PORT}")
+
+# Set by the supervisor in each worker's environment
+SHARD_DISPATCHER_ADDRESS = os.getenv("SHARD_DISPATCHER_ADDRESS", "")
+SHARD_DISPATCHER_ENDPOINT = os.getenv("SHARD_DISPATCHER_ENDPOINT", f"http://127.0.0.1:{AGENT_PORT}/submit")
+
+shard_messages_total = registry.counter(
+    "neurotrade_shard_messages_total",
+    "Messages relayed between the dispatcher and its workers",
+    ("worker", "direction"),
+)
+
+
+class ShardRequest(Model):
+    """Inbound message relayed from the dispatcher to a worker"""
+    sender: str
+    schema_digest: str
+    payload: str
+
+
+class ShardReply(Model):
+    """Outbound message a worker asks the dispatcher to send"""
+    destination: str
+    schema_digest: str
+    payload: str
+
+
+@lru_cache(maxsize=None)
+def relay_models() -> Dict[str, Type[Model]]:
+    """Schema digest -> model for every message the agent sends or receives"""
+    from uagents_core.contrib.protocols.chat import ChatAcknowledgement, ChatMessage
+
+    from chat_proto import StructuredOutputPrompt, StructuredOutputResponse
+    from neurotrade_agent import GenericMessage, SimpleMessage, TradingQueryMessage, TradingResponseMessage
+
+    models = (
+        TradingQueryMessage, TradingResponseMessage, SimpleMessage, GenericMessage,
+        ChatMessage, ChatAcknowledgement, StructuredOutputPrompt, StructuredOutputResponse,
+    )
+    return {Model.build_schema_digest(model): model for model in models}
+
+
+def encode(message: Model) -> Dict[str, str]:
+    return {"schema_digest": Model.build_schema_digest(message), "payload": message.json()}
+
+
+def decode(schema_digest: str, payload: str) -> Optional[Model]:
+    model = relay_models().get(schema_digest)
+    return model.parse_raw(payload) if model is not None else None
+
+
+def shard_for(sender: str, workers: int) -> int:
+    """Worker index for a sender, stable across processes and restarts"""
+    digest = hashlib.blake2b(sender.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % workers
+
+
+def worker_seed(index: int) -> str:
+    return f"{AGENT_SEED}_worker_{index}"
+
+
+def worker_port(index: int) -> int:
+    # Every worker takes two ports: the agent and its metrics endpoint
+    return SHARD_BASE_PORT + 2 * index
+
+
+def worker_endpoint(index: int) -> str:
+    return f"http://127.0.0.1:{worker_port(index)}/submit"
+
+
+def worker_address(index: int) -> str:
+    return Identity.from_seed(worker_seed(index), 0).address
+
+
+class SessionRoutes:
+    """Bounded LRU of conversation session -> worker index"""
+
+    def __init__(self, max_size: int = SHARD_SESSION_ROUTES):
+        self.max_size = max(1, max_size)
+        self._routes: "OrderedDict[str, int]" = OrderedDict()
+
+    def get(self, session: str) -> Optional[int]:
+        index = self._routes.get(session)
+        if index is not None:
+            self._routes.move_to_end(session)
+        return index
+
+    def remember(self, session: str, index: int):
+        self._routes[session] = index
+        self._routes.move_to_end(session)
+        while len(self._routes) > self.max_size:
+            self._routes.popitem(last=False)
+
+
+# === WORKER SIDE ===
+
+class RelayContext:
+    """Handler context for a relayed message; send() goes back through the dispatcher"""
+
+    def __init__(self, ctx: "Context", dispatcher: str):
+        self._ctx = ctx
+        self._dispatcher = dispatcher
+
+    @property
+    def logger(self):
+        return self._ctx.logger
+
+    @property
+    def storage(self):
+        return self._ctx.storage
+
+    @property
+    def session(self):
+        return self._ctx.session
+
+    async def send(self, destination: str, message: Model, **kwargs):
+        await self._ctx.send(self._dispatcher, ShardReply(destination=destination, **encode(message)), **kwargs)
+
+
+def worker_handlers() -> Dict[Type[Model], Callable[..., Awaitable[None]]]:
+    """The regular message handlers, by the model they accept"""
+    from uagents_core.contrib.protocols.chat import ChatAcknowledgement, ChatMessage
+
+    import chat_proto
+    import neurotrade_agent as app
+
+    return {
+        app.TradingQueryMessage: app.handle_trading_query_message,
+        app.SimpleMessage: app.handle_simple_message,
+        app.GenericMessage: app.handle_generic_message,
+        ChatMessage: chat_proto.handle_message,
+        ChatAcknowledgement: chat_proto.handle_ack,
+        chat_proto.StructuredOutputResponse: chat_proto.handle_structured_output_response,
+    }
+
+
+def run_worker(index: int) -> int:
+    """Worker process: the normal agent on a local endpoint, fed by the shared snapshot"""
+    import neurotrade_agent as app
+    from market_snapshot import market_snapshots
+
+    reader = SharedSnapshot.attach(SHARED_SNAPSHOT_NAME)
+
+    async def collect_shared_snapshot():
+        data = await reader.collect()
+        if data is not None:
+            # The watched pools' fresh reserves, as the dispatcher applies them to its own graph
+            app.update_route_pools(data.get("pools", {}))
+        return data
+
+    # Replaces the upstream collector: workers never call CoinGecko or The Graph
+    market_snapshots.set_collector(collect_shared_snapshot)
+
+    agent = app.get_agent(
+        name=f"NeuroTrade-worker-{index}",
+        endpoint=[worker_endpoint(index)],
+        resolve=RulesBasedResolver({SHARD_DISPATCHER_ADDRESS: SHARD_DISPATCHER_ENDPOINT}),
+    )
+    handlers = worker_handlers()
+
+    async def handle_shard_request(ctx: "Context", sender: str, request: ShardRequest):
+        if sender != SHARD_DISPATCHER_ADDRESS:
+            ctx.logger.warning(f"Ignoring shard request from {sender}")
+            return
+        message = decode(request.schema_digest, request.payload)
+        handler = handlers.get(type(message))
+        if handler is None:
+            ctx.logger.error(f"No handler for relayed message {request.schema_digest}")
+            return
+        shard_messages_total.inc(worker=str(index), direction="in")
+        await handler(RelayContext(ctx, SHARD_DISPATCHER_ADDRESS), request.sender, message)
+
+    agent.on_message(model=ShardRequest)(handle_shard_request)
+    logger.info(f"🧩 Worker {index} listening on {worker_endpoint(index)} as {agent.address}")
+    try:
+        agent.run()
+    finally:
+        reader.close()
+    return 0
+
+
+# === DISPATCHER SIDE ===
+
+class Dispatcher:
+    """Routes inbound messages to workers and sends their replies on"""
+
+    def __init__(self, workers: List[str]):
+        self.workers = workers
+        self._worker_index = {address: index for index, address in enumerate(workers)}
+        self.sessions = SessionRoutes()
+
+    def route(self, sender: str, session: str) -> int:
+        index = self.sessions.get(session)
+        if index is None:
+            index = shard_for(sender, len(self.workers))
+        return index
+
+    async def forward(self, ctx: "Context", sender: str, msg: Model):
+        index = self.route(sender, str(ctx.session))
+        shard_messages_total.inc(worker=str(index), direction="in")
+        await ctx.send(self.workers[index], ShardRequest(sender=sender, **encode(msg)))
+
+    async def deliver(self, ctx: "Context", sender: str, reply: ShardReply):
+        index = self._worker_index.get(sender)
+        if index is None:
+            ctx.logger.warning(f"Ignoring shard reply from {sender}")
+            return
+        message = decode(reply.schema_digest, reply.payload)
+        if message is None:
+            ctx.logger.error(f"Worker {index} sent an unknown message type {reply.schema_digest}")
+            return
+        # Whatever comes back in this session (e.g. the structured-output
+        # answer) belongs to the worker that is waiting for it
+        self.sessions.remember(str(ctx.session), index)
+        shard_messages_total.inc(worker=str(index), direction="out")
+        await ctx.send(reply.destination, message)
+
+
+class ShardResolver(Resolver):
+    """Local endpoints for the workers, the normal resolver for everyone else"""
+
+    def __init__(self, rules: Dict[str, str]):
+        self._rules = rules
+        self._fallback = GlobalResolver()
+
+    async def resolve(self, destination: str):
+        endpoint = self._rules.get(destination)
+        if endpoint is not None:
+            return destination, [endpoint]
+        return await self._fallback.resolve(destination)
+
+
+def build_dispatcher(workers: int, shared: SharedSnapshot) -> "Agent":
+    """The public agent: market data refresh, snapshot publishing and relaying"""
+    from uagents import Agent, Protocol
+    from uagents_core.contrib.protocols.chat import ChatAcknowledgement, ChatMessage, chat_protocol_spec
+
+    import neurotrade_agent as app
+    from chat_proto import StructuredOutputResponse
+    from graph_cache import graph_cache
+    from http_client import close_session, open_session
+    from market_snapshot import market_snapshots
+    from metrics import start_metrics_server, stop_metrics_server
+    from price_history import price_history
+    from swap_router import stop_pool_graph_sync
+    from token_index import token_index
+
+    addresses = [worker_address(index) for index in range(workers)]
+    dispatcher = Dispatcher(addresses)
+    agent = Agent(
+        name="NeuroTrade",
+        seed=AGENT_SEED,
+        mailbox=True,
+        port=AGENT_PORT,
+        endpoint="https://agentverse.ai/v1/submit",
+        resolve=ShardResolver({address: worker_endpoint(index) for index, address in enumerate(addresses)}),
+    )
+
+    async def refresh_shared_snapshot(ctx: "Context"):
+        await app.update_market_data(ctx)
+        snapshot = market_snapshots.current()
+        if snapshot is not None:
+            shared.publish(snapshot_to_dict(snapshot))
+
+    async def startup(ctx: "Context"):
+        ctx.logger.info(f"🧩 Dispatching to {workers} workers, agent address: {agent.address}")
+        app.start_funding(agent.wallet.address())
+        await open_session()
+        await start_metrics_server()
+        app.warm_up_indicators()
+        await refresh_shared_snapshot(ctx)
+        token_index.load()
+        token_index.start_refresh(app.trading_data._graph_request, app.GRAPH_ENDPOINTS)
+        app.start_route_graph()
+
+    async def shutdown(ctx: "Context"):
+        await stop_metrics_server()
+        await token_index.stop()
+        await stop_pool_graph_sync()
+        await close_session()
+        price_history.close()
+        graph_cache.close()
+
+    agent.on_interval(period=app.SNAPSHOT_REFRESH_INTERVAL)(refresh_shared_snapshot)
+    agent.on_event("startup")(startup)
+    agent.on_event("shutdown")(shutdown)
+    for model in (app.TradingQueryMessage, app.SimpleMessage, app.GenericMessage):
+        agent.on_message(model=model)(dispatcher.forward)
+    agent.on_message(model=ShardReply)(dispatcher.deliver)
+
+    chat = Protocol(spec=chat_protocol_spec)
+    chat.on_message(ChatMessage)(dispatcher.forward)
+    chat.on_message(ChatAcknowledgement)(dispatcher.forward)
+    structured_output = Protocol(name="StructuredOutputClientProtocol", version="0.1.0")
+    structured_output.on_message(StructuredOutputResponse)(dispatcher.forward)
+    agent.include(chat, publish_manifest=True)
+    agent.include(structured_output, publish_manifest=True)
+    return agent
+
+
+def worker_env(index: int, dispatcher_address: str) -> Dict[str, str]:
+    """Environment of one worker process"""
+    from swap_router import ROUTER_GRAPH_PATH
+
+    env = dict(os.environ)
+    env.update({
+        "SHARD_WORKER_INDEX": str(index),
+        "SHARD_DISPATCHER_ADDRESS": dispatcher_address,
+        "SHARD_DISPATCHER_ENDPOINT": f"http://127.0.0.1:{AGENT_PORT}/submit",
+        "SHARED_SNAPSHOT_NAME": SHARED_SNAPSHOT_NAME,
+        "SHARD_BASE_PORT": str(SHARD_BASE_PORT),
+        "AGENT_SEED": worker_seed(index),
+        "AGENT_PORT": str(worker_port(index)),
+        "METRICS_PORT": str(worker_port(index) + 1),
+        # Only the dispatcher records history and holds testnet funds
+        "PRICE_HISTORY_ENABLED": "false",
+        "FUND_AGENT": "false",
+        # Workers load the dispatcher's token index file instead of scanning
+        "TOKEN_INDEX_REFRESH_INTERVAL": "0",
+        # ... and follow the dispatcher's pool graph file instead of scanning every pool
+        "ROUTER_SYNC_INTERVAL": "0",
+        "ROUTER_GRAPH_PATH": os.path.abspath(ROUTER_GRAPH_PATH),
+        "SNAPSHOT_REFRESH_INTERVAL": str(SHARED_SNAPSHOT_POLL),
+    })
+    return env
+
+
+def run_supervisor(workers: int) -> int:
+    """Start the workers, run the dispatcher until it stops, then clean up"""
+    dispatcher_address = Identity.from_seed(AGENT_SEED, 0).address
+    shared = SharedSnapshot.create(SHARED_SNAPSHOT_NAME)
+    here = os.path.dirname(os.path.abspath(__file__))
+    processes: List[subprocess.Popen] = []
+    try:
+        for index in range(workers):
+            processes.append(subprocess.Popen(
+                [sys.executable, os.path.join(here, "supervisor.py"), "--worker", str(index)],
+                env=worker_env(index, dispatcher_address),
+                cwd=here,
+            ))
+        print(f"🧩 Started {workers} workers on ports {worker_port(0)}-{worker_port(workers - 1)}")
+        build_dispatcher(workers, shared).run()
+    except KeyboardInterrupt:
+        print("\n🛑 Supervisor stopped by user")
+    finally:
+        for process in processes:
+            process.terminate()
+        deadline = time.monotonic() + 10
+        for process in processes:
+            try:
+                process.wait(timeout=max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                process.kill()
+        shared.close()
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="NeuroTrade agent with sharded worker processes")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of worker agents")
+    parser.add_argument("--worker", type=int, default=None, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+__all__ = [
+    "Dispatcher",
+    "RelayContext",
+    "SessionRoutes",
+    "ShardReply",
+    "ShardRequest",
+    "run_supervisor",
+    "run_worker",
+    "shard_for",
+]
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.worker is not None:
+        sys.exit(run_worker(args.worker))
+    sys.exit(run_supervisor(max(1, args.workers)))
@@ -0,0 +1,429 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from dataclasses import astuple, dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from intent import Intent
+from metrics import registry
+from pool_math import Q96_FLOAT
+from pool_scanner import GraphRequest, ScanError, scan_pages
+from token_index import token_index
+from typed_json import PoolRecord, loads
+
+logger = logging.getLogger(__name__)
+
+# 🧭 SWAP ROUTE FINDER
+# An in-memory token graph per chain: tokens are nodes, every pool is an
+# edge quoted as a constant-product curve over its in-range virtual
+# reserves (L / sqrtP and L * sqrtP), net of the fee tier, so price, fee
+# and liquidity depth all show up in the amount a hop returns.
+#
+# best_route() searches routes of up to 3 hops, hop by hop, keeping only the
+# best amount reached per token. Intermediate hops follow each token's
+# ROUTE_FANOUT deepest pools; the last hop looks up the pools of the
+# (token, target) pair directly, so a thin but direct pool is never missed.
+# That bounds a search to roughly fanout² quotes whatever the graph size.
+#
+# Pools are updated in place as they refresh (the market snapshot's
+# watched pools every tick, a full subgraph scan every
+# ROUTER_SYNC_INTERVAL); only the touched tokens' fan-out lists are
+# re-ranked, on their next use. Every full sync is saved to
+# ROUTER_GRAPH_PATH. With ROUTER_SYNC_INTERVAL=0 (supervisor workers) the
+# process never scans and reloads that file whenever it changes instead.
+
+ROUTE_MAX_HOPS = 3
+ROUTE_FANOUT = int(os.getenv("ROUTE_FANOUT", "32"))
+ROUTER_CHAINS = [chain.strip() for chain in os.getenv("ROUTER_CHAINS", "ethereum").split(",") if chain.strip()]
+ROUTER_SYNC_INTERVAL = float(os.getenv("ROUTER_SYNC_INTERVAL", "1800"))
+ROUTER_MIN_TVL = float(os.getenv("ROUTER_MIN_TVL", os.getenv("MIN_LIQUIDITY_USD", "10000")))
+ROUTER_RETRY_DELAY = 300
+ROUTER_GRAPH_PATH = os.getenv("ROUTER_GRAPH_PATH", "pool_graph.json")
+# How often (seconds) a process that does not sync checks the graph file
+ROUTER_GRAPH_POLL = float(os.getenv("ROUTER_GRAPH_POLL", "60"))
+
+route_seconds = registry.histogram(
+    "neurotrade_route_seconds", "Time to find the best swap route", ("chain",),
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5),
+)
+
+PairKey = Tuple[str, str]
+
+
+def pair_key(token_a: str, token_b: str) -> PairKey:
+    return (token_a, token_b) if token_a < token_b else (token_b, token_a)
+
+
+@dataclass(frozen=True)
+class PoolEdge:
+    """One pool as a two-way edge between its tokens"""
+    pool_id: str
+    token0: str
+    token1: str
+    reserve0: float   # virtual reserves in token units
+    reserve1: float
+    fee: float        # fraction, e.g. 0.003
+    tvl_usd: float
+
+    def other(self, token: str) -> str:
+        return self.token1 if token == self.token0 else self.token0
+
+    def quote(self, token_in: str, amount_in: float) -> float:
+        """Output amount for amount_in of token_in (x * y = k over the virtual reserves)"""
+        if token_in == self.token0:
+            reserve_in, reserve_out = self.reserve0, self.reserve1
+        else:
+            reserve_in, reserve_out = self.reserve1, self.reserve0
+        amount = amount_in * (1.0 - self.fee)
+        return reserve_out * amount / (reserve_in + amount)
+
+
+def pool_edge(pool: PoolRecord) -> Optional[PoolEdge]:
+    """Edge for a pool record, None if it has no usable liquidity"""
+    if pool.token0 is None or pool.token1 is None or pool.sqrt_price <= 0 or pool.liquidity <= 0:
+        return None
+    sqrt_price = pool.sqrt_price / Q96_FLOAT
+    reserve0 = pool.liquidity / sqrt_price / 10.0 ** pool.token0.decimals
+    reserve1 = pool.liquidity * sqrt_price / 10.0 ** pool.token1.decimals
+    if not (reserve0 > 0 and reserve1 > 0):
+        return None
+    return PoolEdge(
+        pool_id=pool.id.lower(),
+        token0=pool.token0.id.lower(),
+        token1=pool.token1.id.lower(),
+        reserve0=reserve0,
+        reserve1=reserve1,
+        fee=pool.fee_tier / 1_000_000,
+        tvl_usd=pool.total_value_locked_usd,
+    )
+
+
+@dataclass(frozen=True)
+class Route:
+    """Best path found for a swap"""
+    tokens: Tuple[str, ...]
+    pools: Tuple[str, ...]
+    amount_in: float
+    amount_out: float
+
+    @property
+    def hops(self) -> int:
+        return len(self.pools)
+
+    @property
+    def price(self) -> float:
+        """Output per unit of input, after fees and price impact"""
+        return self.amount_out / self.amount_in if self.amount_in else 0.0
+
+
+class PoolGraph:
+    """Token graph of one chain's pools, updated pool by pool"""
+
+    def __init__(self, chain: str = "ethereum", fanout: int = ROUTE_FANOUT):
+        self.chain = chain
+        self.fanout = max(1, fanout)
+        self._pools: Dict[str, PoolEdge] = {}
+        self._by_token: Dict[str, Dict[str, PoolEdge]] = defaultdict(dict)
+        self._pairs: Dict[PairKey, Dict[str, PoolEdge]] = defaultdict(dict)
+        # token -> its deepest pools, dropped whenever one of its pools changes
+        self._ranked: Dict[str, List[PoolEdge]] = {}
+        self.updated_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._pools)
+
+    @property
+    def token_count(self) -> int:
+        return len(self._by_token)
+
+    def update_pool(self, pool: PoolRecord) -> bool:
+        """Insert or replace a pool's edge; pools without liquidity are removed"""
+        edge = pool_edge(pool)
+        if edge is None:
+            self.remove_pool(pool.id.lower())
+            return False
+        self._insert(edge)
+        return True
+
+    def _insert(self, edge: PoolEdge):
+        previous = self._pools.get(edge.pool_id)
+        if previous is not None and (previous.token0, previous.token1) != (edge.token0, edge.token1):
+            self.remove_pool(edge.pool_id)
+        self._pools[edge.pool_id] = edge
+        self._by_token[edge.token0][edge.pool_id] = edge
+        self._by_token[edge.token1][edge.pool_id] = edge
+        self._pairs[pair_key(edge.token0, edge.token1)][edge.pool_id] = edge
+        self._ranked.pop(edge.token0, None)
+        self._ranked.pop(edge.token1, None)
+        self.updated_at = time.time()
+
+    def update_pools(self, pools: Iterable[PoolRecord]) -> int:
+        return sum(self.update_pool(pool) for pool in pools)
+
+    def remove_pool(self, pool_id: str):
+        edge = self._pools.pop(pool_id, None)
+        if edge is None:
+            return
+        for token in (edge.token0, edge.token1):
+            edges = self._by_token.get(token)
+            if edges is not None:
+                edges.pop(pool_id, None)
+                if not edges:
+                    del self._by_token[token]
+            self._ranked.pop(token, None)
+        key = pair_key(edge.token0, edge.token1)
+        pair = self._pairs.get(key)
+        if pair is not None:
+            pair.pop(pool_id, None)
+            if not pair:
+                del self._pairs[key]
+
+    def retain(self, pool_ids: Set[str]) -> int:
+        """Drop every pool not in pool_ids (after a full rescan); returns how many"""
+        stale = [pool_id for pool_id in self._pools if pool_id not in pool_ids]
+        for pool_id in stale:
+            self.remove_pool(pool_id)
+        return len(stale)
+
+    def _fanout(self, token: str) -> List[PoolEdge]:
+        ranked = self._ranked.get(token)
+        if ranked is None:
+            edges = self._by_token.get(token, {}).values()
+            ranked = self._ranked[token] = sorted(edges, key=lambda edge: -edge.tvl_usd)[:self.fanout]
+        return ranked
+
+    def best_route(
+        self, token_in: str, token_out: str, amount_in: float, max_hops: int = ROUTE_MAX_HOPS,
+    ) -> Optional[Route]:
+        """Route of at most max_hops pools giving the most token_out for amount_in"""
+        token_in, token_out = token_in.lower(), token_out.lower()
+        if token_in == token_out or amount_in <= 0:
+            return None
+        start = time.perf_counter()
+        max_hops = max(1, min(max_hops, ROUTE_MAX_HOPS))
+        best: Optional[Route] = None
+        # token -> (amount held, tokens so far, pools so far)
+        frontier: Dict[str, Tuple[float, Tuple[str, ...], Tuple[str, ...]]] = {
+            token_in: (amount_in, (token_in,), ()),
+        }
+
+        for hop in range(1, max_hops + 1):
+            for token, (amount, path, pools) in frontier.items():
+                for edge in self._pairs.get(pair_key(token, token_out), {}).values():
+                    out = edge.quote(token, amount)
+                    if best is None or out > best.amount_out:
+                        best = Route(path + (token_out,), pools + (edge.pool_id,), amount_in, out)
+            if hop == max_hops:
+                break
+            next_frontier: Dict[str, Tuple[float, Tuple[str, ...], Tuple[str, ...]]] = {}
+            for token, (amount, path, pools) in frontier.items():
+                for edge in self._fanout(token):
+                    neighbour = edge.other(token)
+                    if neighbour == token_out or neighbour in path:
+                        continue
+                    out = edge.quote(token, amount)
+                    reached = next_frontier.get(neighbour)
+                    if reached is None or out > reached[0]:
+                        next_frontier[neighbour] = (out, path + (neighbour,), pools + (edge.pool_id,))
+            if not next_frontier:
+                break
+            frontier = next_frontier
+
+        route_seconds.observe(time.perf_counter() - start, chain=self.chain)
+        return best
+
+    def edges(self) -> Iterable[PoolEdge]:
+        return self._pools.values()
+
+    @classmethod
+    def from_edges(cls, chain: str, edges: Iterable[PoolEdge]) -> "PoolGraph":
+        graph = cls(chain)
+        for edge in edges:
+            graph._insert(edge)
+        return graph
+
+    def stats(self) -> Dict[str, object]:
+        return {"pools": len(self._pools), "tokens": len(self._by_token), "updated_at": self.updated_at}
+
+
+_graphs: Dict[str, PoolGraph] = {}
+
+
+def pool_graph(chain: str) -> PoolGraph:
+    """Shared PoolGraph for a chain, created on first use"""
+    graph = _graphs.get(chain)
+    if graph is None:
+        graph = _graphs[chain] = PoolGraph(chain)
+    return graph
+
+
+def describe_swap(query: str, intent: Intent) -> Optional[str]:
+    """Best route between the first two tokens a swap query mentions, None if there is none
+
+    Tokens are resolved from the local index on the query's chain; the
+    amount is the first one given for the source token (or 1).
+    """
+    mentions = token_index.resolve_mentions(query, intent)
+    if len(mentions) < 2:
+        return None
+    (source, source_entry), (target, target_entry) = mentions[:2]
+    if source_entry is None or target_entry is None:
+        return None
+    chain = intent.chains[0] if intent.chains else "ethereum"
+    amount = next((value for value, symbol in intent.amounts if symbol in (None, source)), 1.0)
+    route = pool_graph(chain).best_route(source_entry.address, target_entry.address, amount)
+    if route is None:
+        return None
+    path = " → ".join(_route_symbol(address, chain) for address in route.tokens)
+    return (
+        f"🔄 {_token_label(source, source_entry.address)} → {_token_label(target, target_entry.address)} "
+        f"Swap on {chain.title()}: best route {path} ({route.hops} hop{'s' if route.hops > 1 else ''}): "
+        f"{amount:g} {source} ≈ {route.amount_out:,.6g} {target} after fees and price impact."
+    )
+
+
+def _token_label(symbol: str, address: str) -> str:
+    return f"{symbol} ({address[:6]}…{address[-4:]})"
+
+
+def _route_symbol(address: str, chain: str) -> str:
+    entry = token_index.resolve(address, chain)
+    return entry.symbol if entry else f"{address[:6]}…{address[-4:]}"
+
+
+def save_pool_graphs(path: str = ROUTER_GRAPH_PATH):
+    """Write every chain's graph to the graph file (atomically)"""
+    snapshot = {
+        "saved_at": time.time(),
+        "chains": {chain: [astuple(edge) for edge in graph.edges()] for chain, graph in _graphs.items()},
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(snapshot, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def load_pool_graphs(path: str = ROUTER_GRAPH_PATH) -> int:
+    """Replace the graphs of the chains in the graph file; returns the number of pools"""
+    try:
+        with open(path, "rb") as f:
+            snapshot = loads(f.read())
+        # Built aside and swapped in whole, so routes never see a half-loaded graph
+        graphs = {
+            chain: PoolGraph.from_edges(chain, (PoolEdge(*row) for row in rows))
+            for chain, rows in snapshot.get("chains", {}).items()
+        }
+    except FileNotFoundError:
+        return 0
+    except (OSError, ValueError, TypeError) as e:
+        logger.warning(f"Ignoring unreadable pool graph {path}: {e}")
+        return 0
+    _graphs.update(graphs)
+    count = sum(len(graph) for graph in graphs.values())
+    logger.info(f"🧭 Pool graph loaded: {count} pools on {len(graphs)} chains")
+    return count
+
+
+async def sync_pool_graph(request: GraphRequest, chain: str, min_tvl: float = ROUTER_MIN_TVL) -> int:
+    """Stream the chain's pools into its graph and drop pools that disappeared
+
+    Pools are updated page by page, so routes keep working during the scan.
+    A failed scan leaves the pools it did not reach as they were.
+    """
+    graph = pool_graph(chain)
+    seen: Set[str] = set()
+    where = {"totalValueLockedUSD_gt": str(min_tvl)} if min_tvl > 0 else None
+    async for page in scan_pages(request, chain, "pools", where):
+        for pool in page:
+            if pool.total_value_locked_usd >= min_tvl and graph.update_pool(pool):
+                seen.add(pool.id.lower())
+    removed = graph.retain(seen)
+    logger.info(f"🧭 {chain} pool graph synced: {len(graph)} pools, {graph.token_count} tokens, {removed} removed")
+    return len(graph)
+
+
+_sync_task: Optional[asyncio.Task] = None
+
+
+def start_pool_graph_sync(
+    request: GraphRequest, chains: Iterable[str] = ROUTER_CHAINS, interval: float = ROUTER_SYNC_INTERVAL,
+    path: str = ROUTER_GRAPH_PATH,
+) -> Optional[asyncio.Task]:
+    """Sync every chain's graph now and then every interval seconds (0 = never), saving it to path"""
+    global _sync_task
+    chains = list(chains)
+    if interval <= 0 or not chains:
+        return None
+
+    async def run():
+        while True:
+            delay = interval
+            for chain in chains:
+                try:
+                    await sync_pool_graph(request, chain)
+                except ScanError as e:
+                    logger.warning(f"Pool graph sync stopped: {e}")
+                    delay = min(interval, ROUTER_RETRY_DELAY)
+                except Exception as e:
+                    logger.error(f"Pool graph sync failed on {chain}: {e}")
+                    delay = min(interval, ROUTER_RETRY_DELAY)
+            try:
+                save_pool_graphs(path)
+            except OSError as e:
+                logger.error(f"Could not save the pool graph to {path}: {e}")
+            await asyncio.sleep(delay)
+
+    if _sync_task is None or _sync_task.done():
+        _sync_task = asyncio.ensure_future(run())
+    return _sync_task
+
+
+def start_pool_graph_reload(path: str = ROUTER_GRAPH_PATH, poll: float = ROUTER_GRAPH_POLL) -> asyncio.Task:
+    """Load the graph file now and again whenever another process rewrites it"""
+    global _sync_task
+
+    async def run():
+        loaded = None
+        while True:
+            try:
+                modified = os.stat(path).st_mtime
+            except OSError:
+                modified = None
+            if modified is not None and modified != loaded:
+                load_pool_graphs(path)
+                loaded = modified
+            await asyncio.sleep(poll)
+
+    if _sync_task is None or _sync_task.done():
+        _sync_task = asyncio.ensure_future(run())
+    return _sync_task
+
+
+async def stop_pool_graph_sync():
+    global _sync_task
+    if _sync_task is not None:
+        _sync_task.cancel()
+        try:
+            await _sync_task
+        except asyncio.CancelledError:
+            pass
+        _sync_task = None
+
+
+__all__ = [
+    "PoolEdge",
+    "PoolGraph",
+    "Route",
+    "describe_swap",
+    "load_pool_graphs",
+    "pool_edge",
+    "pool_graph",
+    "save_pool_graphs",
+    "start_pool_graph_reload",
+    "start_pool_graph_sync",
+    "stop_pool_graph_sync",
+    "sync_pool_graph",
+]
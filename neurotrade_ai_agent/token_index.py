@@ -0,0 +1,292 @@
+import asyncio
+import bisect
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from intent import ACTION_WORDS, CHAIN_WORDS, FILLER_WORDS, Intent, intent_classifier
+from metrics import registry
+from pool_scanner import GraphRequest, ScanError, scan
+from typed_json import TokenRecord, loads
+
+logger = logging.getLogger(__name__)
+
+# 🔤 TOKEN SYMBOL INDEX
+# Per-chain lookup from symbol, name or address to the token's address,
+# built from the subgraph's full token list. Exact lookups are dict hits;
+# prefix completion is a binary search over the sorted keys. When several
+# tokens share a symbol (copycats are common) the one with the highest TVL
+# wins.
+#
+# The index is loaded from TOKEN_INDEX_PATH at startup and each chain is
+# rebuilt in the background TOKEN_INDEX_REFRESH_INTERVAL seconds after its
+# own last rebuild (0 = load only) by streaming its tokens (pool_scanner);
+# every rebuild is saved back to the file. The classifier's vocabulary is left alone (the subgraphs list
+# plenty of spam tokens named after ordinary words): resolve_mentions()
+# looks a query's tokens up after classification, taking the ones the
+# classifier knows plus `$`-prefixed or all-caps symbols, so "swap WBTC to
+# $PEPE on arbitrum" resolves both tokens without a network call.
+
+TOKEN_INDEX_PATH = os.getenv("TOKEN_INDEX_PATH", "token_index.json")
+TOKEN_INDEX_REFRESH_INTERVAL = float(os.getenv("TOKEN_INDEX_REFRESH_INTERVAL", "21600"))
+TOKEN_INDEX_RETRY_DELAY = 300
+# Tokens below this TVL (USD) are left out of the index
+TOKEN_INDEX_MIN_TVL = float(os.getenv("TOKEN_INDEX_MIN_TVL", "0"))
+
+# Deliberate symbol mentions: $pepe, PEPE
+_SYMBOL_MENTION = re.compile(r"(?<![\w$])(\$?)([A-Za-z][A-Za-z0-9]{1,11})\b")
+_RESERVED_WORDS = frozenset(FILLER_WORDS) | frozenset(CHAIN_WORDS) | frozenset(
+    word for words in ACTION_WORDS.values() for word in words
+)
+
+# Native assets are indexed by the subgraphs under their wrapped symbol
+WRAPPED_SYMBOLS = {"ETH": "WETH", "BTC": "WBTC", "MATIC": "WMATIC"}
+
+token_index_size = registry.gauge("neurotrade_token_index_tokens", "Tokens in the symbol index", ("chain",))
+
+
+@dataclass(frozen=True)
+class TokenEntry:
+    """One token of a chain's index"""
+    address: str
+    symbol: str
+    name: str = ""
+    decimals: int = 18
+    tvl_usd: float = 0.0
+
+    def to_json(self) -> Dict:
+        return {
+            "id": self.address, "symbol": self.symbol, "name": self.name,
+            "decimals": self.decimals, "totalValueLockedUSD": self.tvl_usd,
+        }
+
+
+class ChainTokenIndex:
+    """Immutable symbol/name/address index of one chain's tokens"""
+
+    def __init__(self, entries: Iterable[TokenEntry] = ()):
+        self.by_address: Dict[str, TokenEntry] = {}
+        self._by_key: Dict[str, TokenEntry] = {}
+        for entry in sorted(entries, key=lambda entry: -entry.tvl_usd):
+            self.by_address.setdefault(entry.address, entry)
+            # Highest TVL first, so setdefault keeps the deepest token per key
+            for key in (entry.symbol.lower(), entry.name.lower()):
+                if key:
+                    self._by_key.setdefault(key, entry)
+        self._keys = sorted(self._by_key)
+
+    def __len__(self) -> int:
+        return len(self.by_address)
+
+    def resolve(self, text: str) -> Optional[TokenEntry]:
+        """Token for an address, symbol or full name (case-insensitive)"""
+        key = text.strip().lower()
+        if key.startswith("0x"):
+            return self.by_address.get(key)
+        return self._by_key.get(key)
+
+    def complete(self, prefix: str, limit: int = 10) -> List[TokenEntry]:
+        """Tokens whose symbol or name starts with prefix, deepest first"""
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+        start = bisect.bisect_left(self._keys, prefix)
+        end = bisect.bisect_left(self._keys, prefix + "\uffff", lo=start)
+        matches = {self._by_key[key] for key in self._keys[start:end]}
+        return sorted(matches, key=lambda entry: -entry.tvl_usd)[:limit]
+
+
+class TokenIndex:
+    """Per-chain token indexes with a snapshot file and background refresh"""
+
+    def __init__(self, path: str = TOKEN_INDEX_PATH, refresh_interval: float = TOKEN_INDEX_REFRESH_INTERVAL):
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self._chains: Dict[str, ChainTokenIndex] = {}
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.loaded_at: Optional[float] = None
+        self.refreshed_at: Dict[str, float] = {}
+
+    def chain(self, chain: str) -> ChainTokenIndex:
+        return self._chains.get(chain) or ChainTokenIndex()
+
+    def resolve(self, text: str, chain: str = "ethereum") -> Optional[TokenEntry]:
+        return self.chain(chain).resolve(text)
+
+    def complete(self, prefix: str, chain: str = "ethereum", limit: int = 10) -> List[TokenEntry]:
+        return self.chain(chain).complete(prefix, limit)
+
+    def resolve_mentions(
+        self, text: str, intent: Intent, default_chain: str = "ethereum",
+    ) -> List[Tuple[str, Optional[TokenEntry]]]:
+        """(symbol, token) for every token the query mentions, in order of appearance
+
+        Words the classifier knows as tokens are always taken; other words
+        only when written as $symbol or in capitals and found in the index
+        of the query's chain. The token is None when the index does not
+        know the symbol.
+        """
+        chain = intent.chains[0] if intent.chains else default_chain
+        index = self.chain(chain)
+        mentions: Dict[str, Optional[TokenEntry]] = {}
+        for match in _SYMBOL_MENTION.finditer(text):
+            dollar, word = match.groups()
+            symbol = intent_classifier.token_symbol(word)
+            if symbol is not None:
+                entry = index.resolve(symbol) or index.resolve(WRAPPED_SYMBOLS.get(symbol, ""))
+            elif (dollar or word.isupper()) and word.lower() not in _RESERVED_WORDS:
+                entry = index.resolve(word)
+                if entry is None:
+                    continue
+                symbol = entry.symbol.upper()
+            else:
+                continue
+            mentions.setdefault(symbol, entry)
+        return list(mentions.items())
+
+    def replace(self, chain: str, entries: Iterable[TokenEntry]):
+        """Swap in a new index for chain"""
+        index = ChainTokenIndex(entries)
+        self._chains[chain] = index
+        token_index_size.set(len(index), chain=chain)
+
+    def stats(self) -> Dict[str, int]:
+        return {chain: len(index) for chain, index in self._chains.items()}
+
+    # --- snapshot file ---
+
+    def load(self) -> int:
+        """Load the snapshot file if there is one; returns the number of tokens"""
+        try:
+            with open(self.path, "rb") as f:
+                snapshot = loads(f.read())
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable token index {self.path}: {e}")
+            return 0
+        for chain, rows in snapshot.get("chains", {}).items():
+            self.replace(chain, (_entry(row) for row in rows))
+        self.refreshed_at.update(snapshot.get("refreshed_at", {}))
+        self.loaded_at = time.time()
+        count = sum(self.stats().values())
+        logger.info(f"🔤 Token index loaded: {count} tokens on {len(self._chains)} chains")
+        return count
+
+    def save(self):
+        """Write all chains to the snapshot file (atomically)"""
+        snapshot = {
+            "refreshed_at": self.refreshed_at,
+            "chains": {
+                chain: [entry.to_json() for entry in index.by_address.values()]
+                for chain, index in self._chains.items()
+            },
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    # --- refresh ---
+
+    async def refresh(self, request: GraphRequest, chain: str, min_tvl: float = TOKEN_INDEX_MIN_TVL) -> int:
+        """Rebuild one chain's index from the subgraph's full token list
+
+        The current index keeps serving until the scan completes; a failed
+        scan leaves it untouched.
+        """
+        entries = []
+        async for token in scan(request, chain, "tokens"):
+            if token.total_value_locked_usd >= min_tvl and token.symbol:
+                entries.append(_entry_from_record(token))
+        self.replace(chain, entries)
+        self.refreshed_at[chain] = time.time()
+        logger.info(f"🔤 Token index for {chain} rebuilt: {len(entries)} tokens")
+        return len(entries)
+
+    async def _refresh_logged(self, request: GraphRequest, chain: str) -> bool:
+        """refresh() with failures logged; False if the chain was not rebuilt"""
+        try:
+            await self.refresh(request, chain)
+            return True
+        except ScanError as e:
+            logger.warning(f"Token index refresh for {chain} stopped: {e}")
+        except Exception as e:
+            logger.error(f"Token index refresh for {chain} failed: {e}")
+        return False
+
+    async def refresh_all(self, request: GraphRequest, chains: Iterable[str]) -> bool:
+        """Refresh every chain and save the snapshot; False if any chain failed"""
+        complete = True
+        for chain in chains:
+            complete = await self._refresh_logged(request, chain) and complete
+        self.save()
+        return complete
+
+    def start_refresh(self, request: GraphRequest, chains: Iterable[str]) -> asyncio.Task:
+        """Refresh each chain once its own snapshot is stale, now and then periodically"""
+        chains = list(chains)
+
+        async def run():
+            # A failed chain keeps its old refreshed_at and is retried on its
+            # own after TOKEN_INDEX_RETRY_DELAY; the other chains keep their schedule
+            retry_at: Dict[str, float] = {}
+            while chains:
+                now = time.time()
+                due_at = {
+                    chain: retry_at.get(chain, self.refreshed_at.get(chain, 0.0) + self.refresh_interval)
+                    for chain in chains
+                }
+                due = [chain for chain in chains if due_at[chain] <= now]
+                if not due:
+                    await asyncio.sleep(min(due_at.values()) - now)
+                    continue
+                for chain in due:
+                    if await self._refresh_logged(request, chain):
+                        retry_at.pop(chain, None)
+                    else:
+                        retry_at[chain] = time.time() + min(self.refresh_interval, TOKEN_INDEX_RETRY_DELAY)
+                self.save()
+
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(run())
+        return self._refresh_task
+
+    async def stop(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+
+def _entry(row: Dict) -> TokenEntry:
+    return TokenEntry(
+        address=str(row["id"]).lower(),
+        symbol=str(row.get("symbol") or ""),
+        name=str(row.get("name") or ""),
+        decimals=int(row.get("decimals") or 18),
+        tvl_usd=float(row.get("totalValueLockedUSD") or 0.0),
+    )
+
+
+def _entry_from_record(token: TokenRecord) -> TokenEntry:
+    return TokenEntry(
+        address=token.id.lower(),
+        symbol=token.symbol,
+        name=token.name,
+        decimals=token.decimals,
+        tvl_usd=token.total_value_locked_usd,
+    )
+
+
+token_index = TokenIndex()
+
+
+__all__ = ["ChainTokenIndex", "TokenEntry", "TokenIndex", "token_index"]
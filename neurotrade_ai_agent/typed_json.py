@@ -0,0 +1,324 @@
+import json
+import os
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Type, TypeVar, Union, get_type_hints
+
+try:
+    import msgspec
+except ImportError:  # optional: typed decoding in C
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:  # optional: faster untyped parsing
+    orjson = None
+
+# ⚡ TYPED JSON DECODING
+# Subgraph and price responses are decoded straight from the response bytes
+# into typed records, with the subgraph's string-encoded numbers
+# ("derivedETH": "0.0004") converted on the way in, instead of building
+# nested dicts first and calling float() field by field afterwards.
+#
+# msgspec, when installed, does the whole decode and conversion in C; without
+# it the payload is parsed with orjson (or the stdlib json module) and the
+# records are built in Python. Both are optional: JSON_DECODER picks one
+# explicitly (msgspec, orjson or json), "auto" takes the fastest available.
+
+JSON_DECODER = os.getenv("JSON_DECODER", "auto").lower()
+
+R = TypeVar("R")
+JsonBytes = Union[bytes, bytearray, memoryview, str]
+
+
+def _choose_backend() -> str:
+    available = [name for name, module in (("msgspec", msgspec), ("orjson", orjson)) if module is not None]
+    if JSON_DECODER in available or JSON_DECODER == "json":
+        return JSON_DECODER
+    return available[0] if available else "json"
+
+
+JSON_BACKEND = _choose_backend()
+
+
+def _loads_for(backend: str) -> Callable[[JsonBytes], Any]:
+    if backend == "msgspec":
+        return msgspec.json.decode
+    if backend == "orjson":
+        return orjson.loads
+    return json.loads
+
+
+loads = _loads_for(JSON_BACKEND)
+
+
+async def read_json(response) -> Any:
+    """Parse an aiohttp response body with the fastest available parser"""
+    return loads(await response.read())
+
+
+class _PlainRecord:
+    """Stand-in for msgspec.Struct when msgspec is not installed
+
+    Accepts the same class options (rename=..., frozen=...) so records are
+    declared once for both backends.
+    """
+
+    def __init_subclass__(cls, rename: Optional[Dict[str, str]] = None, **options):
+        super().__init_subclass__()
+        cls.__rename__ = dict(rename or {})
+
+    def __init__(self, **values):
+        # Fields left out fall back to the class-level defaults
+        self.__dict__.update(values)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name, None)!r}" for name in type(self).__annotations__)
+        return f"{type(self).__name__}({fields})"
+
+    def __eq__(self, other) -> bool:
+        return type(self) is type(other) and all(
+            getattr(self, name, None) == getattr(other, name, None) for name in type(self).__annotations__
+        )
+
+
+Record = msgspec.Struct if msgspec is not None else _PlainRecord
+
+
+class TokenRecord(Record, frozen=True, rename={
+    "derived_eth": "derivedETH",
+    "total_supply": "totalSupply",
+    "volume_usd": "volumeUSD",
+    "fees_usd": "feesUSD",
+    "tx_count": "txCount",
+    "total_value_locked_usd": "totalValueLockedUSD",
+}):
+    """Subgraph `Token` entity with numeric fields as numbers"""
+    id: str
+    symbol: str = ""
+    name: str = ""
+    decimals: int = 18
+    derived_eth: float = 0.0
+    total_supply: float = 0.0
+    volume: float = 0.0
+    volume_usd: float = 0.0
+    fees_usd: float = 0.0
+    tx_count: int = 0
+    total_value_locked_usd: float = 0.0
+
+
+class PoolTokenRecord(Record, frozen=True):
+    """token0/token1 of a pool"""
+    id: str = ""
+    symbol: str = ""
+    name: str = ""
+    decimals: int = 18
+
+
+class PoolRecord(Record, frozen=True, rename={
+    "fee_tier": "feeTier",
+    "sqrt_price": "sqrtPrice",
+    "token0_price": "token0Price",
+    "token1_price": "token1Price",
+    "volume_usd": "volumeUSD",
+    "tx_count": "txCount",
+    "total_value_locked_usd": "totalValueLockedUSD",
+}):
+    """Subgraph `Pool` entity with numeric fields as numbers"""
+    id: str
+    fee_tier: int = 0
+    token0: Optional[PoolTokenRecord] = None
+    token1: Optional[PoolTokenRecord] = None
+    liquidity: float = 0.0
+    sqrt_price: float = 0.0
+    # null until the pool is initialized, the only nullable number in the schema
+    tick: Optional[int] = None
+    token0_price: float = 0.0
+    token1_price: float = 0.0
+    volume_usd: float = 0.0
+    tx_count: int = 0
+    total_value_locked_usd: float = 0.0
+
+
+# --- Python decoding (orjson / json) ---
+
+def _nullable(annotation) -> bool:
+    return type(None) in getattr(annotation, "__args__", ())
+
+
+def _null_field(name: str):
+    # Same rule as msgspec: a missing field takes its default, an explicit null
+    # is only accepted where the field is Optional
+    raise ValueError(f"Expected a value, got null for {name!r}")
+
+
+def _field_converter(annotation) -> Callable[[Any], Any]:
+    if _nullable(annotation):
+        annotation = next((arg for arg in annotation.__args__ if arg is not type(None)), annotation)
+    if annotation in (float, int):
+        return annotation
+    record_type = next(
+        (arg for arg in getattr(annotation, "__args__", ()) if isinstance(arg, type) and issubclass(arg, Record)),
+        annotation if isinstance(annotation, type) and issubclass(annotation, Record) else None,
+    )
+    if record_type is not None:
+        build = record_builder(record_type)
+        return lambda value: build(value) if isinstance(value, dict) else None
+    return lambda value: value
+
+
+_MISSING = object()
+
+
+@lru_cache(maxsize=None)
+def record_builder(record_type: Type[R]) -> Callable[[Dict[str, Any]], R]:
+    """Function turning one parsed JSON object into record_type
+
+    The field table (JSON key, converter, default) is worked out once per
+    record type; building a record is then one lookup and conversion per field.
+    """
+    if msgspec is not None:
+        specs = {field.name: field for field in msgspec.structs.fields(record_type)}
+    fields = []
+    for name, annotation in get_type_hints(record_type).items():
+        if msgspec is not None:
+            key = specs[name].encode_name
+            default = None if specs[name].default is msgspec.NODEFAULT else specs[name].default
+        else:
+            key = record_type.__rename__.get(name, name)
+            default = getattr(record_type, name, None)
+        fields.append((name, key, _field_converter(annotation), default, _nullable(annotation)))
+
+    def values(obj: Dict[str, Any]) -> Dict[str, Any]:
+        result = {}
+        for name, key, convert, default, nullable in fields:
+            value = obj.get(key, _MISSING)
+            if value is _MISSING:
+                result[name] = default
+            elif value is not None:
+                result[name] = convert(value)
+            elif nullable:
+                result[name] = None
+            else:
+                _null_field(key)
+        return result
+
+    if msgspec is not None:
+        return lambda obj: record_type(**values(obj))
+
+    def build(obj: Dict[str, Any]) -> R:
+        # Plain records skip __init__: the values dict becomes the instance dict
+        record = object.__new__(record_type)
+        record.__dict__ = values(obj)
+        return record
+    return build
+
+
+def record_to_dict(record: Any) -> Dict[str, Any]:
+    """JSON-ready dict of a record, under the subgraph's field names"""
+    if msgspec is not None:
+        return msgspec.to_builtins(record)
+    rename = type(record).__rename__
+    result = {}
+    for name in type(record).__annotations__:
+        value = getattr(record, name, None)
+        result[rename.get(name, name)] = record_to_dict(value) if isinstance(value, _PlainRecord) else value
+    return result
+
+
+@lru_cache(maxsize=None)
+def _record_decoder(record_type: type) -> Callable[[JsonBytes], Any]:
+    if msgspec is not None and JSON_BACKEND == "msgspec":
+        return msgspec.json.Decoder(record_type, strict=False).decode
+    build = record_builder(record_type)
+
+    def decode(raw: JsonBytes):
+        value = loads(raw)
+        try:
+            return build(value)
+        except (AttributeError, TypeError) as e:
+            raise ValueError(f"Malformed {record_type.__name__}: {e}") from e
+    return decode
+
+
+def decode_record(raw: JsonBytes, record_type: Type[R]) -> R:
+    """One record from a JSON object (e.g. one written with record_to_dict)"""
+    return _record_decoder(record_type)(raw)
+
+
+# --- Graph responses ---
+
+@lru_cache(maxsize=None)
+def _msgspec_decoder(key: str, record_type: type, many: bool):
+    item = List[record_type] if many else record_type
+    data = msgspec.defstruct(f"{key}_data", [(key, Optional[item], None)])
+    envelope = msgspec.defstruct(f"{key}_response", [("data", Optional[data], None)])
+    # strict=False accepts the subgraph's numeric strings for float/int fields
+    return msgspec.json.Decoder(envelope, strict=False)
+
+
+def _decode_msgspec(raw: JsonBytes, key: str, record_type: type, many: bool):
+    data = _msgspec_decoder(key, record_type, many).decode(raw).data
+    return getattr(data, key) if data is not None else None
+
+
+def _python_decoder(parse: Callable[[JsonBytes], Any]):
+    def decode(raw: JsonBytes, key: str, record_type: type, many: bool):
+        try:
+            value = ((parse(raw) or {}).get("data") or {}).get(key)
+            if value is None:
+                return None
+            build = record_builder(record_type)
+            return [build(item) for item in value] if many else build(value)
+        except (AttributeError, TypeError) as e:
+            # Wrong shapes (a list where an object belongs, ...): a ValueError, as with msgspec
+            raise ValueError(f"Malformed {key} response: {e}") from e
+    return decode
+
+
+def graph_decoders() -> Dict[str, Callable]:
+    """decode(raw, key, record_type, many) for every available backend"""
+    decoders = {"json": _python_decoder(json.loads)}
+    if orjson is not None:
+        decoders["orjson"] = _python_decoder(orjson.loads)
+    if msgspec is not None:
+        decoders["msgspec"] = _decode_msgspec
+    return decoders
+
+
+_decode_graph = graph_decoders()[JSON_BACKEND]
+
+
+def decode_graph_list(raw: JsonBytes, key: str, record_type: Type[R], required: bool = False) -> List[R]:
+    """Records under data.<key> of a GraphQL response body
+
+    An absent list (e.g. an error response) decodes to [], or raises
+    ValueError if required. Malformed bodies and records raise ValueError in
+    every backend.
+    """
+    records = _decode_graph(raw, key, record_type, True)
+    if records is None:
+        if required:
+            raise ValueError(f"GraphQL response has no data.{key}")
+        return []
+    return records
+
+
+def decode_graph_one(raw: JsonBytes, key: str, record_type: Type[R]) -> Optional[R]:
+    """The record under data.<key> of a GraphQL response body, None if absent"""
+    return _decode_graph(raw, key, record_type, False)
+
+
+__all__ = [
+    "JSON_BACKEND",
+    "PoolRecord",
+    "PoolTokenRecord",
+    "TokenRecord",
+    "decode_graph_list",
+    "decode_graph_one",
+    "decode_record",
+    "graph_decoders",
+    "loads",
+    "read_json",
+    "record_builder",
+    "record_to_dict",
+]